@@ -0,0 +1,90 @@
+import timeit
+from asyncio import gather, get_event_loop
+
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+from .common import (
+    BenchService,
+    create_parser,
+    create_payload,
+    scenarios,
+    summarize,
+    write_results
+)
+
+
+class AsyncioBenchService(BenchService):
+    svc = BenchService.svc
+
+    @svc.rpc
+    async def echo(self, payload):
+        return self.response
+
+
+async def run_scenario(args, encoding, payload_size, concurrency):
+    broker = MemoryBroker(latency=args.latency)
+    server = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='bench.server',
+    )
+    service = AsyncioBenchService(create_payload(args, payload_size))
+    server.add_svc(service.svc, service)
+    server.set_default_encoding(encoding)
+
+    client = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='bench.client',
+    )
+    client.set_default_encoding(encoding)
+    bench = client.client('bench', 'bench.server')
+
+    server.configure()
+    client.configure()
+    await server.start()
+    await client.start()
+
+    payload = create_payload(args, payload_size)
+    latencies = []
+    calls_per_worker = max(args.calls // concurrency, 1)
+
+    async def worker():
+        for _ in range(calls_per_worker):
+            start = timeit.default_timer()
+            resp = await bench.echo(payload)
+            latencies.append(timeit.default_timer() - start)
+            assert resp.ok, resp
+
+    start = timeit.default_timer()
+    await gather(*[worker() for _ in range(concurrency)])
+    elapsed = timeit.default_timer() - start
+
+    await client.stop()
+    await server.stop()
+    return summarize(
+        'asyncio',
+        encoding,
+        payload_size,
+        concurrency,
+        elapsed,
+        latencies,
+    )
+
+
+async def main(args):
+    results = []
+    for encoding, payload_size, concurrency in scenarios(args):
+        results.append(await run_scenario(
+            args,
+            encoding,
+            payload_size,
+            concurrency,
+        ))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    args = create_parser('asyncio round-trip benchmark').parse_args()
+    get_event_loop().run_until_complete(main(args))
@@ -0,0 +1,120 @@
+import timeit
+from uuid import uuid4
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.consts import (
+    REPLY_ID,
+    RPC_ACCEPT_HEADER,
+    RPC_EXCHANGE,
+    RPC_TOPIC
+)
+from simple_amqp_rpc.gevent import GeventAmqpRpc
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+from .common import create_parser, write_results
+
+
+class BenchService:
+    svc = Service('bench')
+
+    @svc.rpc
+    def echo(self, payload: str):
+        return payload
+
+
+class MsgOnlyRpc(GeventAmqpRpc):
+    def _send_call_msg(self, reply_id, timeout, msg, route):
+        return msg
+
+
+class LegacyRpcClient:
+    def __init__(self, rpc, service: str, route: str):
+        self.rpc = rpc
+        self.service = service
+        self.route = route
+
+        self.methods_cache = {}
+
+    def __getattribute__(self, name):
+        try:
+            return object.__getattribute__(self, name)
+        except AttributeError:
+            pass
+
+        try:
+            return self.methods_cache[name]
+        except KeyError:
+            pass
+
+        def rpc_call(*args):
+            call = RpcCall(
+                route=self.route,
+                service=self.service,
+                method=name,
+                args=args,
+            )
+            return legacy_send_call(self.rpc, call)
+
+        self.methods_cache[name] = rpc_call
+        return rpc_call
+
+
+def legacy_send_call(rpc, call: RpcCall):
+    rpc.log_call_sent(call)
+    encoder = rpc._call_encoders[rpc._get_encoding(call.route)]
+    msg = encoder(call)
+    reply_id = REPLY_ID.format(id=str(uuid4()))
+    msg = msg.replace(
+        exchange=RPC_EXCHANGE.format(route=call.route),
+        topic=RPC_TOPIC,
+        reply_to=rpc._resp_queue,
+        correlation_id=reply_id,
+    )
+    return msg.replace(
+        headers={RPC_ACCEPT_HEADER: rpc._get_accept_header(call.route)},
+    )
+
+
+def measure(client, payload: str, calls: int) -> float:
+    def run():
+        client.echo(payload)
+
+    return min(timeit.repeat(run, number=calls, repeat=5)) / calls
+
+
+def main(args):
+    rpc = MsgOnlyRpc(
+        conn=GeventMemoryConnection(MemoryBroker()),
+        route='bench.client',
+    )
+    results = []
+    for encoding in args.encodings:
+        rpc.set_default_encoding(encoding)
+        for payload_size in args.payload_sizes:
+            payload = 'x' * payload_size
+            legacy = measure(
+                LegacyRpcClient(rpc, 'bench', 'bench.server'),
+                payload,
+                args.calls,
+            )
+            current = measure(
+                rpc.client(BenchService.svc, 'bench.server'),
+                payload,
+                args.calls,
+            )
+            results.append({
+                'encoding': encoding,
+                'payload_size': payload_size,
+                'legacy_us': round(legacy * 1e6, 3),
+                'current_us': round(current * 1e6, 3),
+                'reduction_pct': round((1 - current / legacy) * 100, 1),
+            })
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    parser = create_parser('client per-call overhead microbenchmark')
+    parser.set_defaults(calls=20000, payload_sizes=[16, 1024])
+    main(parser.parse_args())
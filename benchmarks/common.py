@@ -0,0 +1,96 @@
+import json
+import sys
+from argparse import ArgumentParser
+
+from simple_amqp_rpc import Service
+
+
+class BenchService:
+    svc = Service('bench')
+
+    def __init__(self, response):
+        self.response = response
+
+
+def create_payload(args, payload_size: int):
+    if args.binary:
+        return b'x' * payload_size
+
+    return 'x' * payload_size
+
+
+def create_parser(description: str) -> ArgumentParser:
+    parser = ArgumentParser(description=description)
+    parser.add_argument(
+        '--calls', type=int, default=2000,
+        help='calls per scenario',
+    )
+    parser.add_argument(
+        '--payload-sizes', type=int, nargs='+', default=[16, 1024, 65536],
+        help='payload sizes in bytes',
+    )
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 16, 128],
+        help='concurrent callers',
+    )
+    parser.add_argument(
+        '--encodings', nargs='+', default=['json', 'msgpack'],
+        help='wire encodings',
+    )
+    parser.add_argument(
+        '--binary', action='store_true',
+        help='send bytes payloads instead of strings',
+    )
+    parser.add_argument(
+        '--latency', type=float, default=0,
+        help='injected broker latency per delivery, in seconds',
+    )
+    parser.add_argument(
+        '--output', default='-',
+        help='file to write the json results to, - for stdout',
+    )
+    return parser
+
+
+def percentile(values, pct: float) -> float:
+    index = int(round((len(values) - 1) * pct / 100))
+    return values[index]
+
+
+def summarize(
+        backend: str,
+        encoding: str,
+        payload_size: int,
+        concurrency: int,
+        elapsed: float,
+        latencies,
+) -> dict:
+    latencies = sorted(latencies)
+    return {
+        'backend': backend,
+        'encoding': encoding,
+        'payload_size': payload_size,
+        'concurrency': concurrency,
+        'calls': len(latencies),
+        'seconds': round(elapsed, 6),
+        'calls_per_sec': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+    }
+
+
+def scenarios(args):
+    for encoding in args.encodings:
+        for payload_size in args.payload_sizes:
+            for concurrency in args.concurrency:
+                yield encoding, payload_size, concurrency
+
+
+def write_results(results, output: str):
+    data = json.dumps({'results': results}, indent=2)
+    if output == '-':
+        sys.stdout.write(data + '\n')
+        return
+
+    with open(output, 'w') as f:
+        f.write(data + '\n')
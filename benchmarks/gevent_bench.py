@@ -0,0 +1,93 @@
+from gevent import monkey  # isort:skip
+monkey.patch_all()  # isort:skip
+
+import timeit  # noqa: E402
+
+from gevent.pool import Group  # noqa: E402
+
+from simple_amqp_rpc.gevent import GeventAmqpRpc  # noqa: E402
+from simple_amqp_rpc.memory import MemoryBroker  # noqa: E402
+from simple_amqp_rpc.memory.gevent import GeventMemoryConnection  # noqa
+
+from .common import (  # noqa: E402
+    BenchService,
+    create_parser,
+    create_payload,
+    scenarios,
+    summarize,
+    write_results
+)
+
+
+class GeventBenchService(BenchService):
+    svc = BenchService.svc
+
+    @svc.rpc
+    def echo(self, payload):
+        return self.response
+
+
+def run_scenario(args, encoding, payload_size, concurrency):
+    broker = MemoryBroker(latency=args.latency)
+    server = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='bench.server',
+    )
+    service = GeventBenchService(create_payload(args, payload_size))
+    server.add_svc(service.svc, service)
+    server.set_default_encoding(encoding)
+
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='bench.client',
+    )
+    client.set_default_encoding(encoding)
+    bench = client.client('bench', 'bench.server')
+
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    payload = create_payload(args, payload_size)
+    latencies = []
+    calls_per_worker = max(args.calls // concurrency, 1)
+
+    def worker(_):
+        for _ in range(calls_per_worker):
+            start = timeit.default_timer()
+            resp = bench.echo(payload)
+            latencies.append(timeit.default_timer() - start)
+            assert resp.ok, resp
+
+    start = timeit.default_timer()
+    Group().map(worker, range(concurrency))
+    elapsed = timeit.default_timer() - start
+
+    client.stop()
+    server.stop()
+    return summarize(
+        'gevent',
+        encoding,
+        payload_size,
+        concurrency,
+        elapsed,
+        latencies,
+    )
+
+
+def main(args):
+    results = []
+    for encoding, payload_size, concurrency in scenarios(args):
+        results.append(run_scenario(
+            args,
+            encoding,
+            payload_size,
+            concurrency,
+        ))
+
+    write_results(results, args.output)
+
+
+if __name__ == '__main__':
+    main(create_parser('gevent round-trip benchmark').parse_args())
@@ -27,7 +27,11 @@ setup(
         'Programming Language :: Python :: 3.6',
     ],
     keywords='simple amqp rpc',
-    packages=['simple_amqp_rpc', 'simple_amqp_rpc.base'],
+    packages=[
+        'simple_amqp_rpc',
+        'simple_amqp_rpc.base',
+        'simple_amqp_rpc.memory',
+    ],
     install_requires=[
         'simple_amqp>=0.2.3',
         'msgpack',
@@ -38,6 +42,12 @@ setup(
         ],
         'gevent': [
             'gevent',
-        ]
+        ],
+        'lz4': [
+            'lz4',
+        ],
+        'zstd': [
+            'zstandard',
+        ],
     },
 )
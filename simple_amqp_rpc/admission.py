@@ -0,0 +1,122 @@
+from time import monotonic, time
+
+from simple_amqp import AmqpMsg
+
+from .consts import (
+    RPC_ACCEPT_CACHE_SIZE,
+    RPC_METHOD_HEADER,
+    RPC_SENT_AT_HEADER,
+    SHED_INFLIGHT,
+    SHED_QUEUE_AGE,
+    SHED_RATE_LIMIT
+)
+from .deadline import decode_header_time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.tokens = self.burst
+        self._updated = monotonic()
+
+    def take(self) -> bool:
+        now = monotonic()
+        self.tokens = min(
+            self.tokens + (now - self._updated) * self.rate,
+            self.burst,
+        )
+        self._updated = now
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class AdmissionControl:
+    def __init__(self):
+        self.max_inflight = None
+        self.max_queue_age = None
+        self.shed = {
+            SHED_INFLIGHT: 0,
+            SHED_QUEUE_AGE: 0,
+            SHED_RATE_LIMIT: 0,
+        }
+
+        self._buckets = {}
+        self._methods = {}
+
+    def set_rate_limit(
+            self,
+            service: str,
+            method: str=None,
+            rate: float=None,
+            burst: float=None,
+    ):
+        key = '{}:{}'.format(service, method or '')
+        self._methods = {}
+        if rate is None:
+            self._buckets.pop(key, None)
+            return
+
+        self._buckets[key] = TokenBucket(rate, burst)
+
+    def admit(self, msg: AmqpMsg, running: int) -> str:
+        if self.max_inflight is not None and running >= self.max_inflight:
+            return self._shed(SHED_INFLIGHT)
+
+        headers = msg.headers
+        if not headers:
+            return None
+
+        if self.max_queue_age is not None:
+            sent_at = decode_header_time(headers.get(RPC_SENT_AT_HEADER))
+            if sent_at is not None and \
+                    time() - sent_at > self.max_queue_age:
+                return self._shed(SHED_QUEUE_AGE)
+
+        return self.admit_method(headers.get(RPC_METHOD_HEADER))
+
+    def admit_local(self, method: str, running: int) -> str:
+        if self.max_inflight is not None and running >= self.max_inflight:
+            return self._shed(SHED_INFLIGHT)
+
+        return self.admit_method(method)
+
+    def admit_method(self, method: str) -> str:
+        if not self._buckets:
+            return None
+
+        bucket = self._get_bucket(method)
+        if bucket is not None and not bucket.take():
+            return self._shed(SHED_RATE_LIMIT)
+
+        return None
+
+    def stats(self) -> dict:
+        return dict(self.shed)
+
+    def _get_bucket(self, method: str) -> TokenBucket:
+        if method is None:
+            return None
+
+        try:
+            return self._methods[method]
+        except KeyError:
+            pass
+
+        bucket = self._buckets.get(method)
+        if bucket is None:
+            service = method.partition(':')[0]
+            bucket = self._buckets.get(service + ':')
+
+        if len(self._methods) >= RPC_ACCEPT_CACHE_SIZE:
+            self._methods = {}
+
+        self._methods[method] = bucket
+        return bucket
+
+    def _shed(self, reason: str) -> str:
+        self.shed[reason] += 1
+        return reason
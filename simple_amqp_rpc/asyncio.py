@@ -1,17 +1,56 @@
-import traceback
-from asyncio import Future, wait_for
+from asyncio import (
+    CancelledError,
+    Future,
+    Queue,
+    Semaphore,
+    TimeoutError,
+    as_completed,
+    ensure_future,
+    gather,
+    get_event_loop,
+    shield,
+    sleep,
+    wait,
+    wait_for
+)
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from inspect import isasyncgen, isawaitable, isgenerator
+from time import monotonic, perf_counter, time
+from typing import List
 
 from simple_amqp import AmqpMsg, AmqpParameters
 from simple_amqp.asyncio import AsyncioAmqpConnection
 
 from simple_amqp_rpc import RpcCall, RpcResp
-from simple_amqp_rpc.base import BaseAmqpRpc
+from simple_amqp_rpc.base import BaseAmqpRpc, RespStream
+from simple_amqp_rpc.base.stream import StreamCredit, StreamStalled
+from simple_amqp_rpc.cache import cache_key, copy_resp
+from simple_amqp_rpc.compression import PayloadTooLarge
 from simple_amqp_rpc.consts import (
     CALL_ARGS_MISMATCH,
     CALL_ERROR,
+    EXECUTOR_THREAD,
     OK,
-    RPC_CALL_TIMEOUT
+    RPC_BATCH_SERVICE,
+    RPC_CACHE_SIZE,
+    RPC_CALL_TIMEOUT,
+    RPC_DEFAULT_LANE,
+    RPC_DRAIN_INTERVAL,
+    RPC_DRAIN_TIMEOUT,
+    RPC_MAX_PENDING_CALLS,
+    RPC_STREAM_CREDIT_TIMEOUT,
+    RPC_STREAM_CREDIT_TO_HEADER,
+    SERVER_BUSY,
+    STREAM_CHUNK,
+    TOO_MANY_CALLS
 )
+from simple_amqp_rpc.deadline import reset_call_deadline, set_call_deadline
+from simple_amqp_rpc.executor import CallExecutor
+from simple_amqp_rpc.lanes import call_lane
+from simple_amqp_rpc.limiter import RouteGuard
+from simple_amqp_rpc.metrics import Instrumentation
+from simple_amqp_rpc.retry import RetryPolicy
 
 
 class AsyncioAmqpRpc(BaseAmqpRpc):
@@ -21,49 +60,111 @@ class AsyncioAmqpRpc(BaseAmqpRpc):
             params: AmqpParameters = None,
             route: str='service.name',
             call_timeout: int=RPC_CALL_TIMEOUT,
+            max_concurrent_calls: int=None,
+            max_pending_calls: int=RPC_MAX_PENDING_CALLS,
+            publish_channels: int=1,
+            max_unconfirmed_publishes: int=None,
+            cache_size: int=RPC_CACHE_SIZE,
             logger=None,
+            instrumentation: Instrumentation=None,
     ):
         super().__init__(
             conn=conn,
             params=params,
             route=route,
             call_timeout=call_timeout,
+            max_concurrent_calls=max_concurrent_calls,
+            max_pending_calls=max_pending_calls,
+            publish_channels=publish_channels,
+            max_unconfirmed_publishes=max_unconfirmed_publishes,
+            cache_size=cache_size,
             logger=logger,
+            instrumentation=instrumentation,
         )
-        self._response_futures = {}
+        self._call_semaphore = None
+        self.set_max_concurrent_calls(max_concurrent_calls)
+
+        self._publish_limits = {}
+        self._watch_channels()
 
     async def start(self, auto_reconnect: bool=True):
         self.conn.add_stage(self.setup_stage)
-        self.conn.add_stage(self.listen_stage)
         await self.conn.start(auto_reconnect)
+        if self._max_concurrent_calls is not None:
+            await self._set_prefetch(self._get_prefetch_count())
+
+        await self.conn.run_stage(self.listen_stage)
+        self._listening = True
+
+    async def stop(self, drain_timeout: int=RPC_DRAIN_TIMEOUT):
+        if self._listening:
+            self._draining = True
+            self._listening = False
+            await self._cancel_listen_consumers()
+            await self._drain_calls(drain_timeout)
 
-    async def stop(self):
         await self.conn.stop()
+        self._shutdown_executors()
+
+    def set_max_concurrent_calls(self, max_concurrent_calls: int):
+        self._max_concurrent_calls = max_concurrent_calls
+        self._call_semaphore = None
+        if max_concurrent_calls is not None:
+            self._call_semaphore = Semaphore(max_concurrent_calls)
+
+        self._update_lane_scheduler()
 
     def _create_conn(self, params: AmqpParameters):
         return AsyncioAmqpConnection(params)
 
     async def recv_call(self, call: RpcCall) -> RpcResp:
         self.log_call_recv(call)
+        if self.instrumentation is None:
+            return await self._run_call(call)
+
+        self.instrumentation.call_received(call)
+        start = perf_counter()
+        resp = None
+        try:
+            resp = await self._run_call(call)
+            return resp
+        finally:
+            self.instrumentation.call_handled(
+                call,
+                resp,
+                perf_counter() - start,
+            )
+
+    async def _run_call(self, call: RpcCall) -> RpcResp:
         method, error = self._get_method(call.service, call.method)
         if error:
             return error
 
-        resp = None
-        try:
-            resp = await method(*call.args)
-        except TypeError:
+        args, kwargs, error = self._validate_call(call)
+        if error:
+            return error
+
+        executor = self._get_call_executor(call)
+        if executor is not None and executor.full:
+            executor.rejected += 1
             return RpcResp(
-                status=CALL_ARGS_MISMATCH,
-                body='Invalid call arguments',
+                status=SERVER_BUSY,
+                body='Too many queued calls',
             )
-        except Exception as e:
-            if not self._recv_error_handlers:
-                traceback.print_exc()
-            else:
-                for handler in self._recv_error_handlers:
-                    handler(e)
 
+        resp = None
+        try:
+            if executor is not None:
+                resp = await self._run_in_executor(
+                    executor,
+                    self._create_executor_call(call, method, args, kwargs),
+                )
+            else:
+                resp = method(*args, **kwargs)
+                if isawaitable(resp):
+                    resp = await resp
+        except Exception as e:
+            self._on_recv_call_error(e)
             return RpcResp(
                 status=CALL_ERROR,
             )
@@ -73,36 +174,721 @@ class AsyncioAmqpRpc(BaseAmqpRpc):
             body=resp,
         )
 
-    async def _send_call_msg(
+    async def _run_in_executor(self, executor: CallExecutor, func):
+        executor.pending += 1
+        try:
+            return await get_event_loop().run_in_executor(
+                executor.pool,
+                func,
+            )
+        finally:
+            executor.pending -= 1
+
+    def _create_executor_pool(self, executor: str, max_workers: int):
+        if executor == EXECUTOR_THREAD:
+            return ThreadPoolExecutor(max_workers)
+
+        return self._create_process_pool(max_workers)
+
+    async def _send_guarded_call_msg(
             self,
+            guard: RouteGuard,
             reply_id: str,
             timeout: int,
             msg: AmqpMsg,
             route: str,
     ) -> RpcResp:
-        await self._rpc_call_channel.publish(msg)
+        error = guard.acquire()
+        if error is not None:
+            return error
+
+        start = monotonic()
+        try:
+            resp = await self._wait_call_msg(reply_id, timeout, msg, route)
+        except CancelledError:
+            guard.cancel()
+            raise
+        except Exception:
+            guard.release(monotonic() - start, None)
+            raise
+
+        guard.release(monotonic() - start, resp)
+        return resp
+
+    async def _wait_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+    ) -> RpcResp:
+        if self.pending_calls.full:
+            return RpcResp(
+                status=TOO_MANY_CALLS,
+                body='Too many pending calls',
+            )
+
+        future = Future()
+        self.pending_calls.add(reply_id, future, route)
+        try:
+            await self._publish(msg)
+            return await wait_for(future, timeout)
+        finally:
+            self.pending_calls.discard(reply_id)
+
+    async def _send_retried_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        deadline = monotonic() + timeout
+        attempt = 0
+        while True:
+            resp = await self._send_hedged_call(
+                call,
+                deadline - monotonic(),
+                policy,
+            )
+            if not policy.should_retry(resp, attempt):
+                return resp
+
+            backoff = policy.get_backoff(attempt)
+            if monotonic() + backoff >= deadline:
+                return resp
+
+            attempt += 1
+            self.retried_calls += 1
+            await sleep(backoff)
+            if monotonic() >= deadline:
+                return resp
+
+    async def _send_hedged_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        hedge_delay = self._get_hedge_delay(call, policy)
+        if hedge_delay is None or hedge_delay >= timeout:
+            return await self._send_sampled_call(call, timeout, policy)
+
+        deadline = monotonic() + timeout
+        attempts = [
+            ensure_future(self._send_sampled_call(call, timeout, policy)),
+        ]
+        try:
+            done, _ = await wait(attempts, timeout=hedge_delay)
+            if not done and monotonic() < deadline and \
+                    self.get_hedge_budget(call.route).take():
+                attempts.append(ensure_future(self._send_sampled_call(
+                    call,
+                    deadline - monotonic(),
+                    policy,
+                )))
+
+            for attempt in as_completed(attempts):
+                resp = await attempt
+                if resp.status not in policy.statuses:
+                    return resp
+
+            return resp
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def _send_sampled_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        if policy.latencies is None:
+            return await self._send_call_attempt(call, timeout)
+
+        start = monotonic()
+        resp = await self._send_call_attempt(call, timeout)
+        policy.latencies.add(monotonic() - start)
+        return resp
+
+    async def _send_instrumented_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+    ) -> RpcResp:
+        self.instrumentation.call_sent(call)
+        start = perf_counter()
+        resp = None
+        try:
+            resp = await self._send_call_with_options(call, timeout)
+            return resp
+        finally:
+            self.instrumentation.call_done(
+                call,
+                resp,
+                perf_counter() - start,
+            )
+
+    async def _send_local_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        resp = await wait_for(self._run_local_call(call, timeout), timeout)
+        if self._is_stream_body(resp.body):
+            await self._close_stream_body(resp.body)
+            return self._create_stream_required_resp()
+
+        if self._loopback_copy:
+            resp = resp.replace(body=deepcopy(resp.body))
+
+        return resp
+
+    async def _run_local_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        resp = self._admit_local_call(call)
+        if resp is not None:
+            return resp
+
+        call = self._copy_local_call(call)
+        self._calls_running += 1
+        try:
+            release = await self._acquire_call_slot(self._get_call_lane(call))
+            try:
+                if timeout is None:
+                    return await self.recv_call(call)
+
+                token = set_call_deadline(time() + timeout)
+                try:
+                    return await self.recv_call(call)
+                finally:
+                    reset_call_deadline(token)
+            finally:
+                if release is not None:
+                    release()
+        finally:
+            self._calls_running -= 1
+
+    async def _stream_local_call(self, call: RpcCall, timeout: int):
+        resp = await wait_for(self._run_local_call(call, timeout), timeout)
+        chunks = resp.body
+        if not self._is_stream_body(chunks):
+            yield resp
+            return
+
+        try:
+            if isasyncgen(chunks):
+                async for chunk in chunks:
+                    yield self._create_local_chunk(chunk)
+            else:
+                for chunk in chunks:
+                    yield self._create_local_chunk(chunk)
+        except Exception as e:
+            self._on_recv_call_error(e)
+            yield RpcResp(status=CALL_ERROR)
+
+    def _create_local_chunk(self, chunk) -> RpcResp:
+        if self._loopback_copy:
+            chunk = deepcopy(chunk)
+
+        return RpcResp(status=OK, body=chunk)
+
+    def _is_stream_body(self, body) -> bool:
+        return isasyncgen(body) or isgenerator(body)
+
+    async def _close_stream_body(self, body):
+        if isasyncgen(body):
+            await body.aclose()
+        else:
+            body.close()
+
+    async def _send_cached_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            ttl: float,
+    ) -> RpcResp:
+        key = cache_key(call)
+        if key is None:
+            return await self._dispatch_call(call, timeout)
+
+        resp = self.response_cache.get(key)
+        if resp is not None:
+            return resp
+
+        try:
+            future = self._cache_inflight[key]
+        except KeyError:
+            pass
+        else:
+            self.response_cache.coalesced += 1
+            start = monotonic()
+            resp = await wait_for(shield(future), timeout)
+            if resp is not None:
+                return copy_resp(resp)
+
+            # the leader failed or was cancelled, so this call is sent again
+            # instead of inheriting that outcome
+            timeout -= monotonic() - start
+            return await self._send_cached_call(call, timeout, ttl)
+
+        future = Future()
+        self._cache_inflight[key] = future
+        resp = None
+        try:
+            resp = await self._dispatch_call(call, timeout)
+        finally:
+            del self._cache_inflight[key]
+            future.set_result(resp)
+
+        if resp.ok:
+            self.response_cache.set(key, resp, ttl)
+
+        return resp
+
+    async def _stream_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            max_buffered: int,
+    ):
+        if self.pending_calls.full:
+            yield RpcResp(
+                status=TOO_MANY_CALLS,
+                body='Too many pending calls',
+            )
+            return
+
+        stream = RespStream(Queue(max_buffered), max_buffered)
+        self.pending_calls.add(reply_id, stream, route)
+        try:
+            await self._publish(msg)
+            while True:
+                resp = stream.pop()
+                if resp is None:
+                    seq, resp = await wait_for(stream.queue.get(), timeout)
+                    stream.add(seq, resp)
+                    continue
+
+                if resp.status == STREAM_CHUNK:
+                    yield resp.replace(status=OK)
+                    consumed = stream.consume()
+                    if consumed:
+                        credit_msg = self._create_credit_msg(
+                            stream,
+                            reply_id,
+                            consumed,
+                        )
+                        await self._publish(credit_msg)
+                    continue
+
+                self.pending_calls.remove(reply_id)
+                if not resp.ok:
+                    yield resp
+
+                return
+        finally:
+            self.pending_calls.discard(reply_id)
+
+    async def _fail_expired_call(self):
+        raise TimeoutError()
+
+    async def _coalesce_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        max_calls, max_delay = self._route_coalescing[call.route]
+        key = (call.route, self._get_call_lane(call))
         future = Future()
-        self._response_futures[reply_id] = (future, route)
+        try:
+            buffer = self._coalesce_buffers[key]
+        except KeyError:
+            buffer = self._coalesce_buffers[key] = []
+            get_event_loop().call_later(
+                max_delay,
+                self._flush_coalesced,
+                key,
+                buffer,
+            )
+
+        buffer.append((call, timeout, future))
+        if len(buffer) >= max_calls:
+            self._flush_coalesced(key, buffer)
+
         return await wait_for(future, timeout)
 
-    async def _on_call_message(self, msg: AmqpMsg) -> bool:
-        call = self._decode_call(msg)
-        resp = await self.recv_call(call)
-        resp_msg = self._encode_resp(resp)
+    def _flush_coalesced(self, key: tuple, buffer: list):
+        if self._coalesce_buffers.get(key) is not buffer:
+            return
+
+        del self._coalesce_buffers[key]
+        ensure_future(self._send_coalesced(buffer, key[1]))
+
+    async def _send_coalesced(self, buffer: list, lane: str):
+        calls = [call for call, _, _ in buffer]
+        timeout = max(timeout for _, timeout, _ in buffer)
+        try:
+            with call_lane(lane):
+                if len(calls) == 1:
+                    resps = [await self._send_call(calls[0], timeout)]
+                else:
+                    resps = await self.send_calls(calls, timeout)
+        except Exception as e:
+            for _, _, future in buffer:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), resp in zip(buffer, resps):
+            if not future.done():
+                future.set_result(resp)
+
+    async def _send_calls_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            count: int,
+    ) -> List[RpcResp]:
+        resp = await self._send_call_msg(reply_id, timeout, msg, route)
+        return self._unpack_batch_resp(resp, count)
+
+    async def _recv_calls(
+            self,
+            call: RpcCall,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+            in_slot: bool=False,
+    ) -> RpcResp:
+        calls = self._unpack_batch_call(call)
+        if calls is None:
+            return RpcResp(
+                status=CALL_ARGS_MISMATCH,
+                body='Invalid batch call',
+            )
+
+        if in_slot and self._has_call_limit():
+            # the batch already holds a call slot, so its sub-calls run one
+            # at a time instead of fanning out past the limit
+            resps = [
+                await self._recv_batch_item(call, msg, lane, True)
+                for call in calls
+            ]
+        else:
+            resps = await gather(*[
+                self._recv_batch_item(call, msg, lane) for call in calls
+            ])
+
+        return self._pack_batch_resp(resps)
+
+    async def _recv_batch_item(
+            self,
+            call: RpcCall,
+            msg: AmqpMsg,
+            lane: str,
+            in_slot: bool=False,
+    ) -> RpcResp:
+        resp = self._admit_batch_item(msg, call)
+        if resp is not None:
+            return resp
+
+        self._calls_running += 1
+        try:
+            if in_slot:
+                resp = await self.recv_call(call)
+            else:
+                release = await self._acquire_call_slot(lane)
+                try:
+                    resp = await self.recv_call(call)
+                finally:
+                    if release is not None:
+                        release()
+        finally:
+            self._calls_running -= 1
+
+        if self._is_stream_body(resp.body):
+            await self._close_stream_body(resp.body)
+            return self._create_stream_required_resp()
+
+        return resp
+
+    async def _publish(self, msg: AmqpMsg):
+        if self.instrumentation is None:
+            return await self._publish_msg(msg)
+
+        start = perf_counter()
+        try:
+            return await self._publish_msg(msg)
+        finally:
+            self.instrumentation.msg_published(msg, perf_counter() - start)
+
+    async def _publish_msg(self, msg: AmqpMsg):
+        channel = self._next_call_channel()
+        if self._max_unconfirmed_publishes is None:
+            return await channel.publish(msg)
+
+        # with publisher confirms on, publish returns once the broker has
+        # confirmed the message, so the semaphore caps unconfirmed publishes
+        async with self._get_publish_limit(channel.number):
+            return await channel.publish(msg)
+
+    def _get_publish_limit(self, channel_number: int) -> Semaphore:
+        try:
+            return self._publish_limits[channel_number]
+        except KeyError:
+            limit = Semaphore(self._max_unconfirmed_publishes)
+            self._publish_limits[channel_number] = limit
+            return limit
+
+    async def _cancel_listen_consumers(self):
+        # AsyncioAmqpConnection.cancel_consumer calls its own
+        # _cancel_consumer with the wrong arguments, so the private method
+        # is called directly. Consumers the connection no longer tracks,
+        # e.g. while it reconnects, have nothing left to cancel
+        channel_number = self._rpc_listen_channel.number
+        for consumer in [
+            self._listen_consumer,
+            *self._lane_consumers.values(),
+        ]:
+            try:
+                await self.conn._cancel_consumer(channel_number, consumer.tag)
+            except KeyError:
+                self.log.warning(
+                    'consumer [%s] is not active, skipping cancel',
+                    consumer.tag,
+                )
+
+    async def _set_prefetch(self, count: int):
+        channel = self.conn._get_channel(self._rpc_listen_channel.number)
+        await channel.set_qos(prefetch_count=count)
+
+    def _watch_channels(self):
+        # the connection reopens its channels after a reconnect without the
+        # qos set by start() or publisher confirms, so both are set up
+        # whenever a channel is created. Connections without _create_channel
+        # never reopen them
+        create_channel = getattr(self.conn, '_create_channel', None)
+        if create_channel is None:
+            return
+
+        async def _create_channel(action):
+            if self._needs_confirms(action.number):
+                await self._create_confirm_channel(action.number)
+            else:
+                await create_channel(action)
+
+            if self._needs_prefetch(action.number):
+                await self._set_prefetch(self._get_prefetch_count())
+
+        self.conn._create_channel = _create_channel
+
+    async def _create_confirm_channel(self, number: int):
+        # simple_amqp opens every channel without publisher confirms, so
+        # publish channels are opened here when confirms are wanted
+        channel = await self.conn._conn.channel(
+            number,
+            publisher_confirms=True,
+        )
+        self.conn._set_channel(number, channel)
+
+    async def _on_call_message(
+            self,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+    ) -> bool:
+        if self._draining:
+            return False
+
+        if self.admission is not None:
+            reason = self.admission.admit(msg, self._calls_running)
+            if reason is not None:
+                resp = self._create_shed_resp(msg, reason)
+                await self._publish(self._create_resp_msg(msg, resp))
+                return True
+
+        self._calls_running += 1
+        try:
+            # batches take a slot per sub-call instead of one for the message
+            if self._is_batch_msg(msg):
+                return await self._handle_call_message(msg, lane)
+
+            release = await self._acquire_call_slot(lane)
+            try:
+                return await self._handle_call_message(msg, lane)
+            finally:
+                if release is not None:
+                    release()
+        finally:
+            self._calls_running -= 1
 
-        resp_msg = resp_msg.replace(
-            topic=msg.reply_to,
-            correlation_id=msg.correlation_id,
+    def _has_call_limit(self) -> bool:
+        return (
+            self._lane_scheduler is not None or
+            self._call_semaphore is not None
         )
-        await self.conn.publish(self._rpc_call_channel, resp_msg)
+
+    async def _acquire_call_slot(self, lane: str):
+        scheduler = self._lane_scheduler
+        if scheduler is not None:
+            waiter = scheduler.acquire(lane)
+            if waiter is not None:
+                try:
+                    await waiter
+                except CancelledError:
+                    scheduler.cancel(lane, waiter)
+                    raise
+
+            return scheduler.release
+
+        if self._call_semaphore is not None:
+            await self._call_semaphore.acquire()
+            return self._call_semaphore.release
+
+        return None
+
+    def _create_waiter(self) -> Future:
+        return Future()
+
+    def _wake_waiter(self, waiter: Future):
+        if not waiter.done():
+            waiter.set_result(True)
+
+    async def _drain_calls(self, timeout: int):
+        deadline = monotonic() + timeout
+        while self._calls_running and monotonic() < deadline:
+            await sleep(RPC_DRAIN_INTERVAL)
+
+    async def _handle_call_message(
+            self,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+    ) -> bool:
+        deadline = self._get_call_deadline(msg)
+        if deadline is None:
+            return await self._handle_call(msg, lane)
+
+        if self._call_expired(msg, deadline):
+            return True
+
+        token = set_call_deadline(deadline)
+        try:
+            return await self._handle_call(msg, lane)
+        finally:
+            reset_call_deadline(token)
+
+    async def _handle_call(
+            self,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+    ) -> bool:
+        try:
+            call = self._decode_call(msg)
+        except PayloadTooLarge as e:
+            resp = self._create_too_large_resp(msg, e)
+            await self._publish(self._create_resp_msg(msg, resp))
+            return True
+
+        if self.instrumentation is not None:
+            self._observe_queue_wait(call, msg)
+
+        if call.service == RPC_BATCH_SERVICE:
+            in_slot = not self._is_batch_msg(msg)
+            resp = await self._recv_calls(call, msg, lane, in_slot)
+        else:
+            resp = await self.recv_call(call)
+
+        if self._is_stream_body(resp.body):
+            if self._is_stream_call(msg):
+                await self._send_stream(msg, resp.body)
+                return True
+
+            await self._close_stream_body(resp.body)
+            resp = self._create_stream_required_resp()
+
+        await self._publish(self._create_resp_msg(msg, resp))
         return True
 
-    async def _on_resp_message(self, msg: AmqpMsg):
+    async def _send_stream(self, msg: AmqpMsg, chunks):
+        credit = self._open_stream_credit(msg)
+        seq = 0
         try:
-            (future, route) = self._response_futures.pop(msg.correlation_id)
-        except KeyError:
+            if isasyncgen(chunks):
+                async for chunk in chunks:
+                    await self._send_stream_chunk(msg, chunk, seq, credit)
+                    seq += 1
+            else:
+                for chunk in chunks:
+                    await self._send_stream_chunk(msg, chunk, seq, credit)
+                    seq += 1
+
+            resp = RpcResp(status=OK)
+        except StreamStalled:
+            self.log.warning('stream [%s] stalled', msg.correlation_id)
+            resp = RpcResp(status=CALL_ERROR, body='Stream stalled')
+        except Exception as e:
+            self._on_recv_call_error(e)
+            resp = RpcResp(status=CALL_ERROR)
+        finally:
+            self._stream_credits.pop(msg.correlation_id, None)
+
+        await self._publish(self._create_resp_msg(msg, resp, seq))
+
+    async def _send_stream_chunk(
+            self,
+            msg: AmqpMsg,
+            chunk,
+            seq: int,
+            credit: StreamCredit,
+    ):
+        while credit is not None:
+            waiter = credit.take()
+            if waiter is None:
+                break
+
+            try:
+                await wait_for(waiter, RPC_STREAM_CREDIT_TIMEOUT)
+            except TimeoutError:
+                raise StreamStalled()
+
+        chunk_resp = RpcResp(status=STREAM_CHUNK, body=chunk)
+        await self._publish(self._create_resp_msg(msg, chunk_resp, seq))
+
+    async def _on_resp_message(self, msg: AmqpMsg):
+        if self._on_stream_credit(msg):
+            return True
+
+        seq = self._get_stream_seq(msg)
+        if seq is not None:
+            return await self._on_stream_message(msg, seq)
+
+        pending = self.pending_calls.pop(msg.correlation_id)
+        if pending is None:
+            return True
+
+        (future, route) = pending
+        if isinstance(future, RespStream):
+            resp = self._decode_resp(msg, route)
+            for item in RespStream.from_resp(resp):
+                await future.queue.put(item)
+            return True
+
+        if future.done():
             return True
 
         resp = self._decode_resp(msg, route)
         future.set_result(resp)
         return True
+
+    async def _on_stream_message(self, msg: AmqpMsg, seq: int):
+        pending = self.pending_calls.get(msg.correlation_id)
+        if pending is None:
+            return True
+
+        (stream, route) = pending
+        if not isinstance(stream, RespStream):
+            self.pending_calls.remove(msg.correlation_id)
+            if not stream.done():
+                stream.set_result(self._create_unexpected_stream_resp())
+            return True
+
+        if stream.credit_to is None:
+            stream.credit_to = msg.headers.get(RPC_STREAM_CREDIT_TO_HEADER)
+
+        resp = self._decode_resp(msg, route)
+        await stream.queue.put((seq, resp))
+        return True
@@ -1,9 +1,13 @@
 from .amqp import BaseAmqpRpc
 from .client import RpcClient
 from .conn import BaseRpc
+from .pending import PendingCalls
+from .stream import RespStream
 
 __all__ = [
     'BaseRpc',
     'BaseAmqpRpc',
     'RpcClient',
+    'PendingCalls',
+    'RespStream',
 ]
@@ -1,25 +1,110 @@
 from abc import ABCMeta
+from copy import deepcopy
+from functools import partial
+from itertools import count, cycle
+from time import perf_counter, time
+from typing import List
 from uuid import uuid4
 
 from simple_amqp import AmqpConnection, AmqpMsg, AmqpParameters
 
+from simple_amqp_rpc.admission import AdmissionControl
+from simple_amqp_rpc.cache import ResponseCache
+from simple_amqp_rpc.compression import (
+    COMPRESSORS,
+    PayloadTooLarge,
+    limit_decompress
+)
 from simple_amqp_rpc.consts import (
+    CALL_ERROR,
+    COMPRESSION_ZLIB,
+    EXECUTOR_PROCESS,
+    OK,
+    PAYLOAD_TOO_LARGE,
     REPLY_ID,
+    RPC_ACCEPT_CACHE_SIZE,
+    RPC_ACCEPT_COMPRESSION_HEADER,
+    RPC_ACCEPT_HEADER,
+    RPC_BATCH_METHOD,
+    RPC_BATCH_SERVICE,
+    RPC_BREAKER_FAILURES,
+    RPC_BREAKER_HALF_OPEN_CALLS,
+    RPC_BREAKER_RESET_TIMEOUT,
+    RPC_CACHE_SIZE,
     RPC_CALL_TIMEOUT,
+    RPC_COALESCE_MAX_CALLS,
+    RPC_COALESCE_MAX_DELAY,
+    RPC_COMPRESSION_THRESHOLD,
+    RPC_DEADLINE_HEADER,
+    RPC_DEFAULT_LANE,
     RPC_EXCHANGE,
+    RPC_EXECUTOR_MAX_PENDING,
+    RPC_HEDGE_BUDGET_BURST,
+    RPC_HEDGE_BUDGET_RATIO,
+    RPC_LANE_PREFETCH_FACTOR,
+    RPC_LANE_QUEUE,
+    RPC_LANE_TOPIC,
+    RPC_LIMITER_BACKOFF_RATIO,
+    RPC_LIMITER_INITIAL_LIMIT,
+    RPC_LIMITER_MAX_LIMIT,
+    RPC_LIMITER_MIN_LIMIT,
+    RPC_MAX_DECOMPRESSED_SIZE,
+    RPC_MAX_PENDING_CALLS,
+    RPC_METHOD_HEADER,
     RPC_QUEUE,
-    RPC_TOPIC
+    RPC_RETRY_BACKOFF,
+    RPC_RETRY_MAX_BACKOFF,
+    RPC_SENT_AT_HEADER,
+    RPC_STREAM_BUFFER,
+    RPC_STREAM_CREDIT_HEADER,
+    RPC_STREAM_CREDIT_TO_HEADER,
+    RPC_STREAM_SEQ_HEADER,
+    RPC_STREAM_WINDOW_HEADER,
+    RPC_TOPIC,
+    SERVER_BUSY,
+    STREAM_REQUIRED
 )
 from simple_amqp_rpc.data import RpcCall, RpcResp
+from simple_amqp_rpc.deadline import (
+    decode_header_time,
+    encode_header_time,
+    get_call_deadline,
+    remaining_time,
+    run_with_deadline
+)
 from simple_amqp_rpc.encoding import (
+    CONTENT_TYPE_FRAMED,
+    CONTENT_TYPE_JSON,
+    CONTENT_TYPE_MSGPACK,
+    adapt_encoder,
     decode_rpc_call,
+    decode_rpc_call_framed,
+    decode_rpc_call_msgpack,
     decode_rpc_resp,
+    decode_rpc_resp_framed,
+    decode_rpc_resp_msgpack,
     encode_rpc_call,
-    encode_rpc_resp
+    encode_rpc_call_framed,
+    encode_rpc_call_msgpack,
+    encode_rpc_resp,
+    encode_rpc_resp_framed,
+    encode_rpc_resp_msgpack
+)
+from simple_amqp_rpc.executor import (
+    CallExecutor,
+    create_process_pool,
+    run_process_call
 )
+from simple_amqp_rpc.lanes import LaneScheduler, get_call_lane
+from simple_amqp_rpc.limiter import AimdLimiter, CircuitBreaker, RouteGuard
+from simple_amqp_rpc.metrics import Instrumentation
+from simple_amqp_rpc.retry import HedgeBudget, RetryPolicy
+from simple_amqp_rpc.service import Service
 
 from .client import RpcClient
 from .conn import BaseRpc
+from .pending import PendingCalls
+from .stream import RespStream, StreamCredit
 
 
 class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
@@ -32,23 +117,64 @@ class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
             params: AmqpParameters = None,
             route: str='service.name',
             call_timeout: int=RPC_CALL_TIMEOUT,
+            max_concurrent_calls: int=None,
+            max_pending_calls: int=RPC_MAX_PENDING_CALLS,
+            publish_channels: int=1,
+            max_unconfirmed_publishes: int=None,
+            cache_size: int=RPC_CACHE_SIZE,
             logger=None,
+            instrumentation: Instrumentation=None,
     ):
-        super().__init__(logger=logger)
+        super().__init__(logger=logger, instrumentation=instrumentation)
         self.route = route
         self._call_timeout = call_timeout
+        self._max_concurrent_calls = max_concurrent_calls
+        self._publish_channels = publish_channels
+        self._max_unconfirmed_publishes = max_unconfirmed_publishes
         if conn is not None:
             self.conn = conn
         else:
             self.conn = self._create_conn(params)
 
-        self._call_encoders = {'json': encode_rpc_call}
-        self._call_decoders = {'json': decode_rpc_call}
-        self._resp_encoders = {'json': encode_rpc_resp}
-        self._resp_decoders = {'json': decode_rpc_resp}
+        self._call_encoders = {
+            'json': encode_rpc_call,
+            'msgpack': encode_rpc_call_msgpack,
+            'framed': encode_rpc_call_framed,
+        }
+        self._call_decoders = {
+            'json': decode_rpc_call,
+            'msgpack': decode_rpc_call_msgpack,
+            'framed': decode_rpc_call_framed,
+        }
+        self._resp_encoders = {
+            'json': encode_rpc_resp,
+            'msgpack': encode_rpc_resp_msgpack,
+            'framed': encode_rpc_resp_framed,
+        }
+        self._resp_decoders = {
+            'json': decode_rpc_resp,
+            'msgpack': decode_rpc_resp_msgpack,
+            'framed': decode_rpc_resp_framed,
+        }
+        self._content_types = {
+            CONTENT_TYPE_JSON: 'json',
+            CONTENT_TYPE_MSGPACK: 'msgpack',
+            CONTENT_TYPE_FRAMED: 'framed',
+        }
 
         self._default_encoding = 'json'
         self._route_encodings = {}
+        self._call_decoders_by_type = {}
+        self._resp_decoders_by_type = {}
+        self._accept_headers = {}
+        self._accept_encodings = {}
+        self._update_codecs()
+
+        self._compressors = dict(COMPRESSORS)
+        self._default_compression = None
+        self._route_compression = {}
+        self._accept_compressions = {}
+        self._max_decompressed_size = RPC_MAX_DECOMPRESSED_SIZE
 
         self.setup_stage_name = '1:rpc.setup'
         self.setup_stage = None
@@ -56,9 +182,37 @@ class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
         self.listen_stage = None
 
         self._rpc_call_channel = None
+        self._rpc_call_channels = []
+        self._next_call_channel = None
+        self._rpc_listen_channel = None
         self._rpc_resp_channel = None
+        self._listen_consumer = None
+        self._lane_consumers = {}
+        self._lanes = {RPC_DEFAULT_LANE: 1}
+        self._lane_scheduler = None
+        self._method_lanes = {}
+        self._route_lanes = {}
         self._publish_routes = set()
-        self._response_futures = {}
+        self._route_coalescing = {}
+        self._call_options = {}
+        self._retry_policies = {}
+        self._hedge_budgets = {}
+        self._route_guards = {}
+        self.retried_calls = 0
+        self._loopback = False
+        self._loopback_copy = True
+        self.response_cache = ResponseCache(cache_size)
+        self._cache_inflight = {}
+        self._coalesce_buffers = {}
+        self._stream_credits = {}
+        self.pending_calls = PendingCalls(max_pending_calls)
+        self.executors = {}
+        self._listening = False
+        self._draining = False
+        self._calls_running = 0
+        self.admission = None
+        self._reply_id_prefix = self.REPLY_ID.format(id=uuid4().hex) + '.'
+        self._reply_ids = count()
         self._resp_queue = ''
 
     def _create_conn(self, params: AmqpParameters):
@@ -76,99 +230,1090 @@ class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
     def stop(self):
         raise NotImplementedError
 
-    def client(self, service: str, route: str) -> RpcClient:
+    def client(self, service, route: str) -> RpcClient:
         self._publish_routes.add(route)
-        return self.CLIENT_CLS(self, service, route)
+        if isinstance(service, Service):
+            for method, options in service.options.items():
+                self.set_method_options(route, service.name, method, **options)
+            methods = service.methods
+            service = service.name
+        elif route == self.route:
+            methods = self._method_options.get(service, {})
+            for method, options in methods.items():
+                self.set_method_options(route, service, method, **options)
+        else:
+            methods = ()
+
+        return self.CLIENT_CLS(self, service, route, methods)
 
     def send_call(self, call: RpcCall, timeout=RPC_CALL_TIMEOUT) -> RpcResp:
+        timeout = self._get_call_timeout(timeout)
+        if self.instrumentation is not None:
+            return self._send_instrumented_call(call, timeout)
+
+        return self._send_call_with_options(call, timeout)
+
+    def _send_call_with_options(self, call: RpcCall, timeout: int) -> RpcResp:
+        if self._call_options:
+            options = self._get_call_options(call)
+            if options.get('cache_ttl'):
+                return self._send_cached_call(
+                    call,
+                    timeout,
+                    options['cache_ttl'],
+                )
+
+        return self._dispatch_call(call, timeout)
+
+    def set_method_options(
+            self,
+            route: str,
+            service: str,
+            method: str,
+            **options
+    ):
+        key = (route, service, method)
+        self._call_options[key] = {
+            **self._call_options.get(key, {}),
+            **options,
+        }
+        self._update_retry_policy(key)
+        self._update_method_lane(key)
+
+    def set_lane(self, lane: str, weight: int=1):
+        self._lanes[lane] = weight
+        self._update_lane_scheduler()
+
+    def set_route_lanes(self, route: str, *lanes: str):
+        self._route_lanes[route] = set(lanes)
+
+    def get_lane_state(self) -> dict:
+        if self._lane_scheduler is None:
+            return {}
+
+        return self._lane_scheduler.stats()
+
+    def set_hedge_budget(
+            self,
+            route: str,
+            ratio: float=RPC_HEDGE_BUDGET_RATIO,
+            burst: int=RPC_HEDGE_BUDGET_BURST,
+    ):
+        self._hedge_budgets[route] = HedgeBudget(ratio, burst)
+
+    def get_hedge_budget(self, route: str) -> HedgeBudget:
+        try:
+            return self._hedge_budgets[route]
+        except KeyError:
+            budget = self._hedge_budgets[route] = HedgeBudget()
+            return budget
+
+    def send_calls(
+            self,
+            calls: List[RpcCall],
+            timeout=RPC_CALL_TIMEOUT,
+    ) -> List[RpcResp]:
+        timeout = self._get_call_timeout(timeout)
+        if timeout is not None and timeout <= 0:
+            return self._fail_expired_call()
+
+        call = self._pack_batch_call(calls)
         self.log_call_sent(call)
-        if timeout is None or timeout == -1:
-            timeout = self._call_timeout
+        reply_id, msg = self._create_call_msg(call, timeout)
+        return self._send_calls_msg(
+            reply_id,
+            timeout,
+            msg,
+            call.route,
+            len(calls),
+        )
 
-        msg = self._encode_call(call)
+    def stream_call(
+            self,
+            call: RpcCall,
+            timeout=RPC_CALL_TIMEOUT,
+            max_buffered: int=RPC_STREAM_BUFFER,
+    ):
+        timeout = self._get_call_timeout(timeout)
+        if self._loopback and call.route == self.route:
+            return self._stream_local_call(call, timeout)
 
-        reply_id = self._create_reply_id()
-        msg = msg.replace(
-            exchange=RPC_EXCHANGE.format(route=call.route),
-            topic=RPC_TOPIC,
-            reply_to=self._resp_queue,
-            correlation_id=reply_id,
+        self.log_call_sent(call)
+        reply_id, msg = self._create_call_msg(
+            call,
+            timeout,
+            deadline=False,
+            stream_window=max_buffered or 0,
+        )
+        return self._stream_call_msg(
+            reply_id,
+            timeout,
+            msg,
+            call.route,
+            max_buffered,
         )
-        return self._send_call_msg(reply_id, timeout, msg, call.route)
 
     def set_route_encoding(self, route: str, encoding: str):
         self._route_encodings[route] = encoding
+        self._update_codecs()
+
+    def set_route_compression(
+            self,
+            route: str,
+            compression: str=COMPRESSION_ZLIB,
+            threshold: int=RPC_COMPRESSION_THRESHOLD,
+    ):
+        self._route_compression[route] = self._create_compression(
+            compression,
+            threshold,
+        )
+
+    def set_default_compression(
+            self,
+            compression: str=COMPRESSION_ZLIB,
+            threshold: int=RPC_COMPRESSION_THRESHOLD,
+    ):
+        self._default_compression = self._create_compression(
+            compression,
+            threshold,
+        )
+
+    def add_compressor(self, name: str, compress, decompress):
+        self._compressors[name] = (compress, limit_decompress(decompress))
+        self._accept_compressions = {}
+
+    def set_max_decompressed_size(self, size: int):
+        self._max_decompressed_size = size
+
+    def enable_loopback(self, copy: bool=True):
+        self._loopback = True
+        self._loopback_copy = copy
+
+    def disable_loopback(self):
+        self._loopback = False
+
+    def set_route_coalescing(
+            self,
+            route: str,
+            max_calls: int=RPC_COALESCE_MAX_CALLS,
+            max_delay: float=RPC_COALESCE_MAX_DELAY,
+    ):
+        self._route_coalescing[route] = (max_calls, max_delay)
+
+    def set_max_concurrent_calls(self, max_concurrent_calls: int):
+        raise NotImplementedError
+
+    def set_executor(
+            self,
+            executor: str,
+            max_workers: int=None,
+            max_pending: int=RPC_EXECUTOR_MAX_PENDING,
+    ):
+        if executor in self.executors:
+            self.executors[executor].shutdown(wait=False)
+
+        self.executors[executor] = CallExecutor(
+            partial(self._create_executor_pool, executor),
+            max_workers=max_workers,
+            max_pending=max_pending,
+        )
 
     def set_default_encoding(self, encoding: str):
         self._default_encoding = encoding
+        self._update_codecs()
 
     def add_call_encoder(self, name: str, call_encoder):
-        self._call_encoders[name] = call_encoder
+        self._call_encoders[name] = adapt_encoder(call_encoder)
+        self._update_codecs()
 
     def add_call_decoder(self, name: str, call_decoder):
         self._call_decoders[name] = call_decoder
+        self._update_codecs()
 
     def add_resp_encoder(self, name: str, resp_encoder):
-        self._resp_encoders[name] = resp_encoder
+        self._resp_encoders[name] = adapt_encoder(resp_encoder)
+        self._update_codecs()
 
     def add_resp_decoder(self, name: str, resp_decoder):
         self._resp_decoders[name] = resp_decoder
+        self._update_codecs()
+
+    def add_content_type(self, content_type: str, encoding: str):
+        self._content_types[content_type] = encoding
+        self._update_codecs()
+
+    def set_max_inflight_calls(self, max_inflight: int):
+        self._get_admission().max_inflight = max_inflight
+
+    def set_max_queue_age(self, max_queue_age: float):
+        self._get_admission().max_queue_age = max_queue_age
+
+    def set_rate_limit(
+            self,
+            service: str,
+            method: str=None,
+            rate: float=None,
+            burst: float=None,
+    ):
+        self._get_admission().set_rate_limit(service, method, rate, burst)
+
+    def set_route_limiter(
+            self,
+            route: str,
+            limit: int=RPC_LIMITER_INITIAL_LIMIT,
+            min_limit: int=RPC_LIMITER_MIN_LIMIT,
+            max_limit: int=RPC_LIMITER_MAX_LIMIT,
+            backoff_ratio: float=RPC_LIMITER_BACKOFF_RATIO,
+            latency_threshold: float=None,
+    ):
+        self._get_route_guard(route).limiter = AimdLimiter(
+            limit=limit,
+            min_limit=min_limit,
+            max_limit=max_limit,
+            backoff_ratio=backoff_ratio,
+            latency_threshold=latency_threshold,
+        )
+
+    def set_route_breaker(
+            self,
+            route: str,
+            failures: int=RPC_BREAKER_FAILURES,
+            reset_timeout: float=RPC_BREAKER_RESET_TIMEOUT,
+            half_open_calls: int=RPC_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self._get_route_guard(route).breaker = CircuitBreaker(
+            failures=failures,
+            reset_timeout=reset_timeout,
+            half_open_calls=half_open_calls,
+        )
+
+    def get_route_state(self, route: str) -> dict:
+        guard = self._route_guards.get(route)
+        if guard is None:
+            return {}
+
+        return guard.stats()
+
+    def _get_admission(self) -> AdmissionControl:
+        if self.admission is None:
+            self.admission = AdmissionControl()
+
+        return self.admission
+
+    def _create_shed_resp(self, msg: AmqpMsg, reason: str) -> RpcResp:
+        self.log.warning('shedding call [%s]: %s', msg.correlation_id, reason)
+        if self.instrumentation is not None:
+            self.instrumentation.call_shed(self.route, msg, reason)
+
+        return RpcResp(
+            status=SERVER_BUSY,
+            body='Server busy [{}]'.format(reason),
+        )
+
+    def _admit_batch_item(self, msg: AmqpMsg, call: RpcCall) -> RpcResp:
+        if self.admission is None:
+            return None
+
+        reason = self.admission.admit_method(call.service + ':' + call.method)
+        if reason is None:
+            return None
+
+        return self._create_shed_resp(msg, reason)
+
+    def _get_route_guard(self, route: str) -> RouteGuard:
+        try:
+            return self._route_guards[route]
+        except KeyError:
+            guard = self._route_guards[route] = RouteGuard(route)
+            return guard
+
+    def _update_method_lane(self, key: tuple):
+        lane = self._call_options[key].get('priority')
+        if lane is None:
+            self._method_lanes.pop(key, None)
+            return
+
+        self._method_lanes[key] = lane
+
+    def _get_lane_topic(self, lane: str) -> str:
+        if lane == RPC_DEFAULT_LANE:
+            return RPC_TOPIC
+
+        return RPC_LANE_TOPIC.format(lane=lane)
+
+    def _get_call_lane(self, call: RpcCall) -> str:
+        lane = get_call_lane()
+        if lane is not None:
+            return lane
+
+        if self._method_lanes:
+            key = (call.route, call.service, call.method)
+            return self._method_lanes.get(key, RPC_DEFAULT_LANE)
+
+        return RPC_DEFAULT_LANE
+
+    def _get_call_topic(self, call: RpcCall) -> str:
+        # calls only go to a lane queue when the route's servers are known
+        # to consume it, so each call is published to a single routing key
+        lane = self._get_call_lane(call)
+        if lane not in self._route_lanes.get(call.route, ()):
+            return RPC_TOPIC
+
+        return self._get_lane_topic(lane)
+
+    def _add_method_lanes(self):
+        for methods in self._method_options.values():
+            for options in methods.values():
+                lane = options.get('priority')
+                if lane is not None:
+                    self._lanes.setdefault(lane, 1)
+
+        self._update_lane_scheduler()
+
+    def _update_lane_scheduler(self):
+        if len(self._lanes) < 2 or self._max_concurrent_calls is None:
+            self._lane_scheduler = None
+            return
+
+        self._lane_scheduler = LaneScheduler(
+            self._max_concurrent_calls,
+            self._lanes,
+            self._create_waiter,
+            self._wake_waiter,
+        )
+
+    def _needs_confirms(self, channel_number: int) -> bool:
+        if self._max_unconfirmed_publishes is None:
+            return False
+
+        return any(
+            channel.number == channel_number
+            for channel in self._rpc_call_channels
+        )
+
+    def _needs_prefetch(self, channel_number: int) -> bool:
+        channel = self._rpc_listen_channel
+        return (
+            self._max_concurrent_calls is not None and
+            channel is not None and
+            channel.number == channel_number
+        )
+
+    def _get_prefetch_count(self) -> int:
+        if self._lane_scheduler is None:
+            return self._max_concurrent_calls
+
+        return self._max_concurrent_calls * RPC_LANE_PREFETCH_FACTOR
+
+    def _create_waiter(self):
+        raise NotImplementedError
+
+    def _wake_waiter(self, waiter):
+        raise NotImplementedError
+
+    def _update_retry_policy(self, key: tuple):
+        options = self._call_options[key]
+        retries = options.get('retries', 0)
+        hedge_delay = options.get('hedge_delay')
+        hedge_percentile = options.get('hedge_percentile')
+        hedged = hedge_delay is not None or hedge_percentile is not None
+        if hedged and not options.get('idempotent'):
+            raise ValueError(
+                'Method [{}:{}] must be idempotent to be hedged'.format(
+                    key[1],
+                    key[2],
+                ),
+            )
+
+        if not retries and not hedged:
+            self._retry_policies.pop(key, None)
+            return
+
+        max_backoff = options.get('retry_max_backoff', RPC_RETRY_MAX_BACKOFF)
+        self._retry_policies[key] = RetryPolicy(
+            retries=retries,
+            backoff=options.get('retry_backoff', RPC_RETRY_BACKOFF),
+            max_backoff=max_backoff,
+            hedge_delay=hedge_delay,
+            hedge_percentile=hedge_percentile,
+        )
+
+    def _get_hedge_delay(self, call: RpcCall, policy: RetryPolicy) -> float:
+        if not policy.hedged:
+            return None
+
+        self.get_hedge_budget(call.route).deposit()
+        return policy.get_hedge_delay()
+
+    def _get_call_options(self, call: RpcCall) -> dict:
+        key = (call.route, call.service, call.method)
+        return self._call_options.get(key, {})
+
+    def _create_compression(self, compression: str, threshold: int):
+        if compression is None:
+            return None
+
+        if compression not in self._compressors:
+            raise ValueError('Unknown compression [{}]'.format(compression))
+
+        header = '{}:{}'.format(compression, threshold)
+        return (compression, threshold, header)
+
+    def _get_compression(self, route: str):
+        return self._route_compression.get(route, self._default_compression)
+
+    def _get_resp_compression(self, call_msg: AmqpMsg):
+        if call_msg is None or not call_msg.headers:
+            return None
+
+        accept = call_msg.headers.get(RPC_ACCEPT_COMPRESSION_HEADER)
+        if not accept:
+            return None
+
+        try:
+            return self._accept_compressions[accept]
+        except KeyError:
+            pass
+
+        compression, _, threshold = accept.partition(':')
+        try:
+            policy = (compression, int(threshold))
+        except ValueError:
+            policy = None
+
+        if policy is not None and compression not in self._compressors:
+            policy = None
+
+        if len(self._accept_compressions) >= RPC_ACCEPT_CACHE_SIZE:
+            self._accept_compressions = {}
+
+        self._accept_compressions[accept] = policy
+        return policy
+
+    def _compress_msg(
+            self,
+            msg: AmqpMsg,
+            compression: str,
+            threshold: int,
+    ) -> AmqpMsg:
+        if len(msg.payload) < threshold:
+            return msg
+
+        compress = self._compressors[compression][0]
+        return msg.replace(
+            payload=compress(msg.payload),
+            encoding=compression,
+        )
+
+    def _decompress_msg(self, msg: AmqpMsg) -> AmqpMsg:
+        try:
+            decompress = self._compressors[msg.encoding][1]
+        except KeyError:
+            return msg
+
+        return msg.replace(
+            payload=decompress(msg.payload, self._max_decompressed_size),
+        )
+
+    def _create_too_large_resp(
+            self,
+            msg: AmqpMsg,
+            exc: PayloadTooLarge,
+    ) -> RpcResp:
+        self.log.warning('dropping payload [%s]: %s', msg.correlation_id, exc)
+        return RpcResp(status=PAYLOAD_TOO_LARGE, body=str(exc))
+
+    def _get_call_executor(self, call: RpcCall) -> CallExecutor:
+        if not self._method_executors:
+            return None
+
+        executor = self._method_executors.get((call.service, call.method))
+        if executor is None:
+            return None
+
+        if executor not in self.executors:
+            self.set_executor(executor)
+
+        return self.executors[executor]
+
+    def _shutdown_executors(self):
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+
+    def _create_executor_pool(self, executor: str, max_workers: int):
+        raise NotImplementedError
+
+    def _create_process_pool(self, max_workers: int):
+        handlers = {
+            key: self._services[key[0]][key[1]]
+            for key, executor in self._method_executors.items()
+            if executor == EXECUTOR_PROCESS
+        }
+        return create_process_pool(max_workers, handlers)
+
+    def _create_executor_call(self, call: RpcCall, method, args, kwargs):
+        deadline = get_call_deadline()
+        key = (call.service, call.method)
+        if self._method_executors[key] == EXECUTOR_PROCESS:
+            return partial(
+                run_process_call,
+                call.service,
+                call.method,
+                deadline,
+                args,
+                kwargs,
+            )
+
+        func = partial(method, *args, **kwargs)
+        if deadline is not None:
+            func = partial(run_with_deadline, deadline, func)
+
+        return func
+
+    def _dispatch_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        if self._loopback and call.route == self.route:
+            return self._send_local_call(call, timeout)
+
+        if call.route in self._route_coalescing:
+            return self._coalesce_call(call, timeout)
+
+        return self._send_call(call, timeout)
+
+    def _send_instrumented_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        raise NotImplementedError
+
+    def _send_local_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        raise NotImplementedError
+
+    def _admit_local_call(self, call: RpcCall) -> RpcResp:
+        if self.admission is None:
+            return None
+
+        reason = self.admission.admit_local(
+            call.service + ':' + call.method,
+            self._calls_running,
+        )
+        if reason is None:
+            return None
+
+        self.log.warning(
+            'shedding local call [%s:%s]: %s',
+            call.service,
+            call.method,
+            reason,
+        )
+        return RpcResp(
+            status=SERVER_BUSY,
+            body='Server busy [{}]'.format(reason),
+        )
+
+    def _copy_local_call(self, call: RpcCall) -> RpcCall:
+        if not self._loopback_copy:
+            return call
+
+        return call.replace(
+            args=deepcopy(call.args),
+            kwargs=deepcopy(call.kwargs),
+        )
+
+    def _send_cached_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            ttl: float,
+    ) -> RpcResp:
+        raise NotImplementedError
+
+    def _send_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        if self._retry_policies:
+            key = (call.route, call.service, call.method)
+            policy = self._retry_policies.get(key)
+            if policy is not None:
+                return self._send_retried_call(call, timeout, policy)
+
+        return self._send_call_attempt(call, timeout)
+
+    def _send_retried_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        raise NotImplementedError
+
+    def _send_call_attempt(self, call: RpcCall, timeout: int) -> RpcResp:
+        if timeout is not None and timeout <= 0:
+            return self._fail_expired_call()
+
+        self.log_call_sent(call)
+        reply_id, msg = self._create_call_msg(call, timeout)
+        return self._send_call_msg(reply_id, timeout, msg, call.route)
+
+    def _coalesce_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        raise NotImplementedError
+
+    def _fail_expired_call(self):
+        raise NotImplementedError
 
     def _send_call_msg(
             self,
             reply_id: str,
             timeout: int,
             msg: AmqpMsg,
+            route: str,
+    ) -> RpcResp:
+        if self._route_guards:
+            guard = self._route_guards.get(route)
+            if guard is not None:
+                return self._send_guarded_call_msg(
+                    guard,
+                    reply_id,
+                    timeout,
+                    msg,
+                    route,
+                )
+
+        return self._wait_call_msg(reply_id, timeout, msg, route)
+
+    def _send_guarded_call_msg(
+            self,
+            guard: RouteGuard,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+    ) -> RpcResp:
+        raise NotImplementedError
+
+    def _wait_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
     ) -> RpcResp:
         raise NotImplementedError
 
-    def _on_call_message(self, msg: AmqpMsg):
+    def _stream_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            max_buffered: int,
+    ):
+        raise NotImplementedError
+
+    def _stream_local_call(self, call: RpcCall, timeout: int):
+        raise NotImplementedError
+
+    def _send_calls_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            count: int,
+    ) -> List[RpcResp]:
+        raise NotImplementedError
+
+    def _recv_calls(
+            self,
+            call: RpcCall,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+            in_slot: bool=False,
+    ) -> RpcResp:
+        raise NotImplementedError
+
+    def _set_prefetch(self, count: int):
+        raise NotImplementedError
+
+    def _publish(self, msg: AmqpMsg):
+        raise NotImplementedError
+
+    def _on_call_message(self, msg: AmqpMsg, lane: str=RPC_DEFAULT_LANE):
         raise NotImplementedError
 
     def _on_resp_message(self, msg: AmqpMsg):
         raise NotImplementedError
 
+    def _get_call_timeout(self, timeout: float) -> float:
+        if timeout is None or timeout == -1:
+            timeout = self._call_timeout
+
+        remaining = remaining_time()
+        if remaining is not None and remaining < timeout:
+            return remaining
+
+        return timeout
+
+    def _get_call_deadline(self, msg: AmqpMsg) -> float:
+        if not msg.headers:
+            return None
+
+        return decode_header_time(msg.headers.get(RPC_DEADLINE_HEADER))
+
+    def _call_expired(self, msg: AmqpMsg, deadline: float) -> bool:
+        if deadline > time():
+            return False
+
+        self.log.warning('dropping expired call [%s]', msg.correlation_id)
+        if self.instrumentation is not None:
+            self.instrumentation.call_expired(self.route, msg)
+
+        return True
+
     def _create_reply_id(self) -> str:
-        return self.REPLY_ID.format(id=str(uuid4()))
+        return self._reply_id_prefix + str(next(self._reply_ids))
+
+    def _create_call_msg(
+            self,
+            call: RpcCall,
+            timeout: float=None,
+            deadline: bool=True,
+            stream_window: int=None,
+    ):
+        reply_id = self._create_reply_id()
+        now = time()
+        headers = {
+            RPC_ACCEPT_HEADER: self._get_accept_header(call.route),
+            RPC_METHOD_HEADER: call.service + ':' + call.method,
+            RPC_SENT_AT_HEADER: encode_header_time(now),
+        }
+        compression = self._get_compression(call.route)
+        if compression is not None:
+            headers[RPC_ACCEPT_COMPRESSION_HEADER] = compression[2]
+
+        if timeout is not None and deadline:
+            headers[RPC_DEADLINE_HEADER] = encode_header_time(now + timeout)
+
+        if stream_window is not None:
+            headers[RPC_STREAM_WINDOW_HEADER] = stream_window
+
+        fields = {
+            'exchange': RPC_EXCHANGE.format(route=call.route),
+            'topic': self._get_call_topic(call),
+            'reply_to': self._resp_queue,
+            'correlation_id': reply_id,
+            'headers': headers,
+        }
+        if timeout is not None:
+            fields['expiration'] = max(int(timeout * 1000), 1)
+
+        if self.instrumentation is None:
+            return reply_id, self._encode_call(call, **fields)
+
+        start = perf_counter()
+        msg = self._encode_call(call, **fields)
+        self.instrumentation.call_encoded(call, msg, perf_counter() - start)
+        return reply_id, msg
+
+    def _create_resp_msg(
+            self,
+            call_msg: AmqpMsg,
+            resp: RpcResp,
+            seq: int=None,
+    ) -> AmqpMsg:
+        headers = {}
+        if seq is not None:
+            headers[RPC_STREAM_SEQ_HEADER] = seq
+            if call_msg.correlation_id in self._stream_credits:
+                headers[RPC_STREAM_CREDIT_TO_HEADER] = self._resp_queue
+
+        fields = {
+            'topic': call_msg.reply_to,
+            'correlation_id': call_msg.correlation_id,
+            'headers': headers,
+        }
+        try:
+            return self._encode_resp_msg(resp, call_msg, fields)
+        except Exception as e:
+            # a reply that cannot be encoded must still be answered, or the
+            # call would be nacked and redelivered forever
+            self._on_recv_call_error(e)
+            error = RpcResp(
+                status=CALL_ERROR,
+                body='Response could not be encoded',
+            )
+            return self._encode_resp_msg(error, call_msg, fields)
+
+    def _encode_resp_msg(
+            self,
+            resp: RpcResp,
+            call_msg: AmqpMsg,
+            fields: dict,
+    ) -> AmqpMsg:
+        if self.instrumentation is None:
+            return self._encode_resp(resp, call_msg, **fields)
+
+        start = perf_counter()
+        resp_msg = self._encode_resp(resp, call_msg, **fields)
+        self.instrumentation.resp_encoded(
+            self.route,
+            resp_msg,
+            perf_counter() - start,
+        )
+        return resp_msg
+
+    def _observe_queue_wait(self, call: RpcCall, msg: AmqpMsg):
+        if not msg.headers:
+            return
+
+        sent_at = decode_header_time(msg.headers.get(RPC_SENT_AT_HEADER))
+        if sent_at is not None:
+            self.instrumentation.call_queued(call, max(time() - sent_at, 0))
+
+    def _get_stream_seq(self, msg: AmqpMsg) -> int:
+        if not msg.headers:
+            return None
+
+        return msg.headers.get(RPC_STREAM_SEQ_HEADER)
+
+    def _is_stream_call(self, msg: AmqpMsg) -> bool:
+        return bool(msg.headers) and RPC_STREAM_WINDOW_HEADER in msg.headers
+
+    def _create_stream_required_resp(self) -> RpcResp:
+        return RpcResp(
+            status=STREAM_REQUIRED,
+            body='Method is streaming, use stream_call',
+        )
+
+    def _create_unexpected_stream_resp(self) -> RpcResp:
+        return RpcResp(
+            status=CALL_ERROR,
+            body='Unexpected stream reply',
+        )
+
+    def _open_stream_credit(self, msg: AmqpMsg) -> StreamCredit:
+        if not msg.headers:
+            return None
+
+        window = msg.headers.get(RPC_STREAM_WINDOW_HEADER)
+        if not isinstance(window, int) or window < 1:
+            return None
+
+        credit = StreamCredit(window, self._create_waiter, self._wake_waiter)
+        self._stream_credits[msg.correlation_id] = credit
+        return credit
+
+    def _on_stream_credit(self, msg: AmqpMsg) -> bool:
+        if not msg.headers:
+            return False
+
+        count = msg.headers.get(RPC_STREAM_CREDIT_HEADER)
+        if count is None:
+            return False
+
+        credit = self._stream_credits.get(msg.correlation_id)
+        if credit is not None:
+            credit.add(count)
+
+        return True
+
+    def _create_credit_msg(
+            self,
+            stream: RespStream,
+            reply_id: str,
+            count: int,
+    ) -> AmqpMsg:
+        return AmqpMsg(
+            payload=b'',
+            topic=stream.credit_to,
+            correlation_id=reply_id,
+            headers={RPC_STREAM_CREDIT_HEADER: count},
+        )
+
+    def _is_batch_msg(self, msg: AmqpMsg) -> bool:
+        if not msg.headers:
+            return False
+
+        method = msg.headers.get(RPC_METHOD_HEADER)
+        return method == RPC_BATCH_SERVICE + ':' + RPC_BATCH_METHOD
+
+    def _pack_batch_call(self, calls: List[RpcCall]) -> RpcCall:
+        routes = {call.route for call in calls}
+        if len(routes) != 1:
+            raise ValueError('batched calls must target a single route')
+
+        return RpcCall(
+            route=routes.pop(),
+            service=RPC_BATCH_SERVICE,
+            method=RPC_BATCH_METHOD,
+            args=[self._pack_batch_item(call) for call in calls],
+        )
+
+    def _pack_batch_item(self, call: RpcCall) -> list:
+        if call.kwargs:
+            return [call.service, call.method, call.args, call.kwargs]
+
+        return [call.service, call.method, call.args]
+
+    def _unpack_batch_call(self, call: RpcCall) -> List[RpcCall]:
+        calls = []
+        try:
+            for item in call.args:
+                if not 3 <= len(item) <= 4:
+                    return None
+
+                calls.append(RpcCall(call.route, *item))
+        except TypeError:
+            return None
+
+        return calls
+
+    def _pack_batch_resp(self, resps: List[RpcResp]) -> RpcResp:
+        return RpcResp(
+            status=OK,
+            body=[[resp.status, resp.body] for resp in resps],
+        )
+
+    def _unpack_batch_resp(self, resp: RpcResp, count: int) -> List[RpcResp]:
+        if not resp.ok:
+            return [resp] * count
+
+        return [
+            RpcResp(status=status, body=body)
+            for status, body in resp.body
+        ]
 
     def _get_encoding(self, route: str):
         return self._route_encodings.get(route, self._default_encoding)
 
-    def _decode_call(self, msg: AmqpMsg) -> RpcCall:
+    def _update_codecs(self):
+        self._call_decoders_by_type = {
+            content_type: self._call_decoders[encoding]
+            for content_type, encoding in self._content_types.items()
+            if encoding in self._call_decoders
+        }
+        self._resp_decoders_by_type = {
+            content_type: self._resp_decoders[encoding]
+            for content_type, encoding in self._content_types.items()
+            if encoding in self._resp_decoders
+        }
+        self._accept_headers = {}
+        self._accept_encodings = {}
+
+    def _get_accept_header(self, route: str) -> str:
+        try:
+            return self._accept_headers[route]
+        except KeyError:
+            pass
+
+        preferred = self._get_encoding(route)
+        content_types = sorted(
+            self._resp_decoders_by_type,
+            key=lambda content_type: (
+                self._content_types[content_type] != preferred
+            ),
+        )
+        accept = ','.join(content_types)
+        self._accept_headers[route] = accept
+        return accept
+
+    def _get_resp_encoding(self, call_msg: AmqpMsg) -> str:
+        accept = None
+        if call_msg is not None and call_msg.headers:
+            accept = call_msg.headers.get(RPC_ACCEPT_HEADER)
+        if not accept:
+            return self._get_encoding(self.route)
+
+        try:
+            return self._accept_encodings[accept]
+        except KeyError:
+            pass
+
         encoding = self._get_encoding(self.route)
-        decoder = self._call_decoders[encoding]
-        return decoder(msg, self.route)
+        for content_type in accept.split(','):
+            name = self._content_types.get(content_type.strip())
+            if name in self._resp_encoders:
+                encoding = name
+                break
+
+        if len(self._accept_encodings) >= RPC_ACCEPT_CACHE_SIZE:
+            self._accept_encodings = {}
+
+        self._accept_encodings[accept] = encoding
+        return encoding
 
-    def _encode_call(self, call: RpcCall) -> AmqpMsg:
+    def _decode_call(self, msg: AmqpMsg) -> RpcCall:
+        try:
+            decoder = self._call_decoders_by_type[msg.content_type]
+        except KeyError:
+            decoder = self._call_decoders[self._get_encoding(self.route)]
+
+        if self.instrumentation is None:
+            return decoder(self._decompress_msg(msg), self.route)
+
+        start = perf_counter()
+        call = decoder(self._decompress_msg(msg), self.route)
+        self.instrumentation.call_decoded(call, msg, perf_counter() - start)
+        return call
+
+    def _encode_call(self, call: RpcCall, **fields) -> AmqpMsg:
         encoding = self._get_encoding(call.route)
         encoder = self._call_encoders[encoding]
-        return encoder(call)
+        msg = encoder(call, **fields)
+        compression = self._get_compression(call.route)
+        if compression is None:
+            return msg
+
+        return self._compress_msg(msg, compression[0], compression[1])
 
     def _decode_resp(self, msg: AmqpMsg, route: str) -> RpcResp:
-        encoding = self._get_encoding(route)
-        decoder = self._resp_decoders[encoding]
-        return decoder(msg, route)
+        try:
+            decoder = self._resp_decoders_by_type[msg.content_type]
+        except KeyError:
+            decoder = self._resp_decoders[self._get_encoding(route)]
 
-    def _encode_resp(self, resp: RpcResp) -> AmqpMsg:
-        encoding = self._get_encoding(self.route)
+        try:
+            if self.instrumentation is None:
+                return decoder(self._decompress_msg(msg), route)
+
+            start = perf_counter()
+            resp = decoder(self._decompress_msg(msg), route)
+        except PayloadTooLarge as e:
+            return self._create_too_large_resp(msg, e)
+
+        self.instrumentation.resp_decoded(route, msg, perf_counter() - start)
+        return resp
+
+    def _encode_resp(
+            self,
+            resp: RpcResp,
+            call_msg: AmqpMsg = None,
+            **fields
+    ) -> AmqpMsg:
+        encoding = self._get_resp_encoding(call_msg)
         encoder = self._resp_encoders[encoding]
-        return encoder(resp)
+        msg = encoder(resp, **fields)
+        compression = self._get_resp_compression(call_msg)
+        if compression is None:
+            return msg
+
+        return self._compress_msg(msg, compression[0], compression[1])
 
     def _configure_stages(self):
         self.setup_stage = self.conn.stage(self.setup_stage_name)
         self.listen_stage = self.conn.stage(self.listen_stage_name)
 
     def _create_publish(self):
-        channel = self.conn.channel(stage=self.setup_stage)
-        for route in self._publish_routes:
-            exchange = RPC_EXCHANGE.format(route=route)
-            channel.exchange(
-                exchange,
-                'topic',
-                stage=self.setup_stage,
-            )
+        channels = []
+        for _ in range(self._publish_channels):
+            channel = self.conn.channel(stage=self.setup_stage)
+            for route in self._publish_routes:
+                exchange = RPC_EXCHANGE.format(route=route)
+                channel.exchange(
+                    exchange,
+                    'topic',
+                    stage=self.setup_stage,
+                )
+
+            channels.append(channel)
 
-        self._rpc_call_channel = channel
+        self._rpc_call_channel = channels[0]
+        self._rpc_call_channels = channels
+        self._next_call_channel = cycle(channels).__next__
 
     def _create_listen(self):
         exchange_name = RPC_EXCHANGE.format(route=self.route)
@@ -181,7 +1326,7 @@ class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
                 'topic',
                 stage=self.setup_stage,
             )
-        channel \
+        self._listen_consumer = channel \
             .queue(
                 queue_name,
                 auto_delete=True,
@@ -196,6 +1341,30 @@ class BaseAmqpRpc(BaseRpc, metaclass=ABCMeta):
                 self._on_call_message,
                 stage=self.listen_stage,
             )
+        self._rpc_listen_channel = channel
+
+        self._add_method_lanes()
+        self._lane_consumers = {}
+        for lane in self._lanes:
+            if lane == RPC_DEFAULT_LANE:
+                continue
+
+            consumer = channel \
+                .queue(
+                    RPC_LANE_QUEUE.format(route=self.route, lane=lane),
+                    auto_delete=True,
+                    stage=self.setup_stage,
+                ) \
+                .bind(
+                    exchange,
+                    self._get_lane_topic(lane),
+                    stage=self.setup_stage,
+                ) \
+                .consume(
+                    partial(self._on_call_message, lane=lane),
+                    stage=self.listen_stage,
+                )
+            self._lane_consumers[lane] = consumer
 
     def _create_resp(self):
         channel = self.conn.channel()
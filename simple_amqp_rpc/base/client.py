@@ -1,33 +1,41 @@
+from typing import Iterable
+
 from simple_amqp_rpc.data import RpcCall
 
 
 class RpcClient:
-    def __init__(self, rpc: 'BaseRpc', service: str, route: str):
+    def __init__(
+            self,
+            rpc: 'BaseRpc',
+            service: str,
+            route: str,
+            methods: Iterable[str]=(),
+    ):
         self.rpc = rpc
         self.service = service
         self.route = route
 
         self.methods_cache = {}
+        for method in methods:
+            self._create_method(method)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        return self._create_method(name)
 
-    def __getattribute__(self, name):
-        try:
-            return object.__getattribute__(self, name)
-        except AttributeError:
-            pass
-
-        try:
-            return self.methods_cache[name]
-        except KeyError:
-            pass
-
-        def rpc_call(*args):
-            call = RpcCall(
-                route=self.route,
-                service=self.service,
-                method=name,
-                args=args,
-            )
-            return self.rpc.send_call(call)
+    def _create_method(self, name: str):
+        send_call = self.rpc.send_call
+        route = self.route
+        service = self.service
 
+        def rpc_call(*args, **kwargs):
+            return send_call(RpcCall(route, service, name, args, kwargs))
+
+        rpc_call.__name__ = name
         self.methods_cache[name] = rpc_call
+        if name not in self.__dict__:
+            setattr(self, name, rpc_call)
+
         return rpc_call
@@ -0,0 +1,68 @@
+from collections import deque
+from typing import Callable
+
+
+class ConfirmWindow:
+    def __init__(
+            self,
+            max_unconfirmed: int,
+            create_waiter: Callable,
+            wake: Callable,
+    ):
+        self.max_unconfirmed = max_unconfirmed
+        self.published = 0
+        self.nacked = 0
+        self.closed = False
+        self._unconfirmed = set()
+        self._create_waiter = create_waiter
+        self._wake = wake
+        self._waiters = deque()
+
+    @property
+    def unconfirmed(self) -> int:
+        return len(self._unconfirmed)
+
+    def take(self):
+        if self.closed:
+            return None
+
+        if len(self._unconfirmed) < self.max_unconfirmed:
+            self.published += 1
+            self._unconfirmed.add(self.published)
+            return None
+
+        waiter = self._create_waiter()
+        self._waiters.append(waiter)
+        return waiter
+
+    def cancel(self):
+        if self.closed:
+            return
+
+        self._unconfirmed.discard(self.published)
+        self.published -= 1
+        self._wake_waiters()
+
+    def confirm(self, delivery_tag: int, multiple: bool, ok: bool=True):
+        if multiple:
+            self._unconfirmed = {
+                tag for tag in self._unconfirmed
+                if tag > delivery_tag
+            }
+        else:
+            self._unconfirmed.discard(delivery_tag)
+
+        if not ok:
+            self.nacked += 1
+
+        self._wake_waiters()
+
+    def close(self):
+        self.closed = True
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = self.max_unconfirmed - len(self._unconfirmed)
+        while self._waiters and (self.closed or free > 0):
+            self._wake(self._waiters.popleft())
+            free -= 1
@@ -1,29 +1,52 @@
+import traceback
 from abc import ABCMeta
+from inspect import (
+    isasyncgenfunction,
+    iscoroutinefunction,
+    isgeneratorfunction
+)
 from typing import Callable, Tuple
 
-from simple_amqp_rpc.consts import METHOD_NOT_FOUND, SERVICE_NOT_FOUND
+from simple_amqp_rpc.consts import (
+    CALL_ARGS_MISMATCH,
+    EXECUTOR_INLINE,
+    EXECUTORS,
+    METHOD_NOT_FOUND,
+    SERVICE_NOT_FOUND
+)
+from simple_amqp_rpc.contract import CallArgsError, create_contract
 from simple_amqp_rpc.data import RpcCall, RpcResp
 from simple_amqp_rpc.log import setup_logger
+from simple_amqp_rpc.metrics import Instrumentation
 from simple_amqp_rpc.service import Service
 
 from .client import RpcClient
 
 
 class BaseRpc(metaclass=ABCMeta):
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, instrumentation: Instrumentation=None):
         self._services = {}
+        self._method_options = {}
+        self._contracts = {}
+        self._method_executors = {}
         self._recv_error_handlers = set()
         self.log = logger if logger is not None else setup_logger()
+        self.instrumentation = instrumentation
 
-    def method(self, service: str, name: str=None):
+    def method(self, service: str, name: str=None, **options):
         if service not in self._services:
             self._services[service] = {}
+            self._method_options[service] = {}
+            self._contracts[service] = {}
 
         def decorator(func, name=name):
             if name is None:
                 name = func.__name__
 
+            self._set_method_executor(service, name, func, options)
             self._services[service][name] = func
+            self._method_options[service][name] = options
+            self._contracts[service][name] = create_contract(func)
             return func
 
         return decorator
@@ -34,12 +57,50 @@ class BaseRpc(metaclass=ABCMeta):
 
         if service_name not in self._services:
             self._services[service_name] = {}
+            self._method_options[service_name] = {}
+            self._contracts[service_name] = {}
 
         for method, handler in methods.items():
+            options = svc.get_options(method)
+            self._set_method_executor(service_name, method, handler, options)
             self._services[service_name][method] = handler
+            self._method_options[service_name][method] = options
+            self._contracts[service_name][method] = create_contract(handler)
 
         return self
 
+    def _set_method_executor(
+            self,
+            service: str,
+            method: str,
+            handler,
+            options: dict,
+    ):
+        executor = options.get('executor', EXECUTOR_INLINE)
+        if executor not in EXECUTORS:
+            raise ValueError('Unknown executor [{}] for [{}:{}]'.format(
+                executor,
+                service,
+                method,
+            ))
+
+        if executor == EXECUTOR_INLINE:
+            self._method_executors.pop((service, method), None)
+            return
+
+        if iscoroutinefunction(handler) or \
+                isasyncgenfunction(handler) or \
+                isgeneratorfunction(handler):
+            raise ValueError(
+                'Method [{}:{}] cannot run in a {} executor'.format(
+                    service,
+                    method,
+                    executor,
+                ),
+            )
+
+        self._method_executors[(service, method)] = executor
+
     def client(self, service: str) -> RpcClient:
         raise NotImplementedError
 
@@ -50,20 +111,22 @@ class BaseRpc(metaclass=ABCMeta):
         raise NotImplementedError
 
     def log_call_recv(self, call: RpcCall):
-        self.log.info('call received [{}->{}]'.format(
-            call.service,
-            call.method,
-        ))
+        self.log.info('call received [%s->%s]', call.service, call.method)
 
     def log_call_sent(self, call: RpcCall):
-        self.log.info('sending call [{}:{}]'.format(
-            call.service,
-            call.method,
-        ))
+        self.log.info('sending call [%s:%s]', call.service, call.method)
 
     def add_recv_call_error_handler(self, handler):
         self._recv_error_handlers.add(handler)
 
+    def _on_recv_call_error(self, exc: Exception):
+        if not self._recv_error_handlers:
+            traceback.print_exc()
+            return
+
+        for handler in self._recv_error_handlers:
+            handler(exc)
+
     def _get_method(
             self,
             service: str,
@@ -91,3 +154,20 @@ class BaseRpc(metaclass=ABCMeta):
             )
 
         return handler, None
+
+    def _validate_call(self, call: RpcCall) -> Tuple[tuple, dict, RpcResp]:
+        args = call.args
+        kwargs = call.kwargs or {}
+        contract = self._contracts[call.service].get(call.method)
+        if contract is None:
+            return args, kwargs, None
+
+        try:
+            args, kwargs = contract.validate(args, kwargs)
+        except CallArgsError as e:
+            return None, None, RpcResp(
+                status=CALL_ARGS_MISMATCH,
+                body='Invalid call arguments: {}'.format(e),
+            )
+
+        return args, kwargs, None
@@ -0,0 +1,75 @@
+from collections import OrderedDict
+
+from simple_amqp_rpc.consts import (
+    RPC_ABANDONED_CALLS_SIZE,
+    RPC_MAX_PENDING_CALLS
+)
+
+
+class PendingCalls:
+    def __init__(
+            self,
+            max_size: int=RPC_MAX_PENDING_CALLS,
+            abandoned_size: int=RPC_ABANDONED_CALLS_SIZE,
+    ):
+        self.max_size = max_size
+        self.abandoned_size = abandoned_size
+        self.late_replies = 0
+        self.orphaned_replies = 0
+        self.abandoned_calls = 0
+
+        self._calls = {}
+        self._abandoned = OrderedDict()
+
+    def __len__(self):
+        return len(self._calls)
+
+    @property
+    def full(self) -> bool:
+        return self.max_size is not None and len(self._calls) >= self.max_size
+
+    def add(self, reply_id: str, future, route: str):
+        self._calls[reply_id] = (future, route)
+
+    def get(self, reply_id: str):
+        try:
+            return self._calls[reply_id]
+        except KeyError:
+            self._count_unknown_reply(reply_id)
+            return None
+
+    def pop(self, reply_id: str):
+        try:
+            return self._calls.pop(reply_id)
+        except KeyError:
+            self._count_unknown_reply(reply_id)
+            return None
+
+    def _count_unknown_reply(self, reply_id: str):
+        try:
+            self._abandoned.pop(reply_id)
+            self.late_replies += 1
+        except KeyError:
+            self.orphaned_replies += 1
+
+    def remove(self, reply_id: str):
+        self._calls.pop(reply_id, None)
+
+    def discard(self, reply_id: str):
+        try:
+            self._calls.pop(reply_id)
+        except KeyError:
+            return
+
+        self.abandoned_calls += 1
+        self._abandoned[reply_id] = True
+        if len(self._abandoned) > self.abandoned_size:
+            self._abandoned.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._calls),
+            'abandoned': self.abandoned_calls,
+            'late_replies': self.late_replies,
+            'orphaned_replies': self.orphaned_replies,
+        }
@@ -0,0 +1,73 @@
+from typing import Callable, List, Tuple
+
+from simple_amqp_rpc.consts import STREAM_CHUNK
+from simple_amqp_rpc.data import RpcResp
+
+
+class StreamStalled(Exception):
+    pass
+
+
+class RespStream:
+    def __init__(self, queue, window: int=None):
+        self.queue = queue
+        self.credit_to = None
+        self._next_seq = 0
+        self._chunks = {}
+        self._consumed = 0
+        self._credit_batch = max(window // 2, 1) if window else None
+
+    def consume(self) -> int:
+        if self.credit_to is None or self._credit_batch is None:
+            return 0
+
+        self._consumed += 1
+        if self._consumed < self._credit_batch:
+            return 0
+
+        consumed, self._consumed = self._consumed, 0
+        return consumed
+
+    def add(self, seq: int, resp: RpcResp):
+        self._chunks[seq] = resp
+
+    def pop(self) -> RpcResp:
+        try:
+            resp = self._chunks.pop(self._next_seq)
+        except KeyError:
+            return None
+
+        self._next_seq += 1
+        return resp
+
+    @staticmethod
+    def from_resp(resp: RpcResp) -> List[Tuple[int, RpcResp]]:
+        if not resp.ok:
+            return [(0, resp)]
+
+        return [
+            (0, resp.replace(status=STREAM_CHUNK)),
+            (1, RpcResp(status=resp.status)),
+        ]
+
+
+class StreamCredit:
+    def __init__(self, window: int, create_waiter: Callable, wake: Callable):
+        self.available = window
+        self._create_waiter = create_waiter
+        self._wake = wake
+        self._waiter = None
+
+    def take(self):
+        if self.available > 0:
+            self.available -= 1
+            return None
+
+        self._waiter = self._create_waiter()
+        return self._waiter
+
+    def add(self, count: int):
+        self.available += count
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None:
+            self._wake(waiter)
@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from copy import deepcopy
+from time import monotonic
+
+from .consts import RPC_CACHE_SIZE
+from .data import RpcCall, RpcResp
+
+
+def freeze_args(value):
+    # values are tagged with their type so that e.g. {'a': 1}, [['a', 1]]
+    # and [['a', True]] do not share a key
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(freeze_args(item) for item in value))
+    if isinstance(value, dict):
+        return (dict, tuple(sorted(
+            (key, freeze_args(item))
+            for key, item in value.items()
+        )))
+
+    hash(value)
+    return (type(value), value)
+
+
+def copy_resp(resp: RpcResp) -> RpcResp:
+    return resp.replace(body=deepcopy(resp.body))
+
+
+def cache_key(call: RpcCall):
+    try:
+        args = freeze_args(call.args)
+        kwargs = freeze_args(call.kwargs or {})
+    except TypeError:
+        return None
+
+    return (call.route, call.service, call.method, args, kwargs)
+
+
+class ResponseCache:
+    def __init__(self, max_size: int=RPC_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key) -> RpcResp:
+        try:
+            expires_at, resp = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        if expires_at < monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy_resp(resp)
+
+    def set(self, key, resp: RpcResp, ttl: float):
+        self._entries[key] = (monotonic() + ttl, copy_resp(resp))
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+        }
@@ -0,0 +1,109 @@
+import gzip
+import zlib
+from functools import partial
+
+from .consts import (
+    COMPRESSION_GZIP,
+    COMPRESSION_LZ4,
+    COMPRESSION_ZLIB,
+    COMPRESSION_ZSTD,
+    RPC_COMPRESSION_LEVEL
+)
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class PayloadTooLarge(ValueError):
+    pass
+
+
+def check_size(size: int, max_size: int):
+    if size > max_size:
+        raise PayloadTooLarge(
+            'Decompressed payload larger than {} bytes'.format(max_size),
+        )
+
+
+def limit_decompress(decompress):
+    # decompressors added with add_compressor can not stop early, so their
+    # output is only checked once it is complete
+    def bounded(payload: bytes, max_size: int) -> bytes:
+        data = decompress(payload)
+        check_size(len(data), max_size)
+        return data
+
+    return bounded
+
+
+def _zlib_decompress(
+        payload: bytes,
+        max_size: int,
+        wbits: int=zlib.MAX_WBITS,
+) -> bytes:
+    decompressor = zlib.decompressobj(wbits)
+    data = decompressor.decompress(payload, max_size + 1)
+    check_size(len(data), max_size)
+    if not decompressor.eof:
+        raise zlib.error('Incomplete compressed payload')
+
+    return data
+
+
+def _lz4_decompress(payload: bytes, max_size: int) -> bytes:
+    decompressor = lz4_frame.LZ4FrameDecompressor()
+    data = decompressor.decompress(payload, max_length=max_size + 1)
+    check_size(len(data), max_size)
+    if not decompressor.eof:
+        raise RuntimeError('Incomplete compressed payload')
+
+    return data
+
+
+def _zstd_decompress(payload: bytes, max_size: int) -> bytes:
+    chunks = []
+    size = 0
+    with zstandard.ZstdDecompressor().stream_reader(payload) as reader:
+        while size <= max_size:
+            chunk = reader.read(max_size + 1 - size)
+            if not chunk:
+                break
+
+            chunks.append(chunk)
+            size += len(chunk)
+
+    check_size(size, max_size)
+    return b''.join(chunks)
+
+
+COMPRESSORS = {
+    COMPRESSION_ZLIB: (
+        partial(zlib.compress, level=RPC_COMPRESSION_LEVEL),
+        _zlib_decompress,
+    ),
+    COMPRESSION_GZIP: (
+        partial(gzip.compress, compresslevel=RPC_COMPRESSION_LEVEL),
+        partial(_zlib_decompress, wbits=GZIP_WBITS),
+    ),
+}
+
+if lz4_frame is not None:
+    COMPRESSORS[COMPRESSION_LZ4] = (
+        lz4_frame.compress,
+        _lz4_decompress,
+    )
+
+if zstandard is not None:
+    COMPRESSORS[COMPRESSION_ZSTD] = (
+        zstandard.ZstdCompressor().compress,
+        _zstd_decompress,
+    )
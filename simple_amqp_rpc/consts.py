@@ -4,11 +4,88 @@ RPC_EXCHANGE = 'rpc.{route}'
 RPC_QUEUE = 'rpc.{route}'
 REPLY_ID = 'rpc.reply.{id}'
 RPC_TOPIC = 'rpc'
+RPC_LANE_QUEUE = 'rpc.{route}.{lane}'
+RPC_LANE_TOPIC = 'rpc.{lane}'
+RPC_DEFAULT_LANE = 'default'
+RPC_LANE_PREFETCH_FACTOR = 2
+RPC_ACCEPT_HEADER = 'x-rpc-accept'
+RPC_ACCEPT_CACHE_SIZE = 256
+RPC_BATCH_SERVICE = 'rpc.batch'
+RPC_BATCH_METHOD = 'calls'
+RPC_COALESCE_MAX_CALLS = 100
+RPC_COALESCE_MAX_DELAY = 0.005
+RPC_STREAM_SEQ_HEADER = 'x-rpc-seq'
+RPC_STREAM_BUFFER = 64
+RPC_STREAM_WINDOW_HEADER = 'x-rpc-stream-window'
+RPC_STREAM_CREDIT_HEADER = 'x-rpc-stream-credit'
+RPC_STREAM_CREDIT_TO_HEADER = 'x-rpc-stream-credit-to'
+RPC_STREAM_CREDIT_TIMEOUT = 60
+RPC_CACHE_SIZE = 1024
 RPC_CALL_TIMEOUT = 60
 RPC_MESSAGE_TTL = 60000
+RPC_DRAIN_TIMEOUT = 30
+RPC_DRAIN_INTERVAL = 0.05
+RPC_WORKER_RESTART_DELAY = 1
+RPC_WORKER_POLL_INTERVAL = 0.5
+RPC_WORKER_STOP_GRACE = 5
+RPC_MAX_PENDING_CALLS = 10000
+RPC_ABANDONED_CALLS_SIZE = 10000
+RPC_EXECUTOR_MAX_PENDING = 1000
+RPC_SEGMENT_EXT = 1
+RPC_SEGMENT_MIN_SIZE = 1024
+RPC_RETRY_BACKOFF = 0.05
+RPC_RETRY_MAX_BACKOFF = 1
+RPC_HEDGE_BUDGET_RATIO = 0.1
+RPC_HEDGE_BUDGET_BURST = 10
+RPC_HEDGE_MIN_SAMPLES = 20
+RPC_LATENCY_WINDOW = 256
+RPC_LIMITER_INITIAL_LIMIT = 20
+RPC_LIMITER_MIN_LIMIT = 1
+RPC_LIMITER_MAX_LIMIT = 1000
+RPC_LIMITER_BACKOFF_RATIO = 0.9
+RPC_BREAKER_FAILURES = 5
+RPC_BREAKER_RESET_TIMEOUT = 5
+RPC_BREAKER_HALF_OPEN_CALLS = 1
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+RPC_ACCEPT_COMPRESSION_HEADER = 'x-rpc-accept-compression'
+RPC_COMPRESSION_THRESHOLD = 4096
+RPC_COMPRESSION_LEVEL = 6
+RPC_MAX_DECOMPRESSED_SIZE = 64 * 1024 * 1024
+COMPRESSION_ZLIB = 'zlib'
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_LZ4 = 'lz4'
+COMPRESSION_ZSTD = 'zstd'
+RPC_DEADLINE_HEADER = 'x-rpc-deadline'
+RPC_METHOD_HEADER = 'x-rpc-method'
+SHED_INFLIGHT = 'inflight'
+SHED_QUEUE_AGE = 'queue_age'
+SHED_RATE_LIMIT = 'rate_limit'
+RPC_SENT_AT_HEADER = 'x-rpc-sent-at'
+RPC_METRICS_HOST = '127.0.0.1'
+RPC_METRICS_PORT = 9155
+EXECUTOR_INLINE = 'inline'
+EXECUTOR_THREAD = 'thread'
+EXECUTOR_PROCESS = 'process'
+EXECUTORS = (EXECUTOR_INLINE, EXECUTOR_THREAD, EXECUTOR_PROCESS)
+RPC_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+RPC_SIZE_BUCKETS = (
+    64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
 
 OK = HTTPStatus.OK
+STREAM_CHUNK = HTTPStatus.PARTIAL_CONTENT
 SERVICE_NOT_FOUND = HTTPStatus.NOT_FOUND
 METHOD_NOT_FOUND = HTTPStatus.METHOD_NOT_ALLOWED
 CALL_ERROR = HTTPStatus.INTERNAL_SERVER_ERROR
 CALL_ARGS_MISMATCH = HTTPStatus.BAD_REQUEST
+TOO_MANY_CALLS = HTTPStatus.TOO_MANY_REQUESTS
+SERVER_BUSY = HTTPStatus.SERVICE_UNAVAILABLE
+STREAM_REQUIRED = HTTPStatus.NOT_ACCEPTABLE
+ROUTE_UNAVAILABLE = HTTPStatus.BAD_GATEWAY
+PAYLOAD_TOO_LARGE = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+RETRYABLE_STATUSES = (TOO_MANY_CALLS, SERVER_BUSY)
@@ -0,0 +1,195 @@
+from inspect import Parameter, signature
+from typing import Any, Callable, Dict, Tuple
+
+POSITIONAL_KINDS = (
+    Parameter.POSITIONAL_ONLY,
+    Parameter.POSITIONAL_OR_KEYWORD,
+)
+
+
+class CallArgsError(ValueError):
+    pass
+
+
+class MethodContract:
+    def __init__(self, func: Callable):
+        params = signature(func).parameters.values()
+
+        self.names = []
+        self.positional_only = set()
+        self.keyword_names = set()
+        self.required_keywords = []
+        self.min_args = 0
+        self.var_args = False
+        self.var_kwargs = False
+        self.converters = {}
+        self.positional_converters = []
+
+        for param in params:
+            if param.kind == Parameter.VAR_POSITIONAL:
+                self.var_args = True
+                continue
+
+            if param.kind == Parameter.VAR_KEYWORD:
+                self.var_kwargs = True
+                continue
+
+            required = param.default is Parameter.empty
+            if param.kind in POSITIONAL_KINDS:
+                self.names.append(param.name)
+                if required:
+                    self.min_args = len(self.names)
+            elif required:
+                self.required_keywords.append(param.name)
+
+            if param.kind == Parameter.POSITIONAL_ONLY:
+                self.positional_only.add(param.name)
+            else:
+                self.keyword_names.add(param.name)
+
+            converter = create_converter(
+                param.name,
+                param.annotation,
+                param.default is None,
+            )
+            if converter is None:
+                continue
+
+            self.converters[param.name] = converter
+            if param.kind in POSITIONAL_KINDS:
+                self.positional_converters.append(
+                    (len(self.names) - 1, converter),
+                )
+
+        self.max_args = None if self.var_args else len(self.names)
+
+    def validate(
+            self,
+            args: tuple,
+            kwargs: Dict[str, Any],
+    ) -> Tuple[tuple, Dict[str, Any]]:
+        nargs = len(args)
+        if self.max_args is not None and nargs > self.max_args:
+            raise CallArgsError('expected at most {} arguments, got {}'.format(
+                self.max_args,
+                nargs,
+            ))
+
+        if kwargs:
+            kwargs = self._validate_kwargs(nargs, kwargs)
+        elif nargs < self.min_args:
+            raise CallArgsError('missing argument [{}]'.format(
+                self.names[nargs],
+            ))
+        elif self.required_keywords:
+            raise CallArgsError('missing argument [{}]'.format(
+                self.required_keywords[0],
+            ))
+
+        if self.positional_converters:
+            args = list(args)
+            for index, converter in self.positional_converters:
+                if index >= nargs:
+                    break
+
+                args[index] = converter(args[index])
+
+        return args, kwargs
+
+    def _validate_kwargs(
+            self,
+            nargs: int,
+            kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        passed = self.names[:nargs]
+        for name in kwargs:
+            if name in passed:
+                raise CallArgsError(
+                    'multiple values for argument [{}]'.format(name),
+                )
+
+            if name not in self.keyword_names and not self.var_kwargs:
+                raise CallArgsError('unexpected argument [{}]'.format(name))
+
+        for index in range(nargs, self.min_args):
+            name = self.names[index]
+            if name not in kwargs or name in self.positional_only:
+                raise CallArgsError('missing argument [{}]'.format(name))
+
+        for name in self.required_keywords:
+            if name not in kwargs:
+                raise CallArgsError('missing argument [{}]'.format(name))
+
+        if not self.converters:
+            return kwargs
+
+        kwargs = dict(kwargs)
+        for name, value in kwargs.items():
+            converter = self.converters.get(name)
+            if converter is not None:
+                kwargs[name] = converter(value)
+
+        return kwargs
+
+
+def create_contract(func: Callable) -> MethodContract:
+    try:
+        return MethodContract(func)
+    except (TypeError, ValueError):
+        return None
+
+
+def create_converter(name: str, annotation, nullable: bool) -> Callable:
+    annotation = getattr(annotation, '__origin__', None) or annotation
+    if annotation is float:
+        convert = _to_float
+    elif annotation in (list, tuple):
+        convert = _to_sequence(annotation)
+    elif annotation is bytes:
+        convert = _check_type((bytes, bytearray, memoryview))
+    elif annotation in (int, str, bool, dict):
+        convert = _check_type(annotation)
+    else:
+        return None
+
+    def converter(value):
+        if value is None and nullable:
+            return value
+
+        try:
+            return convert(value)
+        except TypeError:
+            raise CallArgsError('invalid type for argument [{}]'.format(name))
+
+    return converter
+
+
+def _to_float(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError
+
+    return float(value)
+
+
+def _to_sequence(seq_type):
+    def convert(value):
+        if isinstance(value, seq_type):
+            return value
+        if isinstance(value, (list, tuple)):
+            return seq_type(value)
+
+        raise TypeError
+
+    return convert
+
+
+def _check_type(value_type):
+    def convert(value):
+        if not isinstance(value, value_type):
+            raise TypeError
+        if isinstance(value, bool) and value_type is not bool:
+            raise TypeError
+
+        return value
+
+    return convert
@@ -1,21 +1,47 @@
-from typing import Any, List
+from typing import Any, Dict, List
 
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, fields, replace
 
 from .consts import OK
 
 
 class Data:
+    __slots__ = ()
+
     def replace(self, **kwargs):
         return replace(self, **kwargs)
 
+    def __getstate__(self):
+        return tuple(getattr(self, field.name) for field in fields(self))
 
-@dataclass(frozen=True)
+    def __setstate__(self, state):
+        for field, value in zip(fields(self), state):
+            object.__setattr__(self, field.name, value)
+
+
+@dataclass(frozen=True, init=False)
 class RpcCall(Data):
+    __slots__ = ('route', 'service', 'method', 'args', 'kwargs')
+
     route: str
     service: str
     method: str
     args: List[Any]
+    kwargs: Dict[str, Any]
+
+    def __init__(
+            self,
+            route: str,
+            service: str,
+            method: str,
+            args: List[Any],
+            kwargs: Dict[str, Any]=None,
+    ):
+        object.__setattr__(self, 'route', route)
+        object.__setattr__(self, 'service', service)
+        object.__setattr__(self, 'method', method)
+        object.__setattr__(self, 'args', args)
+        object.__setattr__(self, 'kwargs', kwargs)
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,46 @@
+from contextvars import ContextVar
+from time import time
+
+_call_deadline = ContextVar('rpc_call_deadline', default=None)
+
+
+def encode_header_time(seconds: float) -> int:
+    return int(seconds * 1000)
+
+
+def decode_header_time(value) -> float:
+    if value is None or isinstance(value, float):
+        return None
+
+    try:
+        return int(value) / 1000
+    except (TypeError, ValueError):
+        return None
+
+
+def get_call_deadline() -> float:
+    return _call_deadline.get()
+
+
+def remaining_time() -> float:
+    deadline = _call_deadline.get()
+    if deadline is None:
+        return None
+
+    return max(deadline - time(), 0)
+
+
+def set_call_deadline(deadline: float):
+    return _call_deadline.set(deadline)
+
+
+def reset_call_deadline(token):
+    _call_deadline.reset(token)
+
+
+def run_with_deadline(deadline: float, func, *args, **kwargs):
+    token = _call_deadline.set(deadline)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _call_deadline.reset(token)
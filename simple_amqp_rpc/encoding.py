@@ -1,24 +1,55 @@
 import json
+from inspect import Parameter, signature
+from struct import Struct
 
+import msgpack
 from simple_amqp import AmqpMsg
 
-from .consts import RPC_MESSAGE_TTL
+from .consts import RPC_MESSAGE_TTL, RPC_SEGMENT_EXT, RPC_SEGMENT_MIN_SIZE
 from .data import RpcCall, RpcResp
 
+CONTENT_TYPE_JSON = 'application/json'
 CONTENT_TYPE_MSGPACK = 'application/msgpack'
+CONTENT_TYPE_FRAMED = 'application/x-rpc-framed'
 
+_msgpack_packer = msgpack.Packer(use_bin_type=True)
+_frame_header = Struct('>I')
+_segment_ref = Struct('>II')
 
-def encode_rpc_call(call: RpcCall) -> AmqpMsg:
-    payload = json.dumps({
+
+def adapt_encoder(encoder):
+    # encoders written before the message fields were passed in only take
+    # the call or response, so the fields are applied to their message
+    try:
+        params = signature(encoder).parameters.values()
+    except (TypeError, ValueError):
+        return encoder
+
+    if any(param.kind == Parameter.VAR_KEYWORD for param in params):
+        return encoder
+
+    def encode(data, **fields) -> AmqpMsg:
+        return encoder(data).replace(**fields)
+
+    return encode
+
+
+def encode_rpc_call(call: RpcCall, **fields) -> AmqpMsg:
+    fields.setdefault('expiration', RPC_MESSAGE_TTL)
+    payload = {
         'service': call.service,
         'method': call.method,
         'args': call.args,
-    })
+    }
+    if call.kwargs:
+        payload['kwargs'] = call.kwargs
+
+    payload = json.dumps(payload)
     payload = payload.encode('utf8')
     return AmqpMsg(
         payload=payload,
-        content_type=CONTENT_TYPE_MSGPACK,
-        expiration=RPC_MESSAGE_TTL,
+        content_type=CONTENT_TYPE_JSON,
+        **fields,
     )
 
 
@@ -28,11 +59,12 @@ def decode_rpc_call(msg: AmqpMsg, route: str) -> RpcCall:
         service=payload['service'],
         method=payload['method'],
         args=payload['args'],
+        kwargs=payload.get('kwargs'),
         route=route,
     )
 
 
-def encode_rpc_resp(resp: RpcResp) -> AmqpMsg:
+def encode_rpc_resp(resp: RpcResp, **fields) -> AmqpMsg:
     payload = json.dumps({
         'status': resp.status,
         'body': resp.body,
@@ -40,7 +72,8 @@ def encode_rpc_resp(resp: RpcResp) -> AmqpMsg:
     payload = payload.encode('utf8')
     return AmqpMsg(
         payload=payload,
-        content_type=CONTENT_TYPE_MSGPACK,
+        content_type=CONTENT_TYPE_JSON,
+        **fields,
     )
 
 
@@ -50,3 +83,176 @@ def decode_rpc_resp(msg: AmqpMsg, route: str) -> RpcResp:
         status=payload['status'],
         body=payload['body'],
     )
+
+
+def encode_rpc_call_msgpack(call: RpcCall, **fields) -> AmqpMsg:
+    fields.setdefault('expiration', RPC_MESSAGE_TTL)
+    payload = {
+        'service': call.service,
+        'method': call.method,
+        'args': call.args,
+    }
+    if call.kwargs:
+        payload['kwargs'] = call.kwargs
+
+    payload = _msgpack_packer.pack(payload)
+    return AmqpMsg(
+        payload=payload,
+        content_type=CONTENT_TYPE_MSGPACK,
+        **fields,
+    )
+
+
+def decode_rpc_call_msgpack(msg: AmqpMsg, route: str) -> RpcCall:
+    payload = _unpack_msgpack(msg.payload)
+    return RpcCall(
+        service=payload['service'],
+        method=payload['method'],
+        args=payload['args'],
+        kwargs=payload.get('kwargs'),
+        route=route,
+    )
+
+
+def encode_rpc_resp_msgpack(resp: RpcResp, **fields) -> AmqpMsg:
+    payload = _msgpack_packer.pack({
+        'status': resp.status,
+        'body': resp.body,
+    })
+    return AmqpMsg(
+        payload=payload,
+        content_type=CONTENT_TYPE_MSGPACK,
+        **fields,
+    )
+
+
+def decode_rpc_resp_msgpack(msg: AmqpMsg, route: str) -> RpcResp:
+    payload = _unpack_msgpack(msg.payload)
+    return RpcResp(
+        status=payload['status'],
+        body=payload['body'],
+    )
+
+
+def _unpack_msgpack(payload: bytes):
+    # older releases sent json payloads labeled as msgpack, a msgpack
+    # encoded map never starts with '{'
+    if payload[:1] == b'{':
+        return json.loads(payload)
+
+    return msgpack.unpackb(payload, raw=False)
+
+
+def encode_rpc_call_framed(call: RpcCall, **fields) -> AmqpMsg:
+    fields.setdefault('expiration', RPC_MESSAGE_TTL)
+    writer = _SegmentWriter()
+    payload = {
+        'service': call.service,
+        'method': call.method,
+        'args': writer.frame(call.args),
+    }
+    if call.kwargs:
+        payload['kwargs'] = writer.frame(call.kwargs)
+
+    return AmqpMsg(
+        payload=writer.pack(payload),
+        content_type=CONTENT_TYPE_FRAMED,
+        **fields,
+    )
+
+
+def decode_rpc_call_framed(msg: AmqpMsg, route: str) -> RpcCall:
+    payload = _unpack_framed(msg.payload)
+    return RpcCall(
+        service=payload['service'],
+        method=payload['method'],
+        args=payload['args'],
+        kwargs=payload.get('kwargs'),
+        route=route,
+    )
+
+
+def encode_rpc_resp_framed(resp: RpcResp, **fields) -> AmqpMsg:
+    writer = _SegmentWriter()
+    payload = {
+        'status': resp.status,
+        'body': writer.frame(resp.body),
+    }
+    return AmqpMsg(
+        payload=writer.pack(payload),
+        content_type=CONTENT_TYPE_FRAMED,
+        **fields,
+    )
+
+
+def decode_rpc_resp_framed(msg: AmqpMsg, route: str) -> RpcResp:
+    payload = _unpack_framed(msg.payload)
+    return RpcResp(
+        status=payload['status'],
+        body=payload['body'],
+    )
+
+
+class _SegmentWriter:
+    # large binary values are replaced by (offset, length) references and
+    # appended after the msgpack header, so they are copied exactly once
+    # into the message payload
+    def __init__(self):
+        self.segments = []
+        self.size = 0
+
+    def frame(self, value):
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            length = value.nbytes if isinstance(value, memoryview) \
+                else len(value)
+            if length < RPC_SEGMENT_MIN_SIZE:
+                return value
+
+            ref = _segment_ref.pack(self.size, length)
+            self.segments.append(value)
+            self.size += length
+            return msgpack.ExtType(RPC_SEGMENT_EXT, ref)
+
+        if isinstance(value, (list, tuple)):
+            return [self.frame(item) for item in value]
+
+        if isinstance(value, dict):
+            return {key: self.frame(item) for key, item in value.items()}
+
+        return value
+
+    def pack(self, payload: dict) -> bytes:
+        header = _msgpack_packer.pack(payload)
+        return b''.join([
+            _frame_header.pack(len(header)),
+            header,
+            *self.segments,
+        ])
+
+
+def _unpack_framed(payload: bytes):
+    view = memoryview(payload)
+    if len(view) < _frame_header.size:
+        raise ValueError('Truncated frame header')
+
+    (header_size,) = _frame_header.unpack_from(view)
+    start = _frame_header.size + header_size
+    if start > len(view):
+        raise ValueError('Truncated frame header')
+
+    def ext_hook(code: int, data: bytes):
+        if code != RPC_SEGMENT_EXT:
+            return msgpack.ExtType(code, data)
+
+        offset, length = _segment_ref.unpack(data)
+        end = start + offset + length
+        if end > len(view):
+            raise ValueError('Truncated frame segment')
+
+        return view[start + offset:end]
+
+    return msgpack.unpackb(
+        view[_frame_header.size:start],
+        ext_hook=ext_hook,
+        raw=False,
+    )
@@ -0,0 +1,74 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from .consts import RPC_EXECUTOR_MAX_PENDING
+from .deadline import run_with_deadline
+
+_process_handlers = {}
+
+
+class CallExecutor:
+    def __init__(
+            self,
+            factory: Callable,
+            max_workers: int=None,
+            max_pending: int=RPC_EXECUTOR_MAX_PENDING,
+    ):
+        self.factory = factory
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = self.factory(self.max_workers)
+
+        return self._pool
+
+    @property
+    def full(self) -> bool:
+        return self.max_pending is not None and \
+            self.pending >= self.max_pending
+
+    def shutdown(self, wait: bool=True):
+        if self._pool is None:
+            return
+
+        self._pool.shutdown(wait=wait)
+        self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            'pending': self.pending,
+            'rejected': self.rejected,
+        }
+
+
+def create_process_pool(max_workers: int, handlers: dict):
+    return ProcessPoolExecutor(
+        max_workers,
+        initializer=init_process_worker,
+        initargs=(handlers,),
+    )
+
+
+def init_process_worker(handlers: dict):
+    _process_handlers.update(handlers)
+
+
+def run_process_call(
+        service: str,
+        method: str,
+        deadline: float,
+        args,
+        kwargs: dict,
+):
+    handler = _process_handlers[(service, method)]
+    if deadline is None:
+        return handler(*args, **kwargs)
+
+    return run_with_deadline(deadline, handler, *args, **kwargs)
@@ -1,17 +1,63 @@
-import traceback
+from concurrent.futures import Future
+from contextvars import copy_context
+from copy import deepcopy
+from functools import partial
+from inspect import isgenerator
+from time import monotonic, perf_counter, time
+from typing import List
 
+from gevent import (
+    GreenletExit,
+    Timeout,
+    iwait,
+    sleep,
+    spawn,
+    spawn_later,
+    wait
+)
 from gevent.event import AsyncResult
+from gevent.pool import Group, Pool
+from gevent.queue import Queue
+from gevent.threadpool import ThreadPoolExecutor
+from pika.spec import Basic
 from simple_amqp import AmqpMsg, AmqpParameters
 from simple_amqp.gevent import GeventAmqpConnection
 
 from simple_amqp_rpc import RpcCall, RpcResp
-from simple_amqp_rpc.base import BaseAmqpRpc
+from simple_amqp_rpc.base import BaseAmqpRpc, RespStream
+from simple_amqp_rpc.base.confirms import ConfirmWindow
+from simple_amqp_rpc.base.stream import StreamCredit, StreamStalled
+from simple_amqp_rpc.cache import cache_key, copy_resp
+from simple_amqp_rpc.compression import PayloadTooLarge
 from simple_amqp_rpc.consts import (
     CALL_ARGS_MISMATCH,
     CALL_ERROR,
+    EXECUTOR_THREAD,
     OK,
-    RPC_CALL_TIMEOUT
+    RPC_BATCH_SERVICE,
+    RPC_CACHE_SIZE,
+    RPC_CALL_TIMEOUT,
+    RPC_DEFAULT_LANE,
+    RPC_DRAIN_INTERVAL,
+    RPC_DRAIN_TIMEOUT,
+    RPC_MAX_PENDING_CALLS,
+    RPC_STREAM_CREDIT_TIMEOUT,
+    RPC_STREAM_CREDIT_TO_HEADER,
+    SERVER_BUSY,
+    STREAM_CHUNK,
+    TOO_MANY_CALLS
+)
+from simple_amqp_rpc.deadline import (
+    get_call_deadline,
+    reset_call_deadline,
+    run_with_deadline,
+    set_call_deadline
 )
+from simple_amqp_rpc.executor import CallExecutor
+from simple_amqp_rpc.lanes import call_lane
+from simple_amqp_rpc.limiter import RouteGuard
+from simple_amqp_rpc.metrics import Instrumentation
+from simple_amqp_rpc.retry import RetryPolicy
 
 
 class GeventAmqpRpc(BaseAmqpRpc):
@@ -21,49 +67,112 @@ class GeventAmqpRpc(BaseAmqpRpc):
             params: AmqpParameters = None,
             route: str='service.name',
             call_timeout: int=RPC_CALL_TIMEOUT,
+            max_concurrent_calls: int=None,
+            max_pending_calls: int=RPC_MAX_PENDING_CALLS,
+            publish_channels: int=1,
+            max_unconfirmed_publishes: int=None,
+            cache_size: int=RPC_CACHE_SIZE,
             logger=None,
+            instrumentation: Instrumentation=None,
     ):
         super().__init__(
             conn=conn,
             params=params,
             route=route,
             call_timeout=call_timeout,
-            logger=None,
+            max_concurrent_calls=max_concurrent_calls,
+            max_pending_calls=max_pending_calls,
+            publish_channels=publish_channels,
+            max_unconfirmed_publishes=max_unconfirmed_publishes,
+            cache_size=cache_size,
+            logger=logger,
+            instrumentation=instrumentation,
         )
-        self._response_futures = {}
+        self._call_pool = None
+        self.set_max_concurrent_calls(max_concurrent_calls)
+        self._confirm_windows = {}
+        self._watch_channels()
 
     def start(self, auto_reconnect: bool=True):
         self.conn.add_stage(self.setup_stage)
-        self.conn.add_stage(self.listen_stage)
         self.conn.start(auto_reconnect)
+        if self._max_concurrent_calls is not None:
+            self._set_prefetch(self._get_prefetch_count())
+
+        self.conn.run_stage(self.listen_stage)
+        self._listening = True
+
+    def stop(self, drain_timeout: int=RPC_DRAIN_TIMEOUT):
+        if self._listening:
+            self._draining = True
+            self._listening = False
+            for consumer in [
+                self._listen_consumer,
+                *self._lane_consumers.values(),
+            ]:
+                self._rpc_listen_channel.cancel_consumer(consumer)
+            self._drain_calls(drain_timeout)
 
-    def stop(self):
         self.conn.stop()
+        self._shutdown_executors()
+
+    def set_max_concurrent_calls(self, max_concurrent_calls: int):
+        self._max_concurrent_calls = max_concurrent_calls
+        self._call_pool = None
+        if max_concurrent_calls is not None:
+            self._call_pool = Pool(max_concurrent_calls)
+
+        self._update_lane_scheduler()
 
     def _create_conn(self, params: AmqpParameters):
         return GeventAmqpConnection(params)
 
     def recv_call(self, call: RpcCall) -> RpcResp:
         self.log_call_recv(call)
+        if self.instrumentation is None:
+            return self._run_call(call)
+
+        self.instrumentation.call_received(call)
+        start = perf_counter()
+        resp = None
+        try:
+            resp = self._run_call(call)
+            return resp
+        finally:
+            self.instrumentation.call_handled(
+                call,
+                resp,
+                perf_counter() - start,
+            )
+
+    def _run_call(self, call: RpcCall) -> RpcResp:
         method, error = self._get_method(call.service, call.method)
         if error:
             return error
 
-        resp = None
-        try:
-            resp = method(*call.args)
-        except TypeError:
+        args, kwargs, error = self._validate_call(call)
+        if error:
+            return error
+
+        executor = self._get_call_executor(call)
+        if executor is not None and executor.full:
+            executor.rejected += 1
             return RpcResp(
-                status=CALL_ARGS_MISMATCH,
-                body='Invalid call arguments',
+                status=SERVER_BUSY,
+                body='Too many queued calls',
             )
-        except Exception as e:
-            if not self._recv_error_handlers:
-                traceback.print_exc()
-            else:
-                for handler in self._recv_error_handlers:
-                    handler(e)
 
+        resp = None
+        try:
+            if executor is not None:
+                resp = self._run_in_executor(
+                    executor,
+                    self._create_executor_call(call, method, args, kwargs),
+                )
+            else:
+                resp = method(*args, **kwargs)
+        except Exception as e:
+            self._on_recv_call_error(e)
             return RpcResp(
                 status=CALL_ERROR,
             )
@@ -73,36 +182,709 @@ class GeventAmqpRpc(BaseAmqpRpc):
             body=resp,
         )
 
-    def _send_call_msg(
+    def _run_in_executor(self, executor: CallExecutor, func):
+        executor.pending += 1
+        try:
+            future = executor.pool.submit(func)
+            result = AsyncResult()
+            future.add_done_callback(partial(_set_future_result, result))
+            return result.get()
+        finally:
+            executor.pending -= 1
+
+    def _create_executor_pool(self, executor: str, max_workers: int):
+        if executor == EXECUTOR_THREAD:
+            return ThreadPoolExecutor(max_workers)
+
+        return self._create_process_pool(max_workers)
+
+    def _send_guarded_call_msg(
             self,
+            guard: RouteGuard,
             reply_id: str,
             timeout: int,
             msg: AmqpMsg,
             route: str,
     ) -> RpcResp:
-        self._rpc_call_channel.publish(msg)
+        error = guard.acquire()
+        if error is not None:
+            return error
+
+        start = monotonic()
+        try:
+            resp = self._wait_call_msg(reply_id, timeout, msg, route)
+        except GreenletExit:
+            guard.cancel()
+            raise
+        except BaseException:
+            guard.release(monotonic() - start, None)
+            raise
+
+        guard.release(monotonic() - start, resp)
+        return resp
+
+    def _wait_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+    ) -> RpcResp:
+        if self.pending_calls.full:
+            return RpcResp(
+                status=TOO_MANY_CALLS,
+                body='Too many pending calls',
+            )
+
+        future = AsyncResult()
+        self.pending_calls.add(reply_id, future, route)
+        try:
+            self._publish(msg)
+            return future.get(timeout=timeout)
+        finally:
+            self.pending_calls.discard(reply_id)
+
+    def _send_retried_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        deadline = monotonic() + timeout
+        attempt = 0
+        while True:
+            resp = self._send_hedged_call(
+                call,
+                deadline - monotonic(),
+                policy,
+            )
+            if not policy.should_retry(resp, attempt):
+                return resp
+
+            backoff = policy.get_backoff(attempt)
+            if monotonic() + backoff >= deadline:
+                return resp
+
+            attempt += 1
+            self.retried_calls += 1
+            sleep(backoff)
+            if monotonic() >= deadline:
+                return resp
+
+    def _send_hedged_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        hedge_delay = self._get_hedge_delay(call, policy)
+        if hedge_delay is None or hedge_delay >= timeout:
+            return self._send_sampled_call(call, timeout, policy)
+
+        deadline = monotonic() + timeout
+        # greenlets start with an empty context, so each attempt runs in a
+        # copy of the caller's to keep its lane and deadline
+        attempts = [spawn(
+            copy_context().run,
+            self._send_sampled_call,
+            call,
+            timeout,
+            policy,
+        )]
+        try:
+            done = wait(attempts, timeout=hedge_delay)
+            if not done and monotonic() < deadline and \
+                    self.get_hedge_budget(call.route).take():
+                attempts.append(spawn(
+                    copy_context().run,
+                    self._send_sampled_call,
+                    call,
+                    deadline - monotonic(),
+                    policy,
+                ))
+
+            for attempt in iwait(attempts):
+                resp = attempt.get()
+                if resp.status not in policy.statuses:
+                    return resp
+
+            return resp
+        finally:
+            for attempt in attempts:
+                attempt.kill(block=False)
+
+    def _send_sampled_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            policy: RetryPolicy,
+    ) -> RpcResp:
+        if policy.latencies is None:
+            return self._send_call_attempt(call, timeout)
+
+        start = monotonic()
+        resp = self._send_call_attempt(call, timeout)
+        policy.latencies.add(monotonic() - start)
+        return resp
+
+    def _send_instrumented_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+    ) -> RpcResp:
+        self.instrumentation.call_sent(call)
+        start = perf_counter()
+        resp = None
+        try:
+            resp = self._send_call_with_options(call, timeout)
+            return resp
+        finally:
+            self.instrumentation.call_done(
+                call,
+                resp,
+                perf_counter() - start,
+            )
+
+    def _send_local_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        resp = self._run_local_call(call, timeout)
+        if isgenerator(resp.body):
+            resp.body.close()
+            return self._create_stream_required_resp()
+
+        if self._loopback_copy:
+            resp = resp.replace(body=deepcopy(resp.body))
+
+        return resp
+
+    def _run_local_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        resp = self._admit_local_call(call)
+        if resp is not None:
+            return resp
+
+        call = self._copy_local_call(call)
+        recv_call = self.recv_call
+        if timeout is not None:
+            recv_call = partial(run_with_deadline, time() + timeout, recv_call)
+
+        self._calls_running += 1
+        try:
+            with Timeout(timeout):
+                return self._run_in_call_slot(
+                    self._get_call_lane(call),
+                    recv_call,
+                    call,
+                )
+        finally:
+            self._calls_running -= 1
+
+    def _stream_local_call(self, call: RpcCall, timeout: int):
+        resp = self._run_local_call(call, timeout)
+        chunks = resp.body
+        if not isgenerator(chunks):
+            yield resp
+            return
+
+        try:
+            for chunk in chunks:
+                if self._loopback_copy:
+                    chunk = deepcopy(chunk)
+
+                yield RpcResp(status=OK, body=chunk)
+        except Exception as e:
+            self._on_recv_call_error(e)
+            yield RpcResp(status=CALL_ERROR)
+
+    def _send_cached_call(
+            self,
+            call: RpcCall,
+            timeout: int,
+            ttl: float,
+    ) -> RpcResp:
+        key = cache_key(call)
+        if key is None:
+            return self._dispatch_call(call, timeout)
+
+        resp = self.response_cache.get(key)
+        if resp is not None:
+            return resp
+
+        try:
+            future = self._cache_inflight[key]
+        except KeyError:
+            pass
+        else:
+            self.response_cache.coalesced += 1
+            start = monotonic()
+            resp = future.get(timeout=timeout)
+            if resp is not None:
+                return copy_resp(resp)
+
+            # the leader failed or was killed, so this call is sent again
+            # instead of inheriting that outcome
+            timeout -= monotonic() - start
+            return self._send_cached_call(call, timeout, ttl)
+
+        future = AsyncResult()
+        self._cache_inflight[key] = future
+        resp = None
+        try:
+            resp = self._dispatch_call(call, timeout)
+        finally:
+            del self._cache_inflight[key]
+            future.set(resp)
+
+        if resp.ok:
+            self.response_cache.set(key, resp, ttl)
+
+        return resp
+
+    def _stream_call_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            max_buffered: int,
+    ):
+        if self.pending_calls.full:
+            yield RpcResp(
+                status=TOO_MANY_CALLS,
+                body='Too many pending calls',
+            )
+            return
+
+        stream = RespStream(Queue(max_buffered), max_buffered)
+        self.pending_calls.add(reply_id, stream, route)
+        try:
+            self._publish(msg)
+            while True:
+                resp = stream.pop()
+                if resp is None:
+                    seq, resp = stream.queue.get(timeout=timeout)
+                    stream.add(seq, resp)
+                    continue
+
+                if resp.status == STREAM_CHUNK:
+                    yield resp.replace(status=OK)
+                    consumed = stream.consume()
+                    if consumed:
+                        credit_msg = self._create_credit_msg(
+                            stream,
+                            reply_id,
+                            consumed,
+                        )
+                        self._publish(credit_msg)
+                    continue
+
+                self.pending_calls.remove(reply_id)
+                if not resp.ok:
+                    yield resp
+
+                return
+        finally:
+            self.pending_calls.discard(reply_id)
+
+    def _fail_expired_call(self):
+        raise Timeout()
+
+    def _coalesce_call(self, call: RpcCall, timeout: int) -> RpcResp:
+        max_calls, max_delay = self._route_coalescing[call.route]
+        key = (call.route, self._get_call_lane(call))
         future = AsyncResult()
-        self._response_futures[reply_id] = (future, route)
+        try:
+            buffer = self._coalesce_buffers[key]
+        except KeyError:
+            buffer = self._coalesce_buffers[key] = []
+            spawn_later(max_delay, self._flush_coalesced, key, buffer)
+
+        buffer.append((call, timeout, future))
+        if len(buffer) >= max_calls:
+            self._flush_coalesced(key, buffer)
+
         return future.get(timeout=timeout)
 
-    def _on_call_message(self, msg: AmqpMsg) -> bool:
-        call = self._decode_call(msg)
-        resp = self.recv_call(call)
-        resp_msg = self._encode_resp(resp)
+    def _flush_coalesced(self, key: tuple, buffer: list):
+        if self._coalesce_buffers.get(key) is not buffer:
+            return
+
+        del self._coalesce_buffers[key]
+        spawn(self._send_coalesced, buffer, key[1])
+
+    def _send_coalesced(self, buffer: list, lane: str):
+        calls = [call for call, _, _ in buffer]
+        timeout = max(timeout for _, timeout, _ in buffer)
+        try:
+            with call_lane(lane):
+                if len(calls) == 1:
+                    resps = [self._send_call(calls[0], timeout)]
+                else:
+                    resps = self.send_calls(calls, timeout)
+        except BaseException as e:
+            for _, _, future in buffer:
+                future.set_exception(e)
+            return
+
+        for (_, _, future), resp in zip(buffer, resps):
+            future.set(resp)
+
+    def _send_calls_msg(
+            self,
+            reply_id: str,
+            timeout: int,
+            msg: AmqpMsg,
+            route: str,
+            count: int,
+    ) -> List[RpcResp]:
+        resp = self._send_call_msg(reply_id, timeout, msg, route)
+        return self._unpack_batch_resp(resp, count)
+
+    def _recv_calls(
+            self,
+            call: RpcCall,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+            in_slot: bool=False,
+    ) -> RpcResp:
+        calls = self._unpack_batch_call(call)
+        if calls is None:
+            return RpcResp(
+                status=CALL_ARGS_MISMATCH,
+                body='Invalid batch call',
+            )
+
+        recv_call = self.recv_call
+        deadline = get_call_deadline()
+        if deadline is not None:
+            recv_call = partial(run_with_deadline, deadline, recv_call)
+
+        if in_slot and self._has_call_limit():
+            # the batch already holds a call slot, so its sub-calls run one
+            # at a time instead of fanning out past the limit
+            resps = [
+                self._recv_batch_item(recv_call, msg, lane, True, call)
+                for call in calls
+            ]
+        else:
+            recv_item = partial(
+                self._recv_batch_item,
+                recv_call,
+                msg,
+                lane,
+                False,
+            )
+            resps = Group().map(recv_item, calls)
+
+        return self._pack_batch_resp(resps)
+
+    def _recv_batch_item(
+            self,
+            recv_call,
+            msg: AmqpMsg,
+            lane: str,
+            in_slot: bool,
+            call: RpcCall,
+    ) -> RpcResp:
+        resp = self._admit_batch_item(msg, call)
+        if resp is not None:
+            return resp
 
-        resp_msg = resp_msg.replace(
-            topic=msg.reply_to,
-            correlation_id=msg.correlation_id,
+        self._calls_running += 1
+        try:
+            if in_slot:
+                resp = recv_call(call)
+            else:
+                resp = self._run_in_call_slot(lane, recv_call, call)
+        finally:
+            self._calls_running -= 1
+
+        if isgenerator(resp.body):
+            resp.body.close()
+            return self._create_stream_required_resp()
+
+        return resp
+
+    def _publish(self, msg: AmqpMsg):
+        if self.instrumentation is None:
+            return self._publish_msg(msg)
+
+        start = perf_counter()
+        try:
+            return self._publish_msg(msg)
+        finally:
+            self.instrumentation.msg_published(msg, perf_counter() - start)
+
+    def _publish_msg(self, msg: AmqpMsg):
+        channel = self._next_call_channel()
+        if not self._confirm_windows:
+            return channel.publish(msg)
+
+        # a closed window was replaced when its channel reopened, so the
+        # wait continues on the channel's current window
+        window = self._confirm_windows.get(channel.number)
+        while window is not None:
+            waiter = window.take()
+            if waiter is None:
+                break
+
+            waiter.get()
+            window = self._confirm_windows.get(channel.number)
+
+        try:
+            return channel.publish(msg)
+        except BaseException:
+            if window is not None:
+                window.cancel()
+            raise
+
+    def _set_prefetch(self, count: int):
+        channel = self.conn._get_channel(self._rpc_listen_channel.number)
+        future = AsyncResult()
+        channel.basic_qos(
+            callback=lambda _: future.set(True),
+            prefetch_count=count,
         )
-        self.conn.publish(self._rpc_call_channel, resp_msg)
+        future.get()
+
+    def _watch_channels(self):
+        # the connection reopens its channels after a reconnect without the
+        # qos set by start() or publisher confirms, so both are set up
+        # whenever a channel opens. Connections without _on_channel_open
+        # never reopen them
+        on_channel_open = getattr(self.conn, '_on_channel_open', None)
+        if on_channel_open is None:
+            return
+
+        def _on_channel_open(channel, number):
+            if self._needs_prefetch(number):
+                channel.basic_qos(prefetch_count=self._get_prefetch_count())
+
+            if self._needs_confirms(number):
+                self._confirm_channel(channel, number)
+
+            on_channel_open(channel, number)
+
+        self.conn._on_channel_open = _on_channel_open
+
+    def _confirm_channel(self, channel, number: int):
+        window = ConfirmWindow(
+            self._max_unconfirmed_publishes,
+            self._create_waiter,
+            self._wake_waiter,
+        )
+        old_window = self._confirm_windows.get(number)
+        if old_window is not None:
+            old_window.close()
+
+        self._confirm_windows[number] = window
+        channel.confirm_delivery(partial(self._on_publish_confirm, window))
+
+    def _on_publish_confirm(self, window: ConfirmWindow, frame):
+        method = frame.method
+        ok = not isinstance(method, Basic.Nack)
+        if not ok:
+            self.log.warning('broker nacked publish [%s]', method.delivery_tag)
+
+        window.confirm(method.delivery_tag, method.multiple, ok)
+
+    def _on_call_message(
+            self,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+    ) -> bool:
+        if self._draining:
+            return False
+
+        if self.admission is not None:
+            reason = self.admission.admit(msg, self._calls_running)
+            if reason is not None:
+                resp = self._create_shed_resp(msg, reason)
+                self._publish(self._create_resp_msg(msg, resp))
+                return True
+
+        self._calls_running += 1
+        try:
+            # batches take a slot per sub-call instead of one for the message
+            if self._is_batch_msg(msg):
+                return self._handle_call_message(msg, lane)
+
+            return self._run_in_call_slot(
+                lane,
+                self._handle_call_message,
+                msg,
+                lane,
+            )
+        finally:
+            self._calls_running -= 1
+
+    def _has_call_limit(self) -> bool:
+        return (
+            self._lane_scheduler is not None or
+            self._call_pool is not None
+        )
+
+    def _run_in_call_slot(self, lane: str, func, *args):
+        scheduler = self._lane_scheduler
+        if scheduler is not None:
+            waiter = scheduler.acquire(lane)
+            if waiter is not None:
+                try:
+                    waiter.get()
+                except BaseException:
+                    scheduler.cancel(lane, waiter)
+                    raise
+
+            try:
+                return func(*args)
+            finally:
+                scheduler.release()
+
+        if self._call_pool is None:
+            return func(*args)
+
+        # Pool.spawn blocks while the pool is full, holding the delivery
+        # unacked so the broker stops sending past the prefetch window
+        return self._call_pool.spawn(func, *args).get()
+
+    def _create_waiter(self) -> AsyncResult:
+        return AsyncResult()
+
+    def _wake_waiter(self, waiter: AsyncResult):
+        waiter.set(True)
+
+    def _drain_calls(self, timeout: int):
+        with Timeout(timeout, False):
+            while self._calls_running:
+                sleep(RPC_DRAIN_INTERVAL)
+
+    def _handle_call_message(
+            self,
+            msg: AmqpMsg,
+            lane: str=RPC_DEFAULT_LANE,
+    ) -> bool:
+        deadline = self._get_call_deadline(msg)
+        if deadline is None:
+            return self._handle_call(msg, lane)
+
+        if self._call_expired(msg, deadline):
+            return True
+
+        token = set_call_deadline(deadline)
+        try:
+            return self._handle_call(msg, lane)
+        finally:
+            reset_call_deadline(token)
+
+    def _handle_call(self, msg: AmqpMsg, lane: str=RPC_DEFAULT_LANE) -> bool:
+        try:
+            call = self._decode_call(msg)
+        except PayloadTooLarge as e:
+            resp = self._create_too_large_resp(msg, e)
+            self._publish(self._create_resp_msg(msg, resp))
+            return True
+
+        if self.instrumentation is not None:
+            self._observe_queue_wait(call, msg)
+
+        if call.service == RPC_BATCH_SERVICE:
+            in_slot = not self._is_batch_msg(msg)
+            resp = self._recv_calls(call, msg, lane, in_slot)
+        else:
+            resp = self.recv_call(call)
+
+        if isgenerator(resp.body):
+            if self._is_stream_call(msg):
+                self._send_stream(msg, resp.body)
+                return True
+
+            resp.body.close()
+            resp = self._create_stream_required_resp()
+
+        self._publish(self._create_resp_msg(msg, resp))
         return True
 
-    def _on_resp_message(self, msg: AmqpMsg):
+    def _send_stream(self, msg: AmqpMsg, chunks):
+        credit = self._open_stream_credit(msg)
+        seq = 0
         try:
-            (future, route) = self._response_futures.pop(msg.correlation_id)
-        except KeyError:
+            for chunk in chunks:
+                self._send_stream_chunk(msg, chunk, seq, credit)
+                seq += 1
+
+            resp = RpcResp(status=OK)
+        except StreamStalled:
+            self.log.warning('stream [%s] stalled', msg.correlation_id)
+            resp = RpcResp(status=CALL_ERROR, body='Stream stalled')
+        except Exception as e:
+            self._on_recv_call_error(e)
+            resp = RpcResp(status=CALL_ERROR)
+        finally:
+            self._stream_credits.pop(msg.correlation_id, None)
+
+        self._publish(self._create_resp_msg(msg, resp, seq))
+
+    def _send_stream_chunk(
+            self,
+            msg: AmqpMsg,
+            chunk,
+            seq: int,
+            credit: StreamCredit,
+    ):
+        while credit is not None:
+            waiter = credit.take()
+            if waiter is None:
+                break
+
+            if not waiter.wait(RPC_STREAM_CREDIT_TIMEOUT):
+                raise StreamStalled()
+
+        chunk_resp = RpcResp(status=STREAM_CHUNK, body=chunk)
+        self._publish(self._create_resp_msg(msg, chunk_resp, seq))
+
+    def _on_resp_message(self, msg: AmqpMsg):
+        if self._on_stream_credit(msg):
+            return True
+
+        seq = self._get_stream_seq(msg)
+        if seq is not None:
+            return self._on_stream_message(msg, seq)
+
+        pending = self.pending_calls.pop(msg.correlation_id)
+        if pending is None:
             return True
 
+        (future, route) = pending
         resp = self._decode_resp(msg, route)
+        if isinstance(future, RespStream):
+            for item in RespStream.from_resp(resp):
+                future.queue.put(item)
+            return True
+
         future.set(resp)
         return True
+
+    def _on_stream_message(self, msg: AmqpMsg, seq: int):
+        pending = self.pending_calls.get(msg.correlation_id)
+        if pending is None:
+            return True
+
+        (stream, route) = pending
+        if not isinstance(stream, RespStream):
+            self.pending_calls.remove(msg.correlation_id)
+            if not stream.ready():
+                stream.set(self._create_unexpected_stream_resp())
+            return True
+
+        if stream.credit_to is None:
+            stream.credit_to = msg.headers.get(RPC_STREAM_CREDIT_TO_HEADER)
+
+        resp = self._decode_resp(msg, route)
+        stream.queue.put((seq, resp))
+        return True
+
+
+def _set_future_result(result: AsyncResult, future: Future):
+    exc = future.exception()
+    if exc is not None:
+        result.set_exception(exc)
+    else:
+        result.set(future.result())
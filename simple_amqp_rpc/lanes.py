@@ -0,0 +1,94 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict
+
+_call_lane = ContextVar('rpc_call_lane', default=None)
+
+
+def get_call_lane() -> str:
+    return _call_lane.get()
+
+
+@contextmanager
+def call_lane(lane: str):
+    token = _call_lane.set(lane)
+    try:
+        yield
+    finally:
+        _call_lane.reset(token)
+
+
+class LaneScheduler:
+    def __init__(
+            self,
+            slots: int,
+            weights: Dict[str, int],
+            create_waiter: Callable,
+            wake: Callable,
+    ):
+        self.slots = slots
+        self.weights = dict(weights)
+        self.running = 0
+        self.waiting = 0
+
+        self._create_waiter = create_waiter
+        self._wake = wake
+        self._current = {lane: 0 for lane in weights}
+        self._waiters = {lane: deque() for lane in weights}
+
+    def acquire(self, lane: str):
+        if self.running < self.slots and not self.waiting:
+            self.running += 1
+            return None
+
+        waiter = self._create_waiter()
+        self._waiters[lane].append(waiter)
+        self.waiting += 1
+        return waiter
+
+    def release(self):
+        lane = self._next_lane()
+        if lane is None:
+            self.running -= 1
+            return
+
+        self.waiting -= 1
+        self._wake(self._waiters[lane].popleft())
+
+    def cancel(self, lane: str, waiter):
+        try:
+            self._waiters[lane].remove(waiter)
+        except ValueError:
+            self.release()
+            return
+
+        self.waiting -= 1
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'waiting': {
+                lane: len(waiters)
+                for lane, waiters in self._waiters.items()
+            },
+        }
+
+    def _next_lane(self) -> str:
+        if not self.waiting:
+            return None
+
+        best = None
+        total = 0
+        for lane, waiters in self._waiters.items():
+            if not waiters:
+                continue
+
+            weight = self.weights[lane]
+            self._current[lane] += weight
+            total += weight
+            if best is None or self._current[lane] > self._current[best]:
+                best = lane
+
+        self._current[best] -= total
+        return best
@@ -0,0 +1,188 @@
+from time import monotonic
+
+from .consts import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    RETRYABLE_STATUSES,
+    ROUTE_UNAVAILABLE,
+    RPC_BREAKER_FAILURES,
+    RPC_BREAKER_HALF_OPEN_CALLS,
+    RPC_BREAKER_RESET_TIMEOUT,
+    RPC_LIMITER_BACKOFF_RATIO,
+    RPC_LIMITER_INITIAL_LIMIT,
+    RPC_LIMITER_MAX_LIMIT,
+    RPC_LIMITER_MIN_LIMIT,
+    TOO_MANY_CALLS
+)
+from .data import RpcResp
+
+
+class AimdLimiter:
+    def __init__(
+            self,
+            limit: int=RPC_LIMITER_INITIAL_LIMIT,
+            min_limit: int=RPC_LIMITER_MIN_LIMIT,
+            max_limit: int=RPC_LIMITER_MAX_LIMIT,
+            backoff_ratio: float=RPC_LIMITER_BACKOFF_RATIO,
+            latency_threshold: float=None,
+    ):
+        self.limit = limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_threshold = latency_threshold
+        self.inflight = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        if self.inflight >= int(self.limit):
+            self.rejected += 1
+            return False
+
+        self.inflight += 1
+        return True
+
+    def release(self, seconds: float, dropped: bool):
+        self.inflight -= 1
+        if dropped or (
+                self.latency_threshold is not None and
+                seconds > self.latency_threshold
+        ):
+            self.limit = max(self.limit * self.backoff_ratio, self.min_limit)
+        elif self.inflight * 2 >= self.limit:
+            self.limit = min(self.limit + 1, self.max_limit)
+
+    def cancel(self):
+        self.inflight -= 1
+
+    def stats(self) -> dict:
+        return {
+            'limit': int(self.limit),
+            'inflight': self.inflight,
+            'rejected': self.rejected,
+        }
+
+
+class CircuitBreaker:
+    def __init__(
+            self,
+            failures: int=RPC_BREAKER_FAILURES,
+            reset_timeout: float=RPC_BREAKER_RESET_TIMEOUT,
+            half_open_calls: int=RPC_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.max_failures = failures
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.rejected = 0
+
+        self._opened_at = None
+        self._probes = 0
+
+    def allow(self) -> bool:
+        if self.state == CIRCUIT_CLOSED:
+            return True
+
+        if self.state == CIRCUIT_OPEN:
+            if monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+
+            self.state = CIRCUIT_HALF_OPEN
+            self._probes = 0
+
+        if self._probes >= self.half_open_calls:
+            self.rejected += 1
+            return False
+
+        self._probes += 1
+        return True
+
+    def record(self, failed: bool):
+        if self.state == CIRCUIT_OPEN:
+            return
+
+        if not failed:
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            return
+
+        self.failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or \
+                self.failures >= self.max_failures:
+            self.state = CIRCUIT_OPEN
+            self._opened_at = monotonic()
+
+    def cancel(self):
+        if self.state == CIRCUIT_HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def stats(self) -> dict:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+        }
+
+
+class RouteGuard:
+    def __init__(
+            self,
+            route: str,
+            limiter: AimdLimiter=None,
+            breaker: CircuitBreaker=None,
+    ):
+        self.route = route
+        self.limiter = limiter
+        self.breaker = breaker
+
+    def acquire(self) -> RpcResp:
+        if self.limiter is not None and not self.limiter.acquire():
+            return RpcResp(
+                status=TOO_MANY_CALLS,
+                body='Concurrency limit reached for [{}]'.format(self.route),
+            )
+
+        if self.breaker is not None and not self.breaker.allow():
+            if self.limiter is not None:
+                self.limiter.cancel()
+
+            return RpcResp(
+                status=ROUTE_UNAVAILABLE,
+                body='Circuit open for [{}]'.format(self.route),
+            )
+
+        return None
+
+    def release(self, seconds: float, resp: RpcResp):
+        # a 429 may come from this client's own pending calls limit, so it
+        # tells nothing about the route's health either way
+        if resp is not None and resp.status == TOO_MANY_CALLS:
+            self.cancel()
+            return
+
+        if self.limiter is not None:
+            dropped = resp is None or resp.status in RETRYABLE_STATUSES
+            self.limiter.release(seconds, dropped)
+
+        if self.breaker is not None:
+            self.breaker.record(resp is None or resp.status >= 500)
+
+    def cancel(self):
+        if self.limiter is not None:
+            self.limiter.cancel()
+
+        if self.breaker is not None:
+            self.breaker.cancel()
+
+    def stats(self) -> dict:
+        stats = {}
+        if self.limiter is not None:
+            stats['limiter'] = self.limiter.stats()
+
+        if self.breaker is not None:
+            stats['breaker'] = self.breaker.stats()
+
+        return stats
@@ -0,0 +1,7 @@
+from .broker import MemoryBroker
+from .conn import BaseMemoryConnection
+
+__all__ = [
+    'MemoryBroker',
+    'BaseMemoryConnection',
+]
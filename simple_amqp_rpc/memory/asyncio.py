@@ -0,0 +1,54 @@
+from asyncio import ensure_future, sleep
+
+from simple_amqp import AmqpMsg
+
+from .broker import MemoryConsumer
+from .conn import BaseMemoryConnection
+
+
+class AsyncioMemoryChannel:
+    def __init__(self, conn: 'AsyncioMemoryConnection', number: int):
+        self.conn = conn
+        self.number = number
+
+    async def set_qos(self, prefetch_count: int=0):
+        self.conn._set_prefetch(self.number, prefetch_count)
+
+
+class AsyncioMemoryConnection(BaseMemoryConnection):
+    async def start(self, auto_reconnect: bool=True):
+        self._run_stages()
+
+    async def run_stage(self, stage):
+        if stage not in self.stages:
+            self.add_stage(stage)
+
+        self._run_actions(stage)
+
+    async def stop(self):
+        self._stop_consuming()
+
+    async def _cancel_consumer(self, channel_number: int, consumer_tag: str):
+        self._consumer_tags.discard(consumer_tag)
+        self.broker.remove_consumer(consumer_tag)
+
+    async def publish(self, channel, msg: AmqpMsg):
+        self.broker.publish(msg)
+
+    def _get_channel(self, number: int) -> AsyncioMemoryChannel:
+        return AsyncioMemoryChannel(self, number)
+
+    def _deliver(self, consumer: MemoryConsumer, msg: AmqpMsg):
+        ensure_future(self._handle_msg(consumer, msg))
+
+    async def _handle_msg(self, consumer: MemoryConsumer, msg: AmqpMsg):
+        if self.broker.latency:
+            await sleep(self.broker.latency)
+
+        try:
+            result = await consumer.callback(msg)
+        except Exception as e:
+            result = False
+            self._on_consumer_error(e)
+
+        self.broker.ack(consumer, msg, bool(result))
@@ -0,0 +1,178 @@
+import re
+from collections import deque
+from time import monotonic
+
+from simple_amqp import AmqpMsg
+
+
+def topic_pattern(routing_key: str):
+    parts = []
+    for word in routing_key.split('.'):
+        if word == '*':
+            parts.append(r'[^.]+')
+        elif word == '#':
+            parts.append(r'.*')
+        else:
+            parts.append(re.escape(word))
+
+    return re.compile(r'\.'.join(parts).replace(r'\..*', r'(\..*)?') + '$')
+
+
+class MemoryConsumer:
+    def __init__(
+            self,
+            queue: 'MemoryQueue',
+            tag: str,
+            callback,
+            deliver,
+            auto_ack: bool=False,
+            nack_requeue: bool=True,
+            prefetch: int=0,
+    ):
+        self.queue = queue
+        self.tag = tag
+        self.callback = callback
+        self.deliver = deliver
+        self.auto_ack = auto_ack
+        self.nack_requeue = nack_requeue
+        self.prefetch = prefetch
+        self.unacked = 0
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self.auto_ack or
+            not self.prefetch or
+            self.unacked < self.prefetch
+        )
+
+
+class MemoryQueue:
+    def __init__(self, name: str, auto_delete: bool=False):
+        self.name = name
+        self.auto_delete = auto_delete
+        self.messages = deque()
+        self.consumers = []
+        self._next_consumer = 0
+
+    def next_consumer(self) -> MemoryConsumer:
+        count = len(self.consumers)
+        for offset in range(count):
+            index = (self._next_consumer + offset) % count
+            consumer = self.consumers[index]
+            if consumer.ready:
+                self._next_consumer = index + 1
+                return consumer
+
+        return None
+
+
+class MemoryBroker:
+    def __init__(self, latency: float=0):
+        self.latency = latency
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+        self._exchanges = {}
+        self._bindings = {}
+        self._queues = {}
+
+    def declare_exchange(self, name: str, type: str):
+        if name not in self._exchanges:
+            self._exchanges[name] = type
+            self._bindings[name] = []
+
+    def declare_queue(self, name: str, auto_delete: bool=False):
+        if name not in self._queues:
+            self._queues[name] = MemoryQueue(name, auto_delete)
+
+        return self._queues[name]
+
+    def delete_queue(self, name: str):
+        self._queues.pop(name, None)
+        for bindings in self._bindings.values():
+            bindings[:] = [
+                binding for binding in bindings
+                if binding[2] != name
+            ]
+
+    def bind_queue(self, queue: str, exchange: str, routing_key: str):
+        pattern = topic_pattern(routing_key)
+        self._bindings[exchange].append((routing_key, pattern, queue))
+
+    def add_consumer(self, consumer: MemoryConsumer):
+        consumer.queue.consumers.append(consumer)
+        self._dispatch(consumer.queue)
+
+    def remove_consumer(self, tag: str):
+        for queue in list(self._queues.values()):
+            consumers = [
+                consumer for consumer in queue.consumers
+                if consumer.tag != tag
+            ]
+            if len(consumers) == len(queue.consumers):
+                continue
+
+            queue.consumers = consumers
+            if not consumers and queue.auto_delete:
+                self.delete_queue(queue.name)
+
+    def publish(self, msg: AmqpMsg):
+        self.published += 1
+        expires_at = None
+        if msg.expiration is not None and msg.expiration >= 0:
+            expires_at = monotonic() + msg.expiration / 1000
+
+        for queue_name in self._route(msg):
+            queue = self._queues[queue_name]
+            queue.messages.append((expires_at, msg))
+            self._dispatch(queue)
+
+    def ack(self, consumer: MemoryConsumer, msg: AmqpMsg, ok: bool):
+        if consumer.auto_ack:
+            return
+
+        consumer.unacked -= 1
+        if not ok and consumer.nack_requeue:
+            consumer.queue.messages.appendleft((None, msg))
+
+        self._dispatch(consumer.queue)
+
+    def _route(self, msg: AmqpMsg):
+        if not msg.exchange:
+            if msg.topic in self._queues:
+                return [msg.topic]
+            return []
+
+        exchange_type = self._exchanges[msg.exchange]
+        queues = []
+        for routing_key, pattern, queue in self._bindings[msg.exchange]:
+            if exchange_type == 'fanout':
+                matched = True
+            elif exchange_type == 'topic':
+                matched = pattern.match(msg.topic) is not None
+            else:
+                matched = routing_key == msg.topic
+
+            if matched and queue not in queues:
+                queues.append(queue)
+
+        return queues
+
+    def _dispatch(self, queue: MemoryQueue):
+        while queue.messages:
+            consumer = queue.next_consumer()
+            if consumer is None:
+                return
+
+            expires_at, msg = queue.messages.popleft()
+            if expires_at is not None and expires_at < monotonic():
+                self.dropped += 1
+                continue
+
+            if not consumer.auto_ack:
+                consumer.unacked += 1
+
+            self.delivered += 1
+            consumer.deliver(consumer, msg)
@@ -0,0 +1,78 @@
+import traceback
+
+from simple_amqp import AmqpConnection, AmqpMsg, AmqpParameters
+from simple_amqp.actions import (
+    BindConsumer,
+    BindQueue,
+    DeclareExchange,
+    DeclareQueue
+)
+
+from .broker import MemoryBroker, MemoryConsumer
+
+
+class BaseMemoryConnection(AmqpConnection):
+    def __init__(
+            self,
+            broker: MemoryBroker = None,
+            params: AmqpParameters = None,
+    ):
+        super().__init__(params if params is not None else AmqpParameters())
+        self.broker = broker if broker is not None else MemoryBroker()
+        self._prefetch = {}
+        self._consumer_tags = set()
+
+    def cancel_consumer(self, channel, consumer):
+        self._consumer_tags.discard(consumer.tag)
+        self.broker.remove_consumer(consumer.tag)
+
+    def _run_stages(self):
+        for stage in self.stages:
+            self._run_actions(stage)
+
+    def _run_actions(self, stage):
+        for action in stage.actions:
+            if action.TYPE == DeclareExchange.TYPE:
+                self.broker.declare_exchange(action.name, action.type)
+            elif action.TYPE == DeclareQueue.TYPE:
+                self.broker.declare_queue(action.name, action.auto_delete)
+            elif action.TYPE == BindQueue.TYPE:
+                self.broker.bind_queue(
+                    action.queue,
+                    action.exchange,
+                    action.routing_key,
+                )
+            elif action.TYPE == BindConsumer.TYPE:
+                self._bind_consumer(action)
+
+    def _bind_consumer(self, action: BindConsumer):
+        consumer = MemoryConsumer(
+            self.broker.declare_queue(action.queue),
+            action.tag,
+            action.callback,
+            self._deliver,
+            auto_ack=action.auto_ack,
+            nack_requeue=action.nack_requeue,
+            prefetch=self._prefetch.get(action.channel, 0),
+        )
+        self._consumer_tags.add(action.tag)
+        self.broker.add_consumer(consumer)
+
+    def _stop_consuming(self):
+        for tag in list(self._consumer_tags):
+            self._consumer_tags.discard(tag)
+            self.broker.remove_consumer(tag)
+
+    def _set_prefetch(self, channel: int, count: int):
+        self._prefetch[channel] = count
+
+    def _deliver(self, consumer: MemoryConsumer, msg: AmqpMsg):
+        raise NotImplementedError
+
+    def _on_consumer_error(self, exc: Exception):
+        if not self._consumer_error_handlers:
+            traceback.print_exc()
+            return
+
+        for handler in self._consumer_error_handlers:
+            handler(exc)
@@ -0,0 +1,51 @@
+from gevent import sleep, spawn
+from simple_amqp import AmqpMsg
+
+from .broker import MemoryConsumer
+from .conn import BaseMemoryConnection
+
+
+class GeventMemoryChannel:
+    def __init__(self, conn: 'GeventMemoryConnection', number: int):
+        self.conn = conn
+        self.number = number
+
+    def basic_qos(self, callback=None, prefetch_count: int=0):
+        self.conn._set_prefetch(self.number, prefetch_count)
+        if callback is not None:
+            callback(None)
+
+
+class GeventMemoryConnection(BaseMemoryConnection):
+    def start(self, auto_reconnect: bool=True):
+        self._run_stages()
+
+    def run_stage(self, stage):
+        if stage not in self.stages:
+            self.add_stage(stage)
+
+        self._run_actions(stage)
+
+    def stop(self):
+        self._stop_consuming()
+
+    def publish(self, channel, msg: AmqpMsg):
+        self.broker.publish(msg)
+
+    def _get_channel(self, number: int) -> GeventMemoryChannel:
+        return GeventMemoryChannel(self, number)
+
+    def _deliver(self, consumer: MemoryConsumer, msg: AmqpMsg):
+        spawn(self._handle_msg, consumer, msg)
+
+    def _handle_msg(self, consumer: MemoryConsumer, msg: AmqpMsg):
+        if self.broker.latency:
+            sleep(self.broker.latency)
+
+        try:
+            result = consumer.callback(msg)
+        except Exception as e:
+            result = False
+            self._on_consumer_error(e)
+
+        self.broker.ack(consumer, msg, bool(result))
@@ -0,0 +1,308 @@
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from simple_amqp import AmqpMsg
+
+from .consts import (
+    RPC_LATENCY_BUCKETS,
+    RPC_METRICS_HOST,
+    RPC_METRICS_PORT,
+    RPC_SIZE_BUCKETS
+)
+from .data import RpcCall, RpcResp
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+CALL_LABELS = ('route', 'service', 'method')
+STATUS_LABELS = ('route', 'service', 'method', 'status')
+CODEC_LABELS = ('route', 'op')
+
+METRICS = {
+    'rpc_client_call_seconds': (
+        'histogram', CALL_LABELS, 'Round-trip time of sent calls',
+    ),
+    'rpc_client_calls_in_flight': (
+        'gauge', CALL_LABELS, 'Sent calls waiting for a response',
+    ),
+    'rpc_client_errors_total': (
+        'counter', STATUS_LABELS, 'Sent calls that did not succeed',
+    ),
+    'rpc_server_call_seconds': (
+        'histogram', CALL_LABELS, 'Handler execution time',
+    ),
+    'rpc_server_calls_in_flight': (
+        'gauge', CALL_LABELS, 'Calls being handled',
+    ),
+    'rpc_server_errors_total': (
+        'counter', STATUS_LABELS, 'Handled calls that did not succeed',
+    ),
+    'rpc_server_expired_total': (
+        'counter', ('route',), 'Calls dropped after their deadline',
+    ),
+    'rpc_server_shed_total': (
+        'counter', ('route', 'reason'), 'Calls rejected by admission control',
+    ),
+    'rpc_server_queue_wait_seconds': (
+        'histogram', CALL_LABELS, 'Time from publish to handler start',
+    ),
+    'rpc_call_bytes': (
+        'histogram', CALL_LABELS, 'Encoded call payload size',
+    ),
+    'rpc_resp_bytes': (
+        'histogram', ('route',), 'Encoded response payload size',
+    ),
+    'rpc_codec_seconds': (
+        'histogram', CODEC_LABELS, 'Time spent encoding and decoding',
+    ),
+    'rpc_publish_seconds': (
+        'histogram', ('exchange',), 'Time spent publishing messages',
+    ),
+}
+
+
+class Instrumentation:
+    def call_sent(self, call: RpcCall):
+        pass
+
+    def call_done(self, call: RpcCall, resp: RpcResp, seconds: float):
+        pass
+
+    def call_encoded(self, call: RpcCall, msg: AmqpMsg, seconds: float):
+        pass
+
+    def call_decoded(self, call: RpcCall, msg: AmqpMsg, seconds: float):
+        pass
+
+    def call_queued(self, call: RpcCall, seconds: float):
+        pass
+
+    def call_received(self, call: RpcCall):
+        pass
+
+    def call_expired(self, route: str, msg: AmqpMsg):
+        pass
+
+    def call_shed(self, route: str, msg: AmqpMsg, reason: str):
+        pass
+
+    def call_handled(self, call: RpcCall, resp: RpcResp, seconds: float):
+        pass
+
+    def resp_encoded(self, route: str, msg: AmqpMsg, seconds: float):
+        pass
+
+    def resp_decoded(self, route: str, msg: AmqpMsg, seconds: float):
+        pass
+
+    def msg_published(self, msg: AmqpMsg, seconds: float):
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets=RPC_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RpcMetrics(Instrumentation):
+    def __init__(
+            self,
+            latency_buckets=RPC_LATENCY_BUCKETS,
+            size_buckets=RPC_SIZE_BUCKETS,
+    ):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self._values = {name: {} for name in METRICS}
+
+    def call_sent(self, call: RpcCall):
+        self._inc('rpc_client_calls_in_flight', _call_labels(call))
+
+    def call_done(self, call: RpcCall, resp: RpcResp, seconds: float):
+        labels = _call_labels(call)
+        self._inc('rpc_client_calls_in_flight', labels, -1)
+        self._observe('rpc_client_call_seconds', labels, seconds)
+        if resp is None or not resp.ok:
+            self._inc('rpc_client_errors_total', labels + (_status(resp),))
+
+    def call_encoded(self, call: RpcCall, msg: AmqpMsg, seconds: float):
+        self._observe(
+            'rpc_call_bytes',
+            _call_labels(call),
+            len(msg.payload),
+            self.size_buckets,
+        )
+        self._observe(
+            'rpc_codec_seconds',
+            (call.route, 'call_encode'),
+            seconds,
+        )
+
+    def call_decoded(self, call: RpcCall, msg: AmqpMsg, seconds: float):
+        self._observe(
+            'rpc_codec_seconds',
+            (call.route, 'call_decode'),
+            seconds,
+        )
+
+    def call_queued(self, call: RpcCall, seconds: float):
+        self._observe(
+            'rpc_server_queue_wait_seconds',
+            _call_labels(call),
+            seconds,
+        )
+
+    def call_received(self, call: RpcCall):
+        self._inc('rpc_server_calls_in_flight', _call_labels(call))
+
+    def call_expired(self, route: str, msg: AmqpMsg):
+        self._inc('rpc_server_expired_total', (route,))
+
+    def call_shed(self, route: str, msg: AmqpMsg, reason: str):
+        self._inc('rpc_server_shed_total', (route, reason))
+
+    def call_handled(self, call: RpcCall, resp: RpcResp, seconds: float):
+        labels = _call_labels(call)
+        self._inc('rpc_server_calls_in_flight', labels, -1)
+        self._observe('rpc_server_call_seconds', labels, seconds)
+        if resp is None or not resp.ok:
+            self._inc('rpc_server_errors_total', labels + (_status(resp),))
+
+    def resp_encoded(self, route: str, msg: AmqpMsg, seconds: float):
+        self._observe(
+            'rpc_resp_bytes',
+            (route,),
+            len(msg.payload),
+            self.size_buckets,
+        )
+        self._observe('rpc_codec_seconds', (route, 'resp_encode'), seconds)
+
+    def resp_decoded(self, route: str, msg: AmqpMsg, seconds: float):
+        self._observe('rpc_codec_seconds', (route, 'resp_decode'), seconds)
+
+    def msg_published(self, msg: AmqpMsg, seconds: float):
+        self._observe(
+            'rpc_publish_seconds',
+            (msg.exchange or 'reply',),
+            seconds,
+        )
+
+    def get(self, name: str, **labels):
+        label_names = METRICS[name][1]
+        key = tuple(str(labels[label]) for label in label_names)
+        return self._values[name].get(key)
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, label_names, help_text) in METRICS.items():
+            values = self._values[name]
+            if not values:
+                continue
+
+            lines.append('# HELP {} {}'.format(name, help_text))
+            lines.append('# TYPE {} {}'.format(name, kind))
+            for labels, value in sorted(values.items()):
+                label_pairs = list(zip(label_names, labels))
+                if kind != 'histogram':
+                    lines.append(_sample(name, label_pairs, value))
+                    continue
+
+                cumulative = 0
+                bounds = value.buckets + ('+Inf',)
+                for bound, count in zip(bounds, value.counts):
+                    cumulative += count
+                    lines.append(_sample(
+                        name + '_bucket',
+                        label_pairs + [('le', bound)],
+                        cumulative,
+                    ))
+                lines.append(_sample(name + '_sum', label_pairs, value.sum))
+                lines.append(_sample(
+                    name + '_count',
+                    label_pairs,
+                    value.count,
+                ))
+
+        lines.append('')
+        return '\n'.join(lines)
+
+    def serve(
+            self,
+            host: str=RPC_METRICS_HOST,
+            port: int=RPC_METRICS_PORT,
+    ) -> HTTPServer:
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = HTTPServer((host, port), MetricsHandler)
+        thread = Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        return server
+
+    def _inc(self, name: str, labels: tuple, value: int=1):
+        values = self._values[name]
+        values[labels] = values.get(labels, 0) + value
+
+    def _observe(
+            self,
+            name: str,
+            labels: tuple,
+            value: float,
+            buckets=None,
+    ):
+        values = self._values[name]
+        try:
+            histogram = values[labels]
+        except KeyError:
+            histogram = values[labels] = Histogram(
+                buckets or self.latency_buckets,
+            )
+
+        histogram.observe(value)
+
+
+def _call_labels(call: RpcCall) -> tuple:
+    return (call.route, call.service, call.method)
+
+
+def _status(resp: RpcResp) -> str:
+    if resp is None:
+        return 'exception'
+
+    return str(int(resp.status))
+
+
+def _escape(value) -> str:
+    return str(value) \
+        .replace('\\', '\\\\') \
+        .replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+def _sample(name: str, label_pairs, value) -> str:
+    if not label_pairs:
+        return '{} {}'.format(name, value)
+
+    labels = ','.join(
+        '{}="{}"'.format(label, _escape(label_value))
+        for label, label_value in label_pairs
+    )
+    return '{}{{{}}} {}'.format(name, labels, value)
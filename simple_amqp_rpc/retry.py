@@ -0,0 +1,115 @@
+from random import uniform
+
+from .consts import (
+    RETRYABLE_STATUSES,
+    RPC_HEDGE_BUDGET_BURST,
+    RPC_HEDGE_BUDGET_RATIO,
+    RPC_HEDGE_MIN_SAMPLES,
+    RPC_LATENCY_WINDOW,
+    RPC_RETRY_BACKOFF,
+    RPC_RETRY_MAX_BACKOFF
+)
+
+
+class LatencyWindow:
+    def __init__(
+            self,
+            size: int=RPC_LATENCY_WINDOW,
+            min_samples: int=RPC_HEDGE_MIN_SAMPLES,
+    ):
+        self.size = size
+        self.min_samples = min_samples
+        self._samples = []
+        self._next = 0
+        self._sorted = None
+
+    def add(self, seconds: float):
+        if len(self._samples) < self.size:
+            self._samples.append(seconds)
+        else:
+            self._samples[self._next] = seconds
+            self._next = (self._next + 1) % self.size
+
+        self._sorted = None
+
+    def percentile(self, percentile: float) -> float:
+        if len(self._samples) < self.min_samples:
+            return None
+
+        if self._sorted is None:
+            self._sorted = sorted(self._samples)
+
+        index = int(len(self._sorted) * percentile / 100)
+        return self._sorted[min(index, len(self._sorted) - 1)]
+
+
+class HedgeBudget:
+    def __init__(
+            self,
+            ratio: float=RPC_HEDGE_BUDGET_RATIO,
+            burst: int=RPC_HEDGE_BUDGET_BURST,
+    ):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = burst
+        self.hedged = 0
+        self.denied = 0
+
+    def deposit(self):
+        self.tokens = min(self.tokens + self.ratio, self.burst)
+
+    def take(self) -> bool:
+        if self.tokens < 1:
+            self.denied += 1
+            return False
+
+        self.tokens -= 1
+        self.hedged += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'tokens': self.tokens,
+            'hedged': self.hedged,
+            'denied': self.denied,
+        }
+
+
+class RetryPolicy:
+    def __init__(
+            self,
+            retries: int=0,
+            backoff: float=RPC_RETRY_BACKOFF,
+            max_backoff: float=RPC_RETRY_MAX_BACKOFF,
+            hedge_delay: float=None,
+            hedge_percentile: float=None,
+            statuses=RETRYABLE_STATUSES,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_delay = hedge_delay
+        self.hedge_percentile = hedge_percentile
+        self.statuses = frozenset(statuses)
+        self.latencies = None
+        if hedge_percentile is not None:
+            self.latencies = LatencyWindow()
+
+    @property
+    def hedged(self) -> bool:
+        return self.hedge_delay is not None or \
+            self.hedge_percentile is not None
+
+    def get_hedge_delay(self) -> float:
+        if self.latencies is not None:
+            delay = self.latencies.percentile(self.hedge_percentile)
+            if delay is not None:
+                return delay
+
+        return self.hedge_delay
+
+    def get_backoff(self, attempt: int) -> float:
+        return uniform(0, min(self.backoff * 2 ** attempt, self.max_backoff))
+
+    def should_retry(self, resp, attempt: int) -> bool:
+        return attempt < self.retries and resp.status in self.statuses
@@ -2,21 +2,25 @@ class Service:
     def __init__(self, name):
         self.name = name
         self.methods = {}
+        self.options = {}
 
-    def rpc(self, func_name):
-        def decorator(func):
-            self._save_method(func_name, func)
+    def rpc(self, func_name=None, **options):
+        def decorator(func, func_name=func_name):
+            if func_name is None:
+                func_name = func.__name__
+
+            self._save_method(func_name, func, options)
             return func
 
-        if isinstance(func_name, str):
+        if func_name is None or isinstance(func_name, str):
             return decorator
 
         func = func_name
-        func_name = func.__name__
-        return decorator(func)
+        return decorator(func, func.__name__)
 
-    def _save_method(self, method: str, func):
+    def _save_method(self, method: str, func, options: dict):
         self.methods[method] = func.__name__
+        self.options[method] = options
 
     def get_methods(self, obj):
         methods = {}
@@ -25,3 +29,6 @@ class Service:
             methods[method] = func
 
         return methods
+
+    def get_options(self, method: str) -> dict:
+        return self.options.get(method, {})
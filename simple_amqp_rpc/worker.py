@@ -0,0 +1,217 @@
+import signal
+from argparse import ArgumentParser
+from asyncio import Event, new_event_loop, set_event_loop
+from importlib import import_module
+from inspect import iscoroutinefunction
+from multiprocessing import get_context
+from os import cpu_count
+from time import monotonic, sleep
+from typing import Callable
+
+from .consts import (
+    RPC_DRAIN_TIMEOUT,
+    RPC_WORKER_POLL_INTERVAL,
+    RPC_WORKER_RESTART_DELAY,
+    RPC_WORKER_STOP_GRACE
+)
+from .log import setup_logger
+
+
+def load_factory(path: str) -> Callable:
+    module_name, _, attr = path.partition(':')
+    if not module_name or not attr:
+        raise ValueError(
+            'Invalid factory [{}], expected module:callable'.format(path),
+        )
+
+    factory = import_module(module_name)
+    for name in attr.split('.'):
+        factory = getattr(factory, name)
+
+    return factory
+
+
+def run_worker(
+        factory: Callable,
+        prefetch: int=None,
+        drain_timeout: int=RPC_DRAIN_TIMEOUT,
+):
+    # the supervisor handles ctrl-c for the whole process group and stops
+    # the workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # asyncio backends bind to the current loop when they are built, so the
+    # worker's loop has to be set before the factory runs
+    loop = new_event_loop()
+    set_event_loop(loop)
+
+    rpc = factory()
+    if prefetch is not None:
+        rpc.set_max_concurrent_calls(prefetch)
+
+    rpc.configure()
+    if iscoroutinefunction(rpc.start):
+        _run_asyncio_worker(loop, rpc, drain_timeout)
+    else:
+        set_event_loop(None)
+        loop.close()
+        _run_gevent_worker(rpc, drain_timeout)
+
+
+def _run_asyncio_worker(loop, rpc, drain_timeout: int):
+    stopped = Event()
+    loop.add_signal_handler(signal.SIGTERM, stopped.set)
+
+    loop.run_until_complete(rpc.start())
+    loop.run_until_complete(stopped.wait())
+    loop.run_until_complete(rpc.stop(drain_timeout))
+    loop.close()
+
+
+def _run_gevent_worker(rpc, drain_timeout: int):
+    from gevent import signal_handler
+    from gevent.event import Event as GeventEvent
+
+    stopped = GeventEvent()
+    signal_handler(signal.SIGTERM, stopped.set)
+
+    rpc.start()
+    stopped.wait()
+    rpc.stop(drain_timeout)
+
+
+class WorkerSupervisor:
+    def __init__(
+            self,
+            factory,
+            workers: int=None,
+            prefetch: int=None,
+            drain_timeout: int=RPC_DRAIN_TIMEOUT,
+            restart_delay: float=RPC_WORKER_RESTART_DELAY,
+            logger=None,
+    ):
+        self.factory = factory
+        self.workers = workers if workers is not None else cpu_count()
+        self.prefetch = prefetch
+        self.drain_timeout = drain_timeout
+        self.restart_delay = restart_delay
+        self.log = logger if logger is not None else setup_logger()
+        self.restarts = 0
+
+        self._context = get_context('fork')
+        self._processes = {}
+        self._restart_at = {}
+        self._stopping = False
+
+    def run(self):
+        if isinstance(self.factory, str):
+            self.factory = load_factory(self.factory)
+
+        handlers = {
+            signum: signal.signal(signum, self._on_signal)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for worker_id in range(self.workers):
+                self._spawn(worker_id)
+
+            while not self._stopping:
+                self._check_workers()
+                sleep(RPC_WORKER_POLL_INTERVAL)
+        finally:
+            self._stop_workers()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def stop(self):
+        self._stopping = True
+
+    def _on_signal(self, signum, frame):
+        self.log.info('received signal %s, stopping workers', signum)
+        self.stop()
+
+    def _spawn(self, worker_id: int):
+        process = self._context.Process(
+            target=run_worker,
+            args=(self.factory, self.prefetch, self.drain_timeout),
+            name='rpc-worker-{}'.format(worker_id),
+        )
+        process.start()
+        self._processes[worker_id] = process
+        self.log.info('started worker %s [pid %s]', worker_id, process.pid)
+
+    def _check_workers(self):
+        now = monotonic()
+        for worker_id, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+
+            if worker_id not in self._restart_at:
+                self.log.error(
+                    'worker %s [pid %s] exited with code %s',
+                    worker_id,
+                    process.pid,
+                    process.exitcode,
+                )
+                self._restart_at[worker_id] = now + self.restart_delay
+            elif self._restart_at[worker_id] <= now:
+                del self._restart_at[worker_id]
+                self.restarts += 1
+                self._spawn(worker_id)
+
+    def _stop_workers(self):
+        processes = [
+            process
+            for process in self._processes.values()
+            if process.is_alive()
+        ]
+        for process in processes:
+            process.terminate()
+
+        deadline = monotonic() + self.drain_timeout + RPC_WORKER_STOP_GRACE
+        for process in processes:
+            process.join(max(deadline - monotonic(), 0))
+            if process.is_alive():
+                self.log.error('killing worker [pid %s]', process.pid)
+                process.kill()
+                process.join()
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='python -m simple_amqp_rpc.worker',
+        description='Run RPC worker processes sharing one route',
+    )
+    parser.add_argument(
+        'factory',
+        help='module:callable returning an unconfigured RPC instance',
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help='worker processes, defaults to the cpu count',
+    )
+    parser.add_argument(
+        '--prefetch', type=int, default=None,
+        help='concurrent calls per worker',
+    )
+    parser.add_argument(
+        '--drain-timeout', type=float, default=RPC_DRAIN_TIMEOUT,
+        help='seconds to wait for in-flight calls on shutdown',
+    )
+    parser.add_argument(
+        '--restart-delay', type=float, default=RPC_WORKER_RESTART_DELAY,
+        help='seconds before restarting a crashed worker',
+    )
+    args = parser.parse_args(argv)
+
+    WorkerSupervisor(
+        args.factory,
+        workers=args.workers,
+        prefetch=args.prefetch,
+        drain_timeout=args.drain_timeout,
+        restart_delay=args.restart_delay,
+    ).run()
+
+
+if __name__ == '__main__':
+    main()
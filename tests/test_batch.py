@@ -0,0 +1,224 @@
+import asyncio
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import (
+    CALL_ERROR,
+    OK,
+    SERVER_BUSY,
+    SHED_RATE_LIMIT,
+    STREAM_REQUIRED
+)
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Counter:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    def enter(self):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+
+    def exit(self):
+        self.running -= 1
+
+
+class AsyncioServicer(Counter):
+    @svc.rpc
+    async def work(self, value):
+        self.enter()
+        try:
+            await asyncio.sleep(0.01)
+            return value
+        finally:
+            self.exit()
+
+    @svc.rpc
+    async def rows(self):
+        yield 1
+
+    @svc.rpc
+    async def opaque(self):
+        return object()
+
+
+def test_asyncio_batch_respects_max_concurrent_calls():
+    async def run():
+        broker = MemoryBroker()
+        servicer = AsyncioServicer()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+            max_concurrent_calls=2,
+        )
+        server.add_svc(svc, servicer)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        calls = [RpcCall('server', 'svc', 'work', [i]) for i in range(6)]
+        resps = await client.send_calls(calls)
+        await server.stop(1)
+        return servicer, resps
+
+    servicer, resps = asyncio.run(run())
+    assert [resp.status for resp in resps] == [OK] * 6
+    assert [resp.body for resp in resps] == list(range(6))
+    assert servicer.peak == 2
+
+
+def test_gevent_batch_respects_max_concurrent_calls():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer(Counter):
+        @gevent_svc.rpc
+        def work(self, value):
+            self.enter()
+            try:
+                gevent.sleep(0.01)
+                return value
+            finally:
+                self.exit()
+
+    broker = MemoryBroker()
+    servicer = GeventServicer()
+    server = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='server',
+        max_concurrent_calls=2,
+    )
+    server.add_svc(gevent_svc, servicer)
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+    )
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    calls = [RpcCall('server', 'svc', 'work', [i]) for i in range(6)]
+    resps = client.send_calls(calls)
+    server.stop(1)
+
+    assert [resp.status for resp in resps] == [OK] * 6
+    assert [resp.body for resp in resps] == list(range(6))
+    assert servicer.peak == 2
+
+
+def test_coalesced_calls_are_rate_limited_per_method():
+    async def run():
+        broker = MemoryBroker()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, AsyncioServicer())
+        server.set_rate_limit('svc', 'work', rate=0.001, burst=2)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        client.set_route_coalescing('server', max_calls=5)
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        calls = [RpcCall('server', 'svc', 'work', [i]) for i in range(5)]
+        resps = await asyncio.gather(*[
+            client.send_call(call) for call in calls
+        ])
+        await server.stop(1)
+        return server, resps
+
+    server, resps = asyncio.run(run())
+    statuses = [resp.status for resp in resps]
+    assert statuses.count(OK) == 2
+    assert statuses.count(SERVER_BUSY) == 3
+    assert server.admission.stats()[SHED_RATE_LIMIT] == 3
+
+
+def test_unencodable_batch_items_are_answered_once():
+    async def run():
+        broker = MemoryBroker()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, AsyncioServicer())
+        server.add_recv_call_error_handler(lambda e: None)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        streamed = await client.send_calls([
+            RpcCall('server', 'svc', 'work', [1]),
+            RpcCall('server', 'svc', 'rows', []),
+        ], timeout=1)
+        opaque = await client.send_calls([
+            RpcCall('server', 'svc', 'opaque', []),
+        ], timeout=1)
+        await asyncio.sleep(0.05)
+        await server.stop(1)
+        return broker, streamed, opaque
+
+    broker, streamed, opaque = asyncio.run(run())
+    assert [resp.status for resp in streamed] == [OK, STREAM_REQUIRED]
+    assert [resp.status for resp in opaque] == [CALL_ERROR]
+    assert broker.delivered == 4
+
+
+def test_gevent_batch_rejects_streaming_items():
+    pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc
+        def rows(self):
+            yield 1
+
+    broker = MemoryBroker()
+    server = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='server',
+    )
+    server.add_svc(gevent_svc, GeventServicer())
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+    )
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    resps = client.send_calls([RpcCall('server', 'svc', 'rows', [])])
+    server.stop(1)
+
+    assert [resp.status for resp in resps] == [STREAM_REQUIRED]
+    assert broker.delivered == 2
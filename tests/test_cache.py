@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, RpcResp, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.cache import ResponseCache, cache_key
+from simple_amqp_rpc.consts import OK
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    def __init__(self):
+        self.calls = 0
+
+    @svc.rpc(cache_ttl=10)
+    async def slow(self):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        return 'slow'
+
+
+def key(*args):
+    return cache_key(RpcCall('route', 'svc', 'method', list(args)))
+
+
+@pytest.mark.parametrize('left,right', [
+    ({'a': 1}, [['a', 1]]),
+    (1, True),
+    (1, 1.0),
+    ([1, 2], (1, 2)),
+    ('1', 1),
+])
+def test_cache_keys_keep_value_types(left, right):
+    assert key(left) != key(right)
+    assert key(left) == key(left)
+
+
+def test_cached_bodies_are_not_shared():
+    cache = ResponseCache()
+    resp = RpcResp(status=OK, body={'items': [1]})
+    cache.set('key', resp, 10)
+    resp.body['items'].append(2)
+    cache.get('key').body['items'].append(3)
+
+    assert cache.get('key').body == {'items': [1]}
+
+
+def test_cancelled_leader_lets_followers_call_on_their_own():
+    async def run():
+        broker = MemoryBroker()
+        servicer = Servicer()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, servicer)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        stub = client.client(svc, 'server')
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        leader = asyncio.ensure_future(stub.slow())
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(stub.slow())
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        resp = await asyncio.wait_for(follower, 1)
+        cached = await stub.slow()
+        await server.stop(1)
+        return client, servicer, resp, cached
+
+    client, servicer, resp, cached = asyncio.run(run())
+    assert resp.body == 'slow'
+    assert cached.body == 'slow'
+    assert servicer.calls == 2
+    assert client.response_cache.coalesced == 1
+
+
+def test_gevent_killed_leader_lets_followers_call_on_their_own():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        calls = 0
+
+        @gevent_svc.rpc(cache_ttl=10)
+        def slow(self):
+            self.calls += 1
+            gevent.sleep(0.2)
+            return 'slow'
+
+    broker = MemoryBroker()
+    servicer = GeventServicer()
+    server = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='server')
+    server.add_svc(gevent_svc, servicer)
+    client = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='client')
+    stub = client.client(gevent_svc, 'server')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    leader = gevent.spawn(stub.slow)
+    gevent.sleep(0.01)
+    follower = gevent.spawn(stub.slow)
+    gevent.sleep(0.01)
+    leader.kill()
+
+    resp = follower.get(timeout=1)
+    server.stop(1)
+
+    assert resp.body == 'slow'
+    assert servicer.calls == 2
@@ -0,0 +1,156 @@
+import asyncio
+import zlib
+
+import pytest
+from simple_amqp import AmqpMsg
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.compression import (
+    COMPRESSORS,
+    PayloadTooLarge,
+    limit_decompress
+)
+from simple_amqp_rpc.consts import (
+    COMPRESSION_GZIP,
+    COMPRESSION_ZLIB,
+    OK,
+    PAYLOAD_TOO_LARGE
+)
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+PAYLOAD = b'x' * 10000
+
+
+class Servicer:
+    def __init__(self):
+        self.calls = 0
+
+    @svc.rpc
+    async def echo(self, value):
+        self.calls += 1
+        return value
+
+
+class RecordingBroker(MemoryBroker):
+    def __init__(self):
+        super().__init__()
+        self.msgs = []
+
+    def publish(self, msg: AmqpMsg):
+        self.msgs.append(msg)
+        super().publish(msg)
+
+
+def create_rpc(broker: MemoryBroker, route: str) -> AsyncioAmqpRpc:
+    return AsyncioAmqpRpc(conn=AsyncioMemoryConnection(broker), route=route)
+
+
+async def call_echo(server, client, value):
+    servicer = Servicer()
+    server.add_svc(svc, servicer)
+    server.configure()
+    client.configure()
+    await server.start()
+    await client.start()
+
+    resp = await client.send_call(RpcCall('server', 'svc', 'echo', [value]), 2)
+    await server.stop(1)
+    return servicer, resp
+
+
+@pytest.mark.parametrize('compression', [COMPRESSION_ZLIB, COMPRESSION_GZIP])
+def test_decompress_is_bounded(compression):
+    compress, decompress = COMPRESSORS[compression]
+    payload = compress(PAYLOAD)
+
+    assert decompress(payload, len(PAYLOAD)) == PAYLOAD
+    with pytest.raises(PayloadTooLarge):
+        decompress(payload, len(PAYLOAD) - 1)
+
+    with pytest.raises(zlib.error):
+        decompress(payload[:-4], len(PAYLOAD))
+
+
+def test_custom_decompressors_are_checked():
+    decompress = limit_decompress(lambda payload: payload * 2)
+
+    assert decompress(b'ab', 4) == b'abab'
+    with pytest.raises(PayloadTooLarge):
+        decompress(b'ab', 3)
+
+
+def test_reply_is_plain_when_peer_does_not_advertise():
+    broker = RecordingBroker()
+    server = create_rpc(broker, 'server')
+    server.set_default_compression(COMPRESSION_ZLIB, threshold=100)
+    client = create_rpc(broker, 'client')
+
+    _, resp = asyncio.run(call_echo(server, client, 'x' * 1000))
+
+    assert resp.body == 'x' * 1000
+    assert [msg.encoding for msg in broker.msgs] == ['utf8', 'utf8']
+
+
+def test_reply_is_plain_for_unknown_compression():
+    broker = RecordingBroker()
+    server = create_rpc(broker, 'server')
+    client = create_rpc(broker, 'client')
+    client.add_compressor('custom', bytes, bytes)
+    client.set_route_compression('server', 'custom', threshold=100)
+
+    _, resp = asyncio.run(call_echo(server, client, 'x' * 1000))
+
+    assert resp.status == OK
+    assert [msg.encoding for msg in broker.msgs] == ['custom', 'utf8']
+
+
+def test_reply_is_compressed_when_peer_advertises():
+    broker = RecordingBroker()
+    server = create_rpc(broker, 'server')
+    client = create_rpc(broker, 'client')
+    client.set_route_compression('server', COMPRESSION_GZIP, threshold=100)
+
+    _, resp = asyncio.run(call_echo(server, client, 'x' * 1000))
+
+    assert resp.body == 'x' * 1000
+    assert [msg.encoding for msg in broker.msgs] == [
+        COMPRESSION_GZIP,
+        COMPRESSION_GZIP,
+    ]
+
+
+def test_oversized_call_is_answered_once():
+    broker = RecordingBroker()
+    server = create_rpc(broker, 'server')
+    server.set_max_decompressed_size(1000)
+    client = create_rpc(broker, 'client')
+    client.set_route_compression('server', COMPRESSION_ZLIB, threshold=100)
+
+    servicer, resp = asyncio.run(call_echo(server, client, 'x' * 2000))
+
+    assert resp.status == PAYLOAD_TOO_LARGE
+    assert servicer.calls == 0
+    assert broker.delivered == 2
+
+
+def test_oversized_reply_fails_the_call():
+    broker = RecordingBroker()
+    server = create_rpc(broker, 'server')
+    client = create_rpc(broker, 'client')
+    client.set_route_compression('server', COMPRESSION_ZLIB, threshold=100)
+    client.set_max_decompressed_size(1500)
+
+    servicer, resp = asyncio.run(call_echo(server, client, 'x' * 1000))
+    assert resp.status == OK
+
+    servicer, resp = asyncio.run(call_echo(
+        create_rpc(broker, 'server'),
+        client,
+        'x' * 2000,
+    ))
+    assert resp.status == PAYLOAD_TOO_LARGE
+    assert servicer.calls == 1
@@ -0,0 +1,130 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from simple_amqp import AmqpMsg, AmqpParameters
+from simple_amqp.actions import CreateChannel
+
+from simple_amqp_rpc import Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.base.confirms import ConfirmWindow
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    def ping(self):
+        return 'pong'
+
+
+class Waiter:
+    woken = False
+
+
+def wake(waiter: Waiter):
+    waiter.woken = True
+
+
+class FakeChannel:
+    def __init__(self, publisher_confirms: bool=False):
+        self.publisher_confirms = publisher_confirms
+        self.published = []
+        self.on_confirm = None
+
+    def confirm_delivery(self, ack_nack_callback, callback=None):
+        self.on_confirm = ack_nack_callback
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        self.published.append(body)
+
+    def add_on_close_callback(self, callback):
+        pass
+
+
+class FakeConnection:
+    async def channel(self, number: int, publisher_confirms: bool=True):
+        return FakeChannel(publisher_confirms)
+
+
+def test_window_waits_for_confirms():
+    window = ConfirmWindow(2, Waiter, wake)
+    assert window.take() is None
+    assert window.take() is None
+    waiter = window.take()
+    assert not waiter.woken
+
+    window.confirm(1, False)
+    assert waiter.woken
+    assert window.take() is None
+    assert window.unconfirmed == 2
+
+    window.confirm(3, True, ok=False)
+    assert window.unconfirmed == 0
+    assert window.nacked == 1
+
+
+def test_closed_window_releases_waiters():
+    window = ConfirmWindow(1, Waiter, wake)
+    window.take()
+    waiter = window.take()
+    window.close()
+
+    assert waiter.woken
+    assert window.take() is None
+
+
+def test_asyncio_publish_channels_use_confirms():
+    from simple_amqp.asyncio import AsyncioAmqpConnection
+
+    conn = AsyncioAmqpConnection(AmqpParameters())
+    rpc = AsyncioAmqpRpc(
+        conn=conn,
+        route='server',
+        max_unconfirmed_publishes=8,
+    )
+    rpc.add_svc(svc, Servicer())
+    rpc.configure()
+    conn._conn = FakeConnection()
+
+    publish_number = rpc._rpc_call_channels[0].number
+    listen_number = rpc._rpc_listen_channel.number
+    for number in (publish_number, listen_number):
+        asyncio.run(conn._create_channel(CreateChannel(number=number)))
+
+    assert conn._get_channel(publish_number).publisher_confirms
+    assert not conn._get_channel(listen_number).publisher_confirms
+
+
+def test_gevent_publish_waits_for_broker_ack():
+    gevent = pytest.importorskip('gevent')
+    from gevent.event import AsyncResult
+    from pika.spec import Basic
+    from simple_amqp.gevent import GeventAmqpConnection
+
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+
+    conn = GeventAmqpConnection(AmqpParameters())
+    rpc = GeventAmqpRpc(
+        conn=conn,
+        route='server',
+        max_unconfirmed_publishes=1,
+    )
+    rpc.add_svc(svc, Servicer())
+    rpc.configure()
+
+    number = rpc._rpc_call_channels[0].number
+    channel = FakeChannel()
+    conn._processor_fut = AsyncResult()
+    conn._on_channel_open(channel, number)
+    conn._connected = True
+
+    msg = AmqpMsg(payload=b'call', topic='rpc.server')
+    rpc._publish(msg)
+    second = gevent.spawn(rpc._publish, msg)
+    gevent.sleep(0.01)
+    assert len(channel.published) == 1
+
+    channel.on_confirm(SimpleNamespace(method=Basic.Ack(delivery_tag=1)))
+    second.get(timeout=1)
+    assert len(channel.published) == 2
@@ -0,0 +1,117 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import CALL_ARGS_MISMATCH, OK
+from simple_amqp_rpc.contract import CallArgsError, MethodContract
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+def method(a: int, b: float=1.0, /, c: tuple=(), *, d: str, e: bytes=None):
+    pass
+
+
+def var_method(a, *args, **kwargs):
+    pass
+
+
+class Servicer:
+    def __init__(self):
+        self.calls = 0
+
+    @svc.rpc
+    async def scale(self, value: float, factor: int=2):
+        self.calls += 1
+        return value * factor
+
+
+@pytest.mark.parametrize('args,kwargs,error', [
+    ([], {'d': 'x'}, 'missing argument [a]'),
+    ([1], {}, 'missing argument [d]'),
+    ([1, 2.0, (), 4], {'d': 'x'}, 'expected at most 3 arguments, got 4'),
+    ([1], {'a': 1, 'd': 'x'}, 'multiple values for argument [a]'),
+    ([], {'a': 1, 'd': 'x'}, 'unexpected argument [a]'),
+    ([1], {'d': 'x', 'f': 1}, 'unexpected argument [f]'),
+    (['1'], {'d': 'x'}, 'invalid type for argument [a]'),
+    ([True], {'d': 'x'}, 'invalid type for argument [a]'),
+    ([1, '2'], {'d': 'x'}, 'invalid type for argument [b]'),
+    ([1], {'d': 1}, 'invalid type for argument [d]'),
+    ([1], {'d': 'x', 'e': 'y'}, 'invalid type for argument [e]'),
+    ([1, 2.0, 3], {'d': 'x'}, 'invalid type for argument [c]'),
+])
+def test_rejected_args(args, kwargs, error):
+    with pytest.raises(CallArgsError) as exc_info:
+        MethodContract(method).validate(args, kwargs)
+
+    assert str(exc_info.value) == error
+
+
+@pytest.mark.parametrize('args,kwargs,expected_args,expected_kwargs', [
+    ([1], {'d': 'x'}, [1], {'d': 'x'}),
+    ([1, 2], {'d': 'x'}, [1, 2.0], {'d': 'x'}),
+    ([1, 2, [3]], {'d': 'x'}, [1, 2.0, (3,)], {'d': 'x'}),
+    ([1], {'c': [3], 'd': 'x'}, [1], {'c': (3,), 'd': 'x'}),
+    ([1], {'d': 'x', 'e': None}, [1], {'d': 'x', 'e': None}),
+    ([1], {'d': 'x', 'e': b'y'}, [1], {'d': 'x', 'e': b'y'}),
+])
+def test_converted_args(args, kwargs, expected_args, expected_kwargs):
+    args, kwargs = MethodContract(method).validate(args, kwargs)
+
+    assert list(args) == expected_args
+    assert kwargs == expected_kwargs
+    assert [type(arg) for arg in args] == [
+        type(arg) for arg in expected_args
+    ]
+
+
+def test_generic_and_var_args():
+    def typed(items: List[int], name: Optional[str]=None):
+        pass
+
+    args, _ = MethodContract(typed).validate([(1, 2)], {})
+    assert args == [[1, 2]]
+    args, kwargs = MethodContract(var_method).validate([1, 2, 3], {'x': 4})
+    assert args == [1, 2, 3]
+    assert kwargs == {'x': 4}
+
+
+def test_rejected_call_is_not_run():
+    async def run():
+        broker = MemoryBroker()
+        servicer = Servicer()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, servicer)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        ok = await client.send_call(RpcCall('server', 'svc', 'scale', [3]), 2)
+        rejected = await client.send_call(
+            RpcCall('server', 'svc', 'scale', ['3']),
+            2,
+        )
+        await server.stop(1)
+        return servicer, ok, rejected
+
+    servicer, ok, rejected = asyncio.run(run())
+    assert ok.status == OK
+    assert ok.body == 6.0
+    assert rejected.status == CALL_ARGS_MISMATCH
+    assert rejected.body == (
+        'Invalid call arguments: invalid type for argument [value]'
+    )
+    assert servicer.calls == 1
@@ -0,0 +1,68 @@
+import asyncio
+
+from simple_amqp import AmqpMsg
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import OK
+from simple_amqp_rpc.encoding import (
+    decode_rpc_call,
+    decode_rpc_resp,
+    encode_rpc_call,
+    encode_rpc_resp
+)
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    async def echo(self, value):
+        return value
+
+
+def legacy_call_encoder(call: RpcCall) -> AmqpMsg:
+    return encode_rpc_call(call).replace(content_type='text/x-legacy')
+
+
+def legacy_resp_encoder(resp) -> AmqpMsg:
+    return encode_rpc_resp(resp).replace(content_type='text/x-legacy')
+
+
+def create_rpc(broker: MemoryBroker, route: str) -> AsyncioAmqpRpc:
+    rpc = AsyncioAmqpRpc(conn=AsyncioMemoryConnection(broker), route=route)
+    rpc.add_call_encoder('legacy', legacy_call_encoder)
+    rpc.add_call_decoder('legacy', decode_rpc_call)
+    rpc.add_resp_encoder('legacy', legacy_resp_encoder)
+    rpc.add_resp_decoder('legacy', decode_rpc_resp)
+    return rpc
+
+
+def test_single_argument_encoders_still_work():
+    async def run():
+        broker = MemoryBroker()
+        server = create_rpc(broker, 'server')
+        server.add_svc(svc, Servicer())
+        server.set_default_encoding('legacy')
+        client = create_rpc(broker, 'client')
+        client.set_route_encoding('server', 'legacy')
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        call = RpcCall('server', 'svc', 'echo', ['hello'])
+        _, msg = client._create_call_msg(call, timeout=1)
+        resp = await client.send_call(call, timeout=1)
+        await server.stop(1)
+        return msg, resp
+
+    msg, resp = asyncio.run(run())
+    assert msg.content_type == 'text/x-legacy'
+    assert msg.exchange == 'rpc.server'
+    assert msg.correlation_id
+    assert msg.expiration == 1000
+    assert resp.status == OK
+    assert resp.body == 'hello'
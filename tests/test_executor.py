@@ -0,0 +1,52 @@
+import asyncio
+import os
+
+from simple_amqp_rpc import Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import EXECUTOR_PROCESS, OK
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    pickled = 0
+
+    def __getstate__(self):
+        Servicer.pickled += 1
+        return self.__dict__
+
+    @svc.rpc(executor=EXECUTOR_PROCESS)
+    def pid(self, value):
+        return [os.getpid(), value]
+
+
+def test_process_executor_sends_only_call_args():
+    async def run():
+        broker = MemoryBroker()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, Servicer())
+        server.set_executor(EXECUTOR_PROCESS, max_workers=1)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        stub = client.client(svc, 'server')
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        resps = [await stub.pid(i) for i in range(3)]
+        await server.stop(1)
+        return resps
+
+    resps = asyncio.run(run())
+    assert [resp.status for resp in resps] == [OK] * 3
+    assert [resp.body[1] for resp in resps] == [0, 1, 2]
+    assert resps[0].body[0] != os.getpid()
+    assert Servicer.pickled <= 1
@@ -0,0 +1,64 @@
+import pytest
+
+from simple_amqp_rpc import RpcCall, RpcResp
+from simple_amqp_rpc.consts import OK, RPC_SEGMENT_MIN_SIZE
+from simple_amqp_rpc.encoding import (
+    CONTENT_TYPE_FRAMED,
+    decode_rpc_call_framed,
+    decode_rpc_resp_framed,
+    encode_rpc_call_framed,
+    encode_rpc_resp_framed
+)
+
+BLOB = bytes(range(256)) * (RPC_SEGMENT_MIN_SIZE // 128)
+
+
+def as_bytes(value):
+    if isinstance(value, memoryview):
+        return value.tobytes()
+    if isinstance(value, list):
+        return [as_bytes(item) for item in value]
+    if isinstance(value, dict):
+        return {key: as_bytes(item) for key, item in value.items()}
+
+    return value
+
+
+def test_call_round_trip():
+    call = RpcCall(
+        'server',
+        'svc',
+        'upload',
+        [BLOB, b'small', [bytearray(BLOB), 1], {'view': memoryview(BLOB)}],
+        {'extra': BLOB[:10], 'other': BLOB},
+    )
+    msg = encode_rpc_call_framed(call)
+    decoded = decode_rpc_call_framed(msg, 'server')
+
+    assert msg.content_type == CONTENT_TYPE_FRAMED
+    assert decoded.route == 'server'
+    assert decoded.method == 'upload'
+    assert as_bytes(decoded.args) == [
+        BLOB, b'small', [BLOB, 1], {'view': BLOB},
+    ]
+    assert as_bytes(decoded.kwargs) == {'extra': BLOB[:10], 'other': BLOB}
+    assert len(msg.payload) < len(BLOB) * 5
+
+
+def test_resp_round_trip():
+    resp = RpcResp(status=OK, body={'data': BLOB, 'tags': ['a', 'b']})
+    decoded = decode_rpc_resp_framed(encode_rpc_resp_framed(resp), 'server')
+
+    assert decoded.status == OK
+    assert isinstance(decoded.body['data'], memoryview)
+    assert as_bytes(decoded.body) == {'data': BLOB, 'tags': ['a', 'b']}
+
+
+@pytest.mark.parametrize('size', [0, 2, 10, -1])
+def test_truncated_frames_are_rejected(size):
+    resp = RpcResp(status=OK, body=[BLOB])
+    msg = encode_rpc_resp_framed(resp)
+    msg = msg.replace(payload=msg.payload[:size])
+
+    with pytest.raises(ValueError):
+        decode_rpc_resp_framed(msg, 'server')
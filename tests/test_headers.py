@@ -0,0 +1,56 @@
+from time import time
+
+import pytest
+
+from simple_amqp_rpc import RpcCall
+from simple_amqp_rpc.admission import AdmissionControl
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import RPC_SENT_AT_HEADER, SHED_QUEUE_AGE
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+
+def pika_round_trip(headers: dict) -> dict:
+    data = pytest.importorskip('pika.data')
+    pieces = []
+    data.encode_table(pieces, headers)
+    decoded, _ = data.decode_table(b''.join(pieces), 0)
+    return decoded
+
+
+def pamqp_round_trip(headers: dict) -> dict:
+    pytest.importorskip('pamqp')
+    from pamqp import decode, encode
+    _, decoded = decode.field_table(encode.field_table(headers))
+    return decoded
+
+
+@pytest.fixture
+def rpc():
+    return AsyncioAmqpRpc(conn=AsyncioMemoryConnection(), route='test')
+
+
+@pytest.mark.parametrize('round_trip', [pika_round_trip, pamqp_round_trip])
+def test_deadline_header_survives_encoding(rpc, round_trip):
+    call = RpcCall('svc.route', 'svc', 'method', [1])
+    _, msg = rpc._create_call_msg(call, timeout=2)
+    msg = msg.replace(headers=round_trip(msg.headers))
+
+    deadline = rpc._get_call_deadline(msg)
+    assert deadline == pytest.approx(time() + 2, abs=0.05)
+    assert not rpc._call_expired(msg, deadline)
+
+
+@pytest.mark.parametrize('round_trip', [pika_round_trip, pamqp_round_trip])
+def test_queue_age_uses_decoded_sent_at(rpc, round_trip):
+    call = RpcCall('svc.route', 'svc', 'method', [1])
+    _, msg = rpc._create_call_msg(call)
+    admission = AdmissionControl()
+    admission.max_queue_age = 1
+
+    fresh = msg.replace(headers=round_trip(msg.headers))
+    assert admission.admit(fresh, 0) is None
+
+    stale_headers = dict(msg.headers)
+    stale_headers[RPC_SENT_AT_HEADER] -= 5000
+    stale = msg.replace(headers=round_trip(stale_headers))
+    assert admission.admit(stale, 0) == SHED_QUEUE_AGE
@@ -0,0 +1,180 @@
+import asyncio
+from contextvars import copy_context
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import OK
+from simple_amqp_rpc.lanes import call_lane
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    def __init__(self):
+        self.calls = 0
+
+    @svc.rpc(priority='interactive')
+    async def get(self):
+        self.calls += 1
+        return 'get'
+
+    @svc.rpc
+    async def plain(self):
+        self.calls += 1
+        return 'plain'
+
+
+plain_svc = Service('svc')
+
+
+class PlainServicer:
+    def __init__(self):
+        self.calls = 0
+
+    @plain_svc.rpc
+    async def get(self):
+        self.calls += 1
+        return 'get'
+
+
+def run_calls(method, *lanes, route_lanes=(), plain_server=False):
+    async def run():
+        broker = MemoryBroker()
+        servicers = [Servicer()]
+        servers = [AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+            max_concurrent_calls=2,
+        )]
+        servers[0].add_svc(svc, servicers[0])
+        if plain_server:
+            servicers.append(PlainServicer())
+            servers.append(AsyncioAmqpRpc(
+                conn=AsyncioMemoryConnection(broker),
+                route='server',
+            ))
+            servers[1].add_svc(plain_svc, servicers[1])
+
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        client.client(svc, 'server')
+        client.set_route_lanes('server', *route_lanes)
+        for server in servers:
+            server.configure()
+            await server.start()
+
+        client.configure()
+        await client.start()
+
+        resps = []
+        for lane in lanes:
+            with call_lane(lane):
+                resps.append(await client.send_call(
+                    RpcCall('server', 'svc', method, []),
+                    timeout=1,
+                ))
+
+        await asyncio.sleep(0.01)
+        for server in servers:
+            await server.stop(1)
+
+        return broker, servicers, resps
+
+    return asyncio.run(run())
+
+
+def test_undeclared_lane_falls_back_to_default_queue():
+    broker, servicers, resps = run_calls('plain', 'unknown')
+    assert [resp.status for resp in resps] == [OK]
+    assert servicers[0].calls == 1
+    assert broker.delivered == 2
+
+
+def test_declared_lane_is_handled_once():
+    lanes = ('interactive', 'default', 'interactive')
+    broker, servicers, resps = run_calls(
+        'plain',
+        *lanes,
+        route_lanes=['interactive'],
+    )
+    assert [resp.status for resp in resps] == [OK] * 3
+    assert servicers[0].calls == 3
+    assert broker.delivered == 6
+
+
+@pytest.mark.parametrize('route_lanes', [(), ['interactive']])
+def test_mixed_lane_servers_run_each_call_once(route_lanes):
+    lanes = [None] * 4
+    broker, servicers, resps = run_calls(
+        'get',
+        *lanes,
+        route_lanes=route_lanes,
+        plain_server=True,
+    )
+    assert [resp.status for resp in resps] == [OK] * 4
+    assert sum(servicer.calls for servicer in servicers) == 4
+    assert broker.delivered == 8
+    if route_lanes:
+        assert servicers[1].calls == 0
+
+
+def test_gevent_greenlets_keep_the_call_lane():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc(idempotent=True, hedge_delay=0.01)
+        def slow(self):
+            gevent.sleep(0.05)
+            return 'slow'
+
+        @gevent_svc.rpc
+        def plain(self):
+            return 'plain'
+
+    class LaneServer(GeventAmqpRpc):
+        lanes = []
+
+        def _handle_call_message(self, msg, lane='default'):
+            self.lanes.append(lane)
+            return super()._handle_call_message(msg, lane)
+
+    broker = MemoryBroker()
+    server = LaneServer(conn=GeventMemoryConnection(broker), route='server')
+    server.set_lane('interactive')
+    server.add_svc(gevent_svc, GeventServicer())
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+    )
+    client.set_route_coalescing('server', max_calls=2)
+    client.set_route_lanes('server', 'interactive')
+    stub = client.client(gevent_svc, 'server')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    with call_lane('interactive'):
+        hedged = stub.slow()
+        coalesced = [
+            gevent.spawn(copy_context().run, stub.plain) for _ in range(2)
+        ]
+        gevent.joinall(coalesced)
+
+    gevent.sleep(0.1)
+    server.stop(1)
+
+    assert hedged.status == OK
+    assert [greenlet.value.status for greenlet in coalesced] == [OK, OK]
+    # two hedge attempts and one coalesced batch
+    assert server.lanes == ['interactive'] * 3
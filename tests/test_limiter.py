@@ -0,0 +1,122 @@
+import asyncio
+
+from simple_amqp_rpc import RpcCall, RpcResp, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import (
+    CALL_ERROR,
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    ROUTE_UNAVAILABLE,
+    SERVER_BUSY,
+    TOO_MANY_CALLS
+)
+from simple_amqp_rpc.limiter import AimdLimiter, CircuitBreaker, RouteGuard
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc(retries=3)
+    async def fail(self):
+        raise ValueError('broken')
+
+
+def test_limiter_grows_and_backs_off():
+    limiter = AimdLimiter(limit=2, min_limit=1, backoff_ratio=0.5)
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+    limiter.release(0.01, False)
+    assert limiter.limit == 3
+    limiter.release(0.01, False)
+    assert limiter.limit == 3
+
+    assert limiter.acquire()
+    limiter.release(0.01, True)
+    assert limiter.limit == 1.5
+    assert limiter.stats() == {'limit': 1, 'inflight': 0, 'rejected': 1}
+
+
+def test_breaker_opens_and_probes():
+    breaker = CircuitBreaker(failures=2, reset_timeout=0)
+    breaker.record(True)
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record(True)
+    assert breaker.state == CIRCUIT_OPEN
+
+    assert breaker.allow()
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CIRCUIT_OPEN
+
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.rejected == 1
+
+
+def test_guard_ignores_too_many_calls():
+    guard = RouteGuard(
+        'server',
+        limiter=AimdLimiter(limit=4),
+        breaker=CircuitBreaker(failures=1, reset_timeout=0),
+    )
+    guard.breaker.record(True)
+
+    assert guard.acquire() is None
+    guard.release(0.01, RpcResp(status=TOO_MANY_CALLS, body=''))
+    assert guard.breaker.state == CIRCUIT_HALF_OPEN
+    assert guard.limiter.limit == 4
+    assert guard.limiter.inflight == 0
+
+    assert guard.acquire() is None
+    guard.release(0.01, RpcResp(status=SERVER_BUSY, body=''))
+    assert guard.breaker.state == CIRCUIT_OPEN
+    assert guard.limiter.limit < 4
+
+
+def test_guard_rejects_when_circuit_is_open():
+    guard = RouteGuard('server', breaker=CircuitBreaker(failures=1))
+    guard.breaker.record(True)
+
+    resp = guard.acquire()
+    assert resp.status == ROUTE_UNAVAILABLE
+    assert guard.stats()['breaker']['rejected'] == 1
+
+
+def test_open_circuit_is_not_retried():
+    async def run():
+        broker = MemoryBroker()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, Servicer())
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        client.client(svc, 'server')
+        client.set_route_breaker('server', failures=1, reset_timeout=60)
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        call = RpcCall('server', 'svc', 'fail', [])
+        failed = await client.send_call(call, 2)
+        published = broker.published
+        rejected = await client.send_call(call, 2)
+        await server.stop(1)
+        return client, broker, published, failed, rejected
+
+    client, broker, published, failed, rejected = asyncio.run(run())
+    assert failed.status == CALL_ERROR
+    assert rejected.status == ROUTE_UNAVAILABLE
+    assert broker.published == published
+    assert client.get_route_state('server')['breaker']['rejected'] == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import OK, SERVER_BUSY, STREAM_REQUIRED
+from simple_amqp_rpc.deadline import remaining_time
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    @svc.rpc
+    async def work(self, delay):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(delay)
+            return remaining_time()
+        finally:
+            self.running -= 1
+
+    @svc.rpc
+    async def rows(self):
+        yield 1
+
+
+def create_rpc(servicer: Servicer, **kwargs) -> AsyncioAmqpRpc:
+    rpc = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(),
+        route='server',
+        **kwargs
+    )
+    rpc.add_svc(svc, servicer)
+    rpc.enable_loopback()
+    return rpc
+
+
+def test_local_call_honors_timeout_and_deadline():
+    async def run():
+        rpc = create_rpc(Servicer())
+        fast = await rpc.send_call(RpcCall('server', 'svc', 'work', [0]), 2)
+        with pytest.raises(asyncio.TimeoutError):
+            await rpc.send_call(RpcCall('server', 'svc', 'work', [1]), 0.1)
+
+        return rpc, fast
+
+    rpc, fast = asyncio.run(run())
+    assert fast.status == OK
+    assert fast.body == pytest.approx(2, abs=0.1)
+    assert rpc._calls_running == 0
+
+
+def test_local_calls_share_server_limits():
+    async def run():
+        servicer = Servicer()
+        rpc = create_rpc(servicer, max_concurrent_calls=1)
+        rpc.set_rate_limit('svc', 'work', rate=0.001, burst=3)
+        resps = await asyncio.gather(*[
+            rpc.send_call(RpcCall('server', 'svc', 'work', [0.01]), 2)
+            for _ in range(4)
+        ])
+        streamed = await rpc.send_call(RpcCall('server', 'svc', 'rows', []))
+        return servicer, resps, streamed
+
+    servicer, resps, streamed = asyncio.run(run())
+    assert [resp.status for resp in resps] == [OK] * 3 + [SERVER_BUSY]
+    assert servicer.peak == 1
+    assert streamed.status == STREAM_REQUIRED
+
+
+def test_gevent_local_call_honors_timeout_and_deadline():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc
+        def work(self, delay):
+            gevent.sleep(delay)
+            return remaining_time()
+
+    rpc = GeventAmqpRpc(
+        conn=GeventMemoryConnection(),
+        route='server',
+        max_concurrent_calls=1,
+    )
+    rpc.add_svc(gevent_svc, GeventServicer())
+    rpc.enable_loopback()
+
+    fast = rpc.send_call(RpcCall('server', 'svc', 'work', [0]), 2)
+    with pytest.raises(gevent.Timeout):
+        rpc.send_call(RpcCall('server', 'svc', 'work', [1]), 0.1)
+
+    assert fast.status == OK
+    assert fast.body == pytest.approx(2, abs=0.1)
+    assert rpc._calls_running == 0
@@ -0,0 +1,174 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from simple_amqp import AmqpMsg
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import OK
+from simple_amqp_rpc.deadline import remaining_time
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+from simple_amqp_rpc.memory.broker import MemoryConsumer, topic_pattern
+
+from .test_headers import pamqp_round_trip, pika_round_trip
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    async def echo(self, value, delay):
+        await asyncio.sleep(delay)
+        return value
+
+    @svc.rpc
+    async def budget(self):
+        return remaining_time()
+
+
+class WireBroker(MemoryBroker):
+    def __init__(self, round_trip):
+        super().__init__()
+        self.round_trip = round_trip
+
+    def publish(self, msg: AmqpMsg):
+        if msg.headers:
+            msg = msg.replace(headers=self.round_trip(msg.headers))
+
+        super().publish(msg)
+
+
+async def start_rpcs(broker: MemoryBroker):
+    server = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='server',
+    )
+    server.add_svc(svc, Servicer())
+    client = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='client',
+    )
+    server.configure()
+    client.configure()
+    await server.start()
+    await client.start()
+    return server, client
+
+
+@pytest.mark.parametrize('routing_key,topic,matched', [
+    ('rpc.server', 'rpc.server', True),
+    ('rpc.*', 'rpc.server', True),
+    ('rpc.*', 'rpc.server.high', False),
+    ('rpc.#', 'rpc', True),
+    ('rpc.#', 'rpc.server.high', True),
+    ('rpc.server', 'rpc.other', False),
+])
+def test_topic_pattern(routing_key, topic, matched):
+    assert (topic_pattern(routing_key).match(topic) is not None) == matched
+
+
+def test_replies_follow_correlation_id():
+    async def run():
+        server, client = await start_rpcs(MemoryBroker())
+        stub = client.client(svc, 'server')
+        resps = await asyncio.gather(*[
+            stub.echo(i, 0.05 - i * 0.01)
+            for i in range(5)
+        ])
+        await server.stop(1)
+        return resps
+
+    resps = asyncio.run(run())
+    assert [resp.status for resp in resps] == [OK] * 5
+    assert [resp.body for resp in resps] == list(range(5))
+
+
+def test_latency_is_added_per_delivery():
+    async def run():
+        broker = MemoryBroker(latency=0.05)
+        server, client = await start_rpcs(broker)
+        stub = client.client(svc, 'server')
+        start = monotonic()
+        resp = await stub.echo(1, 0)
+        elapsed = monotonic() - start
+        await server.stop(1)
+        return broker, resp, elapsed
+
+    broker, resp, elapsed = asyncio.run(run())
+    assert resp.body == 1
+    assert elapsed >= 0.1
+    assert broker.delivered == 2
+
+
+def test_expired_messages_are_dropped():
+    broker = MemoryBroker()
+    queue = broker.declare_queue('queue')
+    broker.publish(AmqpMsg(payload=b'old', topic='queue', expiration=0))
+    broker.publish(AmqpMsg(payload=b'new', topic='queue'))
+    delivered = []
+    broker.add_consumer(MemoryConsumer(
+        queue,
+        'tag',
+        None,
+        lambda consumer, msg: delivered.append(msg.payload),
+        auto_ack=True,
+    ))
+
+    assert delivered == [b'new']
+    assert broker.dropped == 1
+
+
+@pytest.mark.parametrize('round_trip', [pika_round_trip, pamqp_round_trip])
+def test_deadline_survives_wire_headers(round_trip):
+    async def run():
+        server, client = await start_rpcs(WireBroker(round_trip))
+        call = RpcCall('server', 'svc', 'budget', [])
+        resp = await client.send_call(call, timeout=2)
+        await server.stop(1)
+        return resp
+
+    resp = asyncio.run(run())
+    assert resp.status == OK
+    assert resp.body == pytest.approx(2, abs=0.1)
+
+
+def test_gevent_round_trip():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc
+        def echo(self, value, delay):
+            gevent.sleep(delay)
+            return value
+
+    broker = MemoryBroker()
+    server = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='server',
+    )
+    server.add_svc(gevent_svc, GeventServicer())
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+    )
+    stub = client.client(gevent_svc, 'server')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    greenlets = [
+        gevent.spawn(stub.echo, i, 0.05 - i * 0.01)
+        for i in range(5)
+    ]
+    gevent.joinall(greenlets, timeout=5)
+    server.stop(1)
+
+    assert [g.value.status for g in greenlets] == [OK] * 5
+    assert [g.value.body for g in greenlets] == list(range(5))
@@ -0,0 +1,218 @@
+import asyncio
+from urllib.request import urlopen
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import CALL_ERROR, OK
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+from simple_amqp_rpc.metrics import (
+    PROMETHEUS_CONTENT_TYPE,
+    Instrumentation,
+    RpcMetrics
+)
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    async def echo(self, value):
+        return value
+
+    @svc.rpc
+    async def fail(self):
+        raise ValueError('broken')
+
+
+class RecordingInstrumentation(Instrumentation):
+    def __init__(self):
+        self.hooks = []
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if name.startswith('_') or not hasattr(Instrumentation, name):
+            return attr
+
+        def hook(*args):
+            self.hooks.append(name)
+            return attr(*args)
+
+        return hook
+
+
+def run_calls(server_metrics, client_metrics, *calls):
+    async def run():
+        broker = MemoryBroker()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+            instrumentation=server_metrics,
+        )
+        server.add_svc(svc, Servicer())
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+            instrumentation=client_metrics,
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        resps = []
+        for call in calls:
+            resps.append(await client.send_call(call, 2))
+
+        await server.stop(1)
+        return resps
+
+    return asyncio.run(run())
+
+
+def test_hooks_run_around_each_step():
+    server_hooks = RecordingInstrumentation()
+    client_hooks = RecordingInstrumentation()
+    call = RpcCall('server', 'svc', 'echo', [1])
+    run_calls(server_hooks, client_hooks, call)
+
+    assert client_hooks.hooks == [
+        'call_sent',
+        'call_encoded',
+        'msg_published',
+        'resp_decoded',
+        'call_done',
+    ]
+    assert server_hooks.hooks == [
+        'call_decoded',
+        'call_queued',
+        'call_received',
+        'call_handled',
+        'resp_encoded',
+        'msg_published',
+    ]
+
+
+def test_metrics_are_collected_per_method():
+    server_metrics = RpcMetrics()
+    client_metrics = RpcMetrics()
+    resps = run_calls(
+        server_metrics,
+        client_metrics,
+        RpcCall('server', 'svc', 'echo', ['x' * 100]),
+        RpcCall('server', 'svc', 'echo', [1]),
+        RpcCall('server', 'svc', 'fail', []),
+    )
+    assert [resp.status for resp in resps] == [OK, OK, CALL_ERROR]
+
+    echo = {'route': 'server', 'service': 'svc', 'method': 'echo'}
+    fail = {'route': 'server', 'service': 'svc', 'method': 'fail'}
+    assert client_metrics.get('rpc_client_call_seconds', **echo).count == 2
+    assert client_metrics.get('rpc_client_calls_in_flight', **echo) == 0
+    assert client_metrics.get(
+        'rpc_client_errors_total',
+        status=500,
+        **fail
+    ) == 1
+    assert client_metrics.get('rpc_client_errors_total', status=200, **echo) \
+        is None
+    assert client_metrics.get('rpc_call_bytes', **echo).sum > 100
+    assert server_metrics.get('rpc_server_call_seconds', **echo).count == 2
+    assert server_metrics.get('rpc_server_calls_in_flight', **fail) == 0
+    assert server_metrics.get(
+        'rpc_server_errors_total',
+        status=500,
+        **fail
+    ) == 1
+    assert server_metrics.get(
+        'rpc_server_queue_wait_seconds',
+        **echo
+    ).count == 2
+    assert server_metrics.get(
+        'rpc_codec_seconds',
+        route='server',
+        op='call_decode',
+    ).count == 3
+
+
+def test_render_uses_prometheus_text_format():
+    metrics = RpcMetrics(latency_buckets=(0.1, 1))
+    call = RpcCall('route "a"', 'svc', 'method', [])
+    metrics.call_sent(call)
+    metrics.call_done(call, None, 0.5)
+
+    lines = metrics.render().splitlines()
+    labels = 'route="route \\"a\\"",service="svc",method="method"'
+    assert '# TYPE rpc_client_call_seconds histogram' in lines
+    assert 'rpc_client_call_seconds_bucket{' + labels + ',le="0.1"} 0' \
+        in lines
+    assert 'rpc_client_call_seconds_bucket{' + labels + ',le="1"} 1' in lines
+    assert 'rpc_client_call_seconds_bucket{' + labels + ',le="+Inf"} 1' \
+        in lines
+    assert 'rpc_client_call_seconds_count{' + labels + '} 1' in lines
+    assert 'rpc_client_calls_in_flight{' + labels + '} 0' in lines
+    assert 'rpc_client_errors_total{' + labels + ',status="exception"} 1' \
+        in lines
+    assert not any(line.startswith('rpc_server') for line in lines)
+
+
+def test_metrics_are_served_over_http():
+    metrics = RpcMetrics()
+    metrics.call_expired('server', None)
+    server = metrics.serve(port=0)
+    try:
+        url = 'http://{}:{}/metrics'.format(*server.server_address)
+        with urlopen(url, timeout=5) as resp:
+            content_type = resp.headers['Content-Type']
+            body = resp.read().decode('utf-8')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert content_type == PROMETHEUS_CONTENT_TYPE
+    assert 'rpc_server_expired_total{route="server"} 1' in body
+
+
+def test_gevent_metrics_are_collected():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc
+        def echo(self, value):
+            gevent.sleep(0)
+            return value
+
+    broker = MemoryBroker()
+    server_metrics = RpcMetrics()
+    client_metrics = RpcMetrics()
+    server = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='server',
+        instrumentation=server_metrics,
+    )
+    server.add_svc(gevent_svc, GeventServicer())
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+        instrumentation=client_metrics,
+    )
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    resp = client.send_call(RpcCall('server', 'svc', 'echo', [1]), 2)
+    server.stop(1)
+
+    echo = {'route': 'server', 'service': 'svc', 'method': 'echo'}
+    assert resp.status == OK
+    assert client_metrics.get('rpc_client_call_seconds', **echo).count == 1
+    assert client_metrics.get('rpc_client_calls_in_flight', **echo) == 0
+    assert server_metrics.get('rpc_server_call_seconds', **echo).count == 1
+    assert server_metrics.get('rpc_server_calls_in_flight', **echo) == 0
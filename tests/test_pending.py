@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.base import PendingCalls
+from simple_amqp_rpc.consts import OK, TOO_MANY_CALLS
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    async def sleep(self, delay):
+        await asyncio.sleep(delay)
+        return delay
+
+
+async def start_rpcs(broker: MemoryBroker, **kwargs):
+    server = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='server',
+    )
+    server.add_svc(svc, Servicer())
+    client = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='client',
+        **kwargs
+    )
+    server.configure()
+    client.configure()
+    await server.start()
+    await client.start()
+    return server, client
+
+
+def sleep_call(delay: float) -> RpcCall:
+    return RpcCall('server', 'svc', 'sleep', [delay])
+
+
+def test_replies_are_counted():
+    pending = PendingCalls(max_size=2, abandoned_size=1)
+    pending.add('a', 'future-a', 'route')
+    pending.add('b', 'future-b', 'route')
+    assert pending.full
+
+    assert pending.pop('a') == ('future-a', 'route')
+    pending.discard('b')
+    pending.pop('b')
+    pending.pop('c')
+    assert len(pending) == 0
+    assert pending.stats() == {
+        'pending': 0,
+        'abandoned': 1,
+        'late_replies': 1,
+        'orphaned_replies': 1,
+    }
+
+
+def test_abandoned_calls_are_bounded():
+    pending = PendingCalls(abandoned_size=1)
+    for reply_id in ('a', 'b'):
+        pending.add(reply_id, None, 'route')
+        pending.discard(reply_id)
+
+    pending.pop('a')
+    pending.pop('b')
+    assert pending.late_replies == 1
+    assert pending.orphaned_replies == 1
+
+
+def test_timed_out_calls_are_removed():
+    async def run():
+        server, client = await start_rpcs(MemoryBroker())
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send_call(sleep_call(0.2), 0.05)
+
+        pending = len(client.pending_calls)
+        await asyncio.sleep(0.3)
+        await server.stop(1)
+        return client, pending
+
+    client, pending = asyncio.run(run())
+    assert pending == 0
+    assert client.pending_calls.stats() == {
+        'pending': 0,
+        'abandoned': 1,
+        'late_replies': 1,
+        'orphaned_replies': 0,
+    }
+
+
+def test_cancelled_calls_are_removed():
+    async def run():
+        server, client = await start_rpcs(MemoryBroker())
+        task = asyncio.ensure_future(client.send_call(sleep_call(0.2), 2))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        pending = len(client.pending_calls)
+        await server.stop(1)
+        return client, pending
+
+    client, pending = asyncio.run(run())
+    assert pending == 0
+    assert client.pending_calls.abandoned_calls == 1
+
+
+def test_full_table_rejects_calls():
+    async def run():
+        server, client = await start_rpcs(
+            MemoryBroker(),
+            max_pending_calls=1,
+        )
+        resps = await asyncio.gather(
+            client.send_call(sleep_call(0.05), 2),
+            client.send_call(sleep_call(0.05), 2),
+        )
+        await server.stop(1)
+        return resps
+
+    resps = asyncio.run(run())
+    assert [resp.status for resp in resps] == [OK, TOO_MANY_CALLS]
+
+
+def test_gevent_timed_out_calls_are_removed():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        @gevent_svc.rpc
+        def sleep(self, delay):
+            gevent.sleep(delay)
+            return delay
+
+    broker = MemoryBroker()
+    server = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='server')
+    server.add_svc(gevent_svc, GeventServicer())
+    client = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='client')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    with pytest.raises(gevent.Timeout):
+        client.send_call(sleep_call(0.2), 0.05)
+
+    pending = len(client.pending_calls)
+    gevent.sleep(0.3)
+    server.stop(1)
+
+    assert pending == 0
+    assert client.pending_calls.late_replies == 1
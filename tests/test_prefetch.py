@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from simple_amqp import AmqpParameters
+from simple_amqp.actions import CreateChannel
+
+from simple_amqp_rpc import Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc
+    def ping(self):
+        return 'pong'
+
+
+class FakeChannel:
+    def __init__(self):
+        self.prefetch = None
+
+    async def set_qos(self, prefetch_count: int=0):
+        self.prefetch = prefetch_count
+
+    def basic_qos(self, callback=None, prefetch_count: int=0):
+        self.prefetch = prefetch_count
+
+    def add_on_close_callback(self, callback):
+        pass
+
+
+class FakeConnection:
+    async def channel(self, number: int, publisher_confirms: bool=True):
+        return FakeChannel()
+
+
+def test_asyncio_prefetch_is_set_when_the_channel_reopens():
+    from simple_amqp.asyncio import AsyncioAmqpConnection
+
+    conn = AsyncioAmqpConnection(AmqpParameters())
+    rpc = AsyncioAmqpRpc(conn=conn, route='server', max_concurrent_calls=4)
+    rpc.add_svc(svc, Servicer())
+    rpc.configure()
+    conn._conn = FakeConnection()
+
+    number = rpc._rpc_listen_channel.number
+    asyncio.run(conn._create_channel(CreateChannel(number=number)))
+    asyncio.run(conn._create_channel(CreateChannel(number=number + 1)))
+
+    assert conn._get_channel(number).prefetch == 4
+    assert conn._get_channel(number + 1).prefetch is None
+
+
+def test_gevent_prefetch_is_set_when_the_channel_reopens():
+    pytest.importorskip('gevent')
+    from gevent.event import AsyncResult
+    from simple_amqp.gevent import GeventAmqpConnection
+
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+
+    conn = GeventAmqpConnection(AmqpParameters())
+    rpc = GeventAmqpRpc(conn=conn, route='server', max_concurrent_calls=4)
+    rpc.add_svc(svc, Servicer())
+    rpc.configure()
+
+    number = rpc._rpc_listen_channel.number
+    channels = [FakeChannel(), FakeChannel()]
+    for offset, channel in enumerate(channels):
+        conn._processor_fut = AsyncResult()
+        conn._on_channel_open(channel, number + offset)
+
+    assert [channel.prefetch for channel in channels] == [4, None]
@@ -0,0 +1,82 @@
+import asyncio
+from time import time
+
+import pytest
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.deadline import reset_call_deadline, set_call_deadline
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc(retries=3, idempotent=True, hedge_delay=0.01)
+    async def echo(self, value):
+        return value
+
+
+async def start_client(broker: MemoryBroker):
+    server = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='server',
+    )
+    server.add_svc(svc, Servicer())
+    client = AsyncioAmqpRpc(
+        conn=AsyncioMemoryConnection(broker),
+        route='client',
+    )
+    client.client(svc, 'server')
+    server.configure()
+    client.configure()
+    await server.start()
+    await client.start()
+    return client
+
+
+@pytest.mark.parametrize('batch', [False, True])
+def test_asyncio_expired_budget_fails_fast(batch):
+    async def run():
+        broker = MemoryBroker()
+        client = await start_client(broker)
+        call = RpcCall('server', 'svc', 'echo', [1])
+        token = set_call_deadline(time() - 1)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                if batch:
+                    await client.send_calls([call])
+                else:
+                    await client.send_call(call)
+        finally:
+            reset_call_deadline(token)
+
+        return broker
+
+    broker = asyncio.run(run())
+    assert broker.published == 0
+
+
+def test_gevent_expired_budget_fails_fast():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    broker = MemoryBroker()
+    client = GeventAmqpRpc(
+        conn=GeventMemoryConnection(broker),
+        route='client',
+    )
+    client.set_method_options('server', 'svc', 'echo', retries=3)
+    client.configure()
+    client.start()
+
+    token = set_call_deadline(time() - 1)
+    try:
+        with pytest.raises(gevent.Timeout):
+            client.send_call(RpcCall('server', 'svc', 'echo', [1]))
+    finally:
+        reset_call_deadline(token)
+
+    assert broker.published == 0
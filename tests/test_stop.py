@@ -0,0 +1,42 @@
+import asyncio
+
+from simple_amqp import AmqpParameters
+from simple_amqp.asyncio import AsyncioAmqpConnection
+
+from simple_amqp_rpc import Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+
+svc = Service('svc')
+
+
+class Servicer:
+    @svc.rpc(priority='interactive')
+    def ping(self):
+        return 'pong'
+
+
+class FakeQueue:
+    def __init__(self):
+        self.cancelled = []
+
+    async def cancel(self, consumer_tag: str):
+        self.cancelled.append(consumer_tag)
+
+
+def test_stop_cancels_tracked_consumers_and_skips_lost_ones():
+    conn = AsyncioAmqpConnection(AmqpParameters())
+    rpc = AsyncioAmqpRpc(conn=conn, route='server')
+    rpc.add_svc(svc, Servicer())
+    rpc.configure()
+
+    queue = FakeQueue()
+    listen_tag = rpc._listen_consumer.tag
+    lane_tag = rpc._lane_consumers['interactive'].tag
+    conn._consumers = {rpc._rpc_listen_channel.number: {listen_tag}}
+    conn._consumer_queues = {listen_tag: queue}
+
+    asyncio.run(rpc._cancel_listen_consumers())
+
+    assert queue.cancelled == [listen_tag]
+    assert lane_tag not in conn._consumer_queues
+    assert conn._consumers[rpc._rpc_listen_channel.number] == set()
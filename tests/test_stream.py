@@ -0,0 +1,217 @@
+import asyncio
+
+import pytest
+from simple_amqp import AmqpMsg
+
+from simple_amqp_rpc import RpcCall, Service
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.consts import (
+    CALL_ERROR,
+    OK,
+    RPC_STREAM_SEQ_HEADER,
+    STREAM_REQUIRED
+)
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+
+svc = Service('svc')
+
+
+class Servicer:
+    def __init__(self):
+        self.produced = 0
+
+    @svc.rpc
+    async def rows(self, count):
+        for i in range(count):
+            self.produced += 1
+            yield {'i': i}
+
+    @svc.rpc
+    def broken(self):
+        yield 1
+        raise RuntimeError('broken')
+
+
+def test_slow_consumer_throttles_the_producer():
+    async def run():
+        broker = MemoryBroker()
+        servicer = Servicer()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, servicer)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        stream = client.stream_call(
+            RpcCall('server', 'svc', 'rows', [50]),
+            max_buffered=4,
+        )
+        first = await stream.__anext__()
+        await asyncio.sleep(0.05)
+        produced = servicer.produced
+        rest = [resp async for resp in stream]
+        await server.stop(1)
+        return first, produced, rest
+
+    first, produced, rest = asyncio.run(run())
+    assert first.body == {'i': 0}
+    assert produced <= 5
+    assert [resp.body['i'] for resp in rest] == list(range(1, 50))
+    assert all(resp.status == OK for resp in rest)
+
+
+def test_send_call_to_streaming_method_is_rejected():
+    async def run():
+        broker = MemoryBroker()
+        servicer = Servicer()
+        server = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='server',
+        )
+        server.add_svc(svc, servicer)
+        client = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(broker),
+            route='client',
+        )
+        server.configure()
+        client.configure()
+        await server.start()
+        await client.start()
+
+        call = RpcCall('server', 'svc', 'rows', [3])
+        resp = await client.send_call(call, timeout=1)
+        await server.stop(1)
+        return servicer, resp
+
+    servicer, resp = asyncio.run(run())
+    assert resp.status == STREAM_REQUIRED
+    assert servicer.produced == 0
+
+
+def test_stream_chunk_for_plain_call_fails_the_call():
+    async def run():
+        rpc = AsyncioAmqpRpc(conn=AsyncioMemoryConnection(), route='client')
+        future = asyncio.get_event_loop().create_future()
+        rpc.pending_calls.add('reply', future, 'server')
+        await rpc._on_resp_message(AmqpMsg(
+            payload=b'',
+            correlation_id='reply',
+            headers={RPC_STREAM_SEQ_HEADER: 0},
+        ))
+        return rpc, future
+
+    rpc, future = asyncio.run(run())
+    assert future.result().status == CALL_ERROR
+    assert rpc.pending_calls.get('reply') is None
+
+
+def test_loopback_stream_call_runs_locally():
+    async def run():
+        rpc = AsyncioAmqpRpc(conn=AsyncioMemoryConnection(), route='server')
+        rpc.add_svc(svc, Servicer())
+        rpc.enable_loopback()
+        rows = rpc.stream_call(RpcCall('server', 'svc', 'rows', [3]))
+        broken = rpc.stream_call(RpcCall('server', 'svc', 'broken', []))
+        return (
+            [resp async for resp in rows],
+            [resp async for resp in broken],
+        )
+
+    rows, broken = asyncio.run(run())
+    assert [resp.body for resp in rows] == [{'i': 0}, {'i': 1}, {'i': 2}]
+    assert [resp.status for resp in broken] == [OK, CALL_ERROR]
+
+
+def test_gevent_slow_consumer_throttles_the_producer():
+    gevent = pytest.importorskip('gevent')
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        produced = 0
+
+        @gevent_svc.rpc
+        def rows(self, count):
+            for i in range(count):
+                self.produced += 1
+                yield i
+
+    broker = MemoryBroker()
+    servicer = GeventServicer()
+    server = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='server')
+    server.add_svc(gevent_svc, servicer)
+    client = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='client')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    stream = client.stream_call(
+        RpcCall('server', 'svc', 'rows', [50]),
+        max_buffered=4,
+    )
+    first = next(stream)
+    gevent.sleep(0.05)
+    produced = servicer.produced
+    rest = list(stream)
+    server.stop(1)
+
+    assert first.body == 0
+    assert produced <= 5
+    assert [resp.body for resp in rest] == list(range(1, 50))
+
+
+def test_gevent_send_call_to_streaming_method_is_rejected():
+    gevent = pytest.importorskip('gevent')
+    from gevent.event import AsyncResult
+
+    from simple_amqp_rpc.gevent import GeventAmqpRpc
+    from simple_amqp_rpc.memory.gevent import GeventMemoryConnection
+
+    gevent_svc = Service('svc')
+
+    class GeventServicer:
+        produced = 0
+
+        @gevent_svc.rpc
+        def rows(self, count):
+            for i in range(count):
+                self.produced += 1
+                yield i
+
+    broker = MemoryBroker()
+    servicer = GeventServicer()
+    server = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='server')
+    server.add_svc(gevent_svc, servicer)
+    client = GeventAmqpRpc(conn=GeventMemoryConnection(broker), route='client')
+    server.configure()
+    client.configure()
+    server.start()
+    client.start()
+
+    with gevent.Timeout(2):
+        resp = client.send_call(RpcCall('server', 'svc', 'rows', [3]))
+    server.stop(1)
+
+    assert resp.status == STREAM_REQUIRED
+    assert servicer.produced == 0
+
+    future = AsyncResult()
+    client.pending_calls.add('reply', future, 'server')
+    client._on_resp_message(AmqpMsg(
+        payload=b'',
+        correlation_id='reply',
+        headers={RPC_STREAM_SEQ_HEADER: 0},
+    ))
+    assert future.get(timeout=1).status == CALL_ERROR
@@ -0,0 +1,37 @@
+import asyncio
+import os
+import signal
+
+from simple_amqp_rpc.asyncio import AsyncioAmqpRpc
+from simple_amqp_rpc.memory import MemoryBroker
+from simple_amqp_rpc.memory.asyncio import AsyncioMemoryConnection
+from simple_amqp_rpc.worker import run_worker
+
+
+def test_asyncio_worker_builds_rpc_in_its_loop():
+    loops = {}
+
+    def factory():
+        loops['factory'] = asyncio.get_event_loop()
+        rpc = AsyncioAmqpRpc(
+            conn=AsyncioMemoryConnection(MemoryBroker()),
+            route='server',
+        )
+        start = rpc.start
+
+        async def start_and_stop():
+            loops['start'] = asyncio.get_running_loop()
+            await start()
+            loops['start'].call_later(0.01, os.kill, os.getpid(),
+                                      signal.SIGTERM)
+
+        rpc.start = start_and_stop
+        return rpc
+
+    handler = signal.getsignal(signal.SIGINT)
+    try:
+        run_worker(factory, drain_timeout=1)
+    finally:
+        signal.signal(signal.SIGINT, handler)
+
+    assert loops['factory'] is loops['start']